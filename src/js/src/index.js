@@ -1,5 +1,22 @@
+const render = require('./plotly/render')
+const renderOutputs = require('./plotly/render-outputs')
+const store = require('./store')
+
 module.exports = {
     name: 'kaleido_scopes',
-    plotly: require('./plotly/render'),
+    // a figure with several outputs is plotted once for all of them
+    plotly: (info, topojsonURL, stepper) => {
+      try {
+        store.resolve(info)
+      } catch (err) {
+        return Promise.resolve({ code: err.code || 525, message: err.message, format: info.format, result: null })
+      }
+      return Array.isArray(info.outputs)
+        ? renderOutputs(info, topojsonURL)
+        : render(info, topojsonURL, stepper)
+    },
+    plotlyBatch: require('./plotly/render-batch'),
+    plotlyOutputs: renderOutputs,
+    store,
     // Additional plugins go here
 }
@@ -13,6 +13,7 @@ module.exports = {
   statusMsg: {
     400: 'invalid or malformed request syntax',
     406: 'requested format is not acceptable',
+    410: 'stored figure part is missing',
     525: 'plotly.js error',
     526: 'plotly.js version 1.11.0 or up required',
     527: 'plotly.js version 1.53.0 or up required for exporting to `json`',
@@ -0,0 +1,27 @@
+const render = require('./render')
+const store = require('../store')
+
+/**
+ * Render several figures one after another, in a single call.
+ *
+ * A figure that fails gets an error response, and the rest still render.
+ * Stored parts are put back into each figure first, see store.
+ *
+ * @param {object[]} infos : info objects, see render
+ * @param {string} topojsonURL
+ * @returns {Promise<object[]>} a response for each figure, in order
+ */
+function renderBatch (infos, topojsonURL) {
+  const responses = []
+  return infos.reduce((previous, info) => {
+    return previous
+      .then(() => render(store.resolve(info), topojsonURL, false))
+      .catch((err) => {
+        console.log(err)
+        return { code: err.code || 525, message: err.message, format: info.format, result: null }
+      })
+      .then((response) => { responses.push(response) })
+  }, Promise.resolve()).then(() => responses)
+}
+
+module.exports = renderBatch
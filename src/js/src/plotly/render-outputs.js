@@ -0,0 +1,193 @@
+/* global Plotly:false */
+
+const semver = require('semver')
+const cst = require('./constants')
+const parse = require('./parse')
+const render = require('./render')
+
+/**
+ * Render one figure to several outputs, plotting it as few times as possible.
+ *
+ * The figure is plotted once for each background the outputs need (jpeg is
+ * opaque, pdf is printed over its paper color), and every output is exported
+ * from that plot: a different size is a relayout, a different scale or
+ * format costs nothing but the export. PDFs come back as SVG data URLs with
+ * their background color, for the caller to show and print one at a time.
+ *
+ * Without Plotly.Snapshot (plotly.js < 1.31.0), and for json, each output is
+ * rendered on its own.
+ *
+ * @param {object} info : info object, see render, with
+ *  - outputs: [{format, width, height, scale}, ...]
+ * @param {string} topojsonURL
+ * @returns {Promise<object>} a response with a response for each output in
+ *  `outputs`, in order. If any output fails, the response is its error.
+ */
+function renderOutputs (info, topojsonURL) {
+  const parsed = info.outputs.map((output) => {
+    return parse(Object.assign({}, output, { figure: info.data }), {})
+  })
+  const bad = parsed.find((p) => p.code !== 0)
+  if (bad) {
+    return Promise.resolve(bad)
+  }
+  const outs = parsed.map((p) => p.result)
+  const figure = outs[0].figure
+
+  const canSnapshot = Plotly.Snapshot && Plotly.Snapshot.svgToImg &&
+    semver.gte(Plotly.version, '1.31.0')
+  const alone = []
+  const groups = new Map()
+  outs.forEach((out, i) => {
+    if (!canSnapshot || out.format === 'json') {
+      alone.push(i)
+      return
+    }
+    const bg = background(out.format)
+    if (!groups.has(bg)) groups.set(bg, [])
+    groups.get(bg).push(i)
+  })
+
+  const responses = new Array(outs.length)
+  let promise = Promise.resolve()
+  groups.forEach((indices, bg) => {
+    promise = promise.then(() => plotGroup(figure, outs, indices, bg, topojsonURL, responses))
+  })
+  alone.forEach((i) => {
+    promise = promise.then(() => renderAlone(info.data, outs[i], topojsonURL))
+      .then((response) => { responses[i] = response })
+  })
+
+  return promise
+    .then(() => {
+      const failed = responses.find((r) => r.code !== 0)
+      if (failed) {
+        return failed
+      }
+      return { code: 0, message: null, format: outs[0].format, result: null, outputs: responses }
+    })
+    .catch((err) => {
+      console.log(err)
+      return { code: 525, message: err.message, format: outs[0].format, result: null }
+    })
+}
+
+function background (format) {
+  if (format === 'jpeg' || format === 'emf') return 'opaque'
+  if (format === 'pdf' || format === 'eps') return 'pdf'
+  return ''
+}
+
+function respond (out, result, pdfBgColor) {
+  return {
+    code: 0,
+    message: null,
+    pdfBgColor,
+    format: out.format,
+    result,
+    width: out.width,
+    height: out.height,
+    scale: out.scale
+  }
+}
+
+function plotGroup (figure, outs, indices, bg, topojsonURL, responses) {
+  const Snapshot = Plotly.Snapshot
+  // outputs of the same size are exported one after another, from one draw
+  const order = indices.slice().sort((a, b) => {
+    return (outs[a].width - outs[b].width) || (outs[a].height - outs[b].height)
+  })
+  const first = outs[order[0]]
+
+  let pdfBgColor = null
+  const setBackground = bg !== 'pdf' ? bg : (gd, bgColor) => {
+    if (!pdfBgColor) pdfBgColor = bgColor
+    gd._fullLayout.paper_bgcolor = 'rgba(0,0,0,0)'
+  }
+  const defaultConfig = {
+    mapboxAccessToken: null,
+    plotGlPixelRatio: Math.max(...order.map((i) => outs[i].scale)) * 2
+  }
+  if (topojsonURL != undefined && topojsonURL.length > 0) {
+    defaultConfig.topojsonURL = topojsonURL
+  }
+  const config = Object.assign(defaultConfig, figure.config, {
+    _exportedPlot: true,
+    staticPlot: true,
+    setBackground
+  })
+  const layout = Object.assign({}, figure.layout, { width: first.width, height: first.height })
+
+  const gd = document.createElement('div')
+  gd.style.position = 'absolute'
+  gd.style.left = '-5000px'
+  document.body.appendChild(gd)
+
+  const draw = () => {
+    return Promise.resolve(Snapshot.getRedrawFunc(gd)()).then(() => {
+      return new Promise((resolve) => setTimeout(resolve, Snapshot.getDelay(gd._fullLayout)))
+    })
+  }
+  const exportOne = (out) => {
+    const svg = Snapshot.toSVG(gd, background(out.format) === 'pdf' ? 'svg' : out.format, out.scale)
+    if (out.format === 'svg') {
+      return Promise.resolve(out.encoded ? encodeSVG(svg) : svg)
+    }
+    if (background(out.format) === 'pdf') {
+      return Promise.resolve(encodeSVG(svg))
+    }
+    return Snapshot.svgToImg({
+      format: out.format,
+      width: gd._fullLayout.width,
+      height: gd._fullLayout.height,
+      scale: out.scale,
+      canvas: document.createElement('canvas'),
+      svg,
+      promise: true
+    }).then((url) => out.encoded ? url : url.replace(cst.imgPrefix.base64, ''))
+  }
+
+  let promise = Plotly.newPlot(gd, figure.data, layout, config).then(draw)
+  order.forEach((i) => {
+    const out = outs[i]
+    promise = promise.then(() => {
+      if (out.width === gd._fullLayout.width && out.height === gd._fullLayout.height) return
+      return Plotly.relayout(gd, { width: out.width, height: out.height }).then(draw)
+    }).then(() => exportOne(out)).then((result) => {
+      responses[i] = respond(out, result, bg === 'pdf' ? pdfBgColor : null)
+    })
+  })
+  const cleanup = () => {
+    Plotly.purge(gd)
+    document.body.removeChild(gd)
+  }
+  return promise.then(cleanup, (err) => {
+    cleanup()
+    throw err
+  })
+}
+
+function renderAlone (data, out, topojsonURL) {
+  // render prints pdfs itself, so ask it for the svg they are printed from
+  const pdf = background(out.format) === 'pdf'
+  const info = {
+    data,
+    format: pdf ? 'svg' : out.format,
+    width: out.width,
+    height: out.height,
+    scale: out.scale,
+    encoded: pdf || out.encoded
+  }
+  return render(info, topojsonURL, false).then((response) => {
+    if (response.code !== 0 || !pdf) {
+      return response
+    }
+    return respond(out, response.result, null)
+  })
+}
+
+function encodeSVG (svg) {
+  return 'data:image/svg+xml,' + encodeURIComponent(svg)
+}
+
+module.exports = renderOutputs
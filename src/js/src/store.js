@@ -0,0 +1,50 @@
+/**
+ * Large parts of figures, uploaded once and kept between renders.
+ *
+ * Kaleido sends a figure's template and large arrays here once per page
+ * load, and then specs with `refs`, a list of [path, hash] pairs, where they
+ * were. Each use parses its own copy, as plotly.js may change what it's given.
+ */
+const blobs = new Map()
+
+/**
+ * @param {string[]} drop : hashes of parts to forget first
+ * @param {string} hash
+ * @param {string} json : the part
+ */
+function put (drop, hash, json) {
+  drop.forEach((h) => blobs.delete(h))
+  blobs.set(hash, json)
+  return true
+}
+
+/**
+ * Put the stored parts back into a spec, in place.
+ *
+ * @param {object} spec : a spec, maybe with `refs`
+ * @returns {object} the spec
+ * @throws {Error} with code 410 if a part isn't stored
+ */
+function resolve (spec) {
+  if (!spec.refs) {
+    return spec
+  }
+  spec.refs.forEach(([path, hash]) => {
+    if (!blobs.has(hash)) {
+      const err = new Error(`stored figure part ${hash} is missing`)
+      err.code = 410
+      throw err
+    }
+    let parent = spec
+    path.slice(0, -1).forEach((key) => { parent = parent[key] })
+    parent[path[path.length - 1]] = JSON.parse(blobs.get(hash))
+  })
+  delete spec.refs
+  return spec
+}
+
+module.exports = {
+  put,
+  resolve,
+  size: () => blobs.size
+}
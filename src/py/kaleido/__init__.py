@@ -6,19 +6,27 @@ Please see the README.md for more information and a quickstart.
 
 from __future__ import annotations
 
+import math
+import os
+import warnings
 from typing import TYPE_CHECKING
 
 from choreographer.cli import get_chrome, get_chrome_sync
 
 from . import _sync_server
 from ._page_generator import PageGenerator
+from ._pool import KaleidoPool
+from ._profiler import ChromeTraceSink, JsonLinesSink, stage_percentiles
+from ._render_cache import DiskCache, MemoryCache
+from ._resource_cache import ResourceCache
 from .kaleido import Kaleido
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncIterable, Iterable
+    from collections.abc import AsyncIterable, Iterable, Mapping
     from pathlib import Path
-    from typing import Any, TypeVar, Union
+    from typing import Any, AsyncGenerator, TypeVar, Union
 
+    from ._profiler import RenderTaskProfile
     from ._utils.fig_tools import Figurish, LayoutOpts
 
     T = TypeVar("T")
@@ -27,12 +35,22 @@ if TYPE_CHECKING:
     from .kaleido import FigureDict
 
 __all__ = [
+    "ChromeTraceSink",
+    "DiskCache",
+    "JsonLinesSink",
     "Kaleido",
+    "KaleidoPool",
+    "MemoryCache",
     "PageGenerator",
+    "ResourceCache",
     "calc_fig",
     "calc_fig_sync",
+    "calc_figs",
+    "disable_warm_kaleido",
+    "enable_warm_kaleido",
     "get_chrome",
     "get_chrome_sync",
+    "stage_percentiles",
     "start_sync_server",
     "stop_sync_server",
     "write_fig",
@@ -42,6 +60,31 @@ __all__ = [
 ]
 
 _global_server = _sync_server.GlobalKaleidoServer()
+_warm_server = _sync_server.WarmKaleidoServer()
+
+
+def _warm_idle_timeout_from_env() -> float | None:
+    """Read KALEIDO_WARM_IDLE_TIMEOUT, warning about and ignoring bad values."""
+    value = os.environ.get("KALEIDO_WARM_IDLE_TIMEOUT")
+    if not value:
+        return None
+    try:
+        timeout = float(value)
+    except ValueError:
+        timeout = math.nan
+    if not math.isfinite(timeout) or timeout < 0:
+        warnings.warn(
+            f"Ignoring KALEIDO_WARM_IDLE_TIMEOUT={value!r}, it must be a number of "
+            "seconds. Using the default.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        return None
+    return timeout
+
+
+if os.environ.get("KALEIDO_WARM", "").lower() in ("1", "true", "yes"):
+    _warm_server.enable(idle_timeout=_warm_idle_timeout_from_env())
 
 
 def start_sync_server(*args: Any, silence_warnings: bool = False, **kwargs: Any):
@@ -78,6 +121,36 @@ def stop_sync_server(*, silence_warnings: bool = False):
     _global_server.close(silence_warnings=silence_warnings)
 
 
+def enable_warm_kaleido(*, idle_timeout: float | None = None):
+    """
+    Make the one-shot helpers share one browser instead of starting their own.
+
+    `calc_fig`, `write_fig`, `write_fig_from_object`, and their `_sync`
+    versions will start a browser on first use and keep it open, so later
+    calls only pay for the render. It closes after `idle_timeout` seconds
+    (default 300) without a call, and when Python exits. Calls which pass
+    `kopts` still start their own browser.
+
+    This can also be enabled by setting the environment variable
+    `KALEIDO_WARM=1`, and `KALEIDO_WARM_IDLE_TIMEOUT` to a number of seconds.
+
+    Args:
+        idle_timeout: (float | None, default None): seconds before an unused
+        browser is closed. None keeps the current value.
+
+    """
+    _warm_server.enable(idle_timeout=idle_timeout)
+
+
+def disable_warm_kaleido():
+    """Stop sharing one browser between one-shot helpers, and close it."""
+    _warm_server.disable()
+
+
+def _use_warm(kopts: dict[str, Any] | None) -> bool:
+    return _warm_server.enabled and not kopts
+
+
 async def calc_fig(
     fig: Figurish,
     opts: LayoutOpts | None = None,
@@ -98,6 +171,13 @@ async def calc_fig(
     See also the documentation for `Kaleido.calc_fig()`.
 
     """
+    if _use_warm(kopts):
+        return await _warm_server.call_function_async(
+            "calc_fig",
+            fig,
+            opts=opts,
+            topojson=topojson,
+        )
     kopts = kopts or {}
     kopts["n"] = 1  # should we force this?
     async with Kaleido(**kopts) as k:
@@ -108,6 +188,28 @@ async def calc_fig(
         )
 
 
+async def calc_figs(
+    fig_dicts: FigureDict | AnyIterable[FigureDict] | Mapping[Any, FigureDict],
+    *,
+    kopts: dict[str, Any] | None = None,
+    **kwargs,
+) -> AsyncGenerator[tuple[Any, bytes | Exception, RenderTaskProfile], None]:
+    """
+    Yield the binary for many plotly figures as each one finishes.
+
+    A convenience wrapper for `Kaleido.calc_figs()` which starts a `Kaleido` and
+    iterates over `calc_figs()`.
+    It takes an additional argument, `kopts`, a dictionary of arguments to pass
+    to the `Kaleido` constructor. See the `kaleido.Kaleido` docs.
+
+    See also the documentation for `Kaleido.calc_figs()`.
+
+    """
+    async with Kaleido(**(kopts or {})) as k:
+        async for result in k.calc_figs(fig_dicts, **kwargs):
+            yield result
+
+
 async def write_fig(
     fig: Figurish,
     path: str | None | Path = None,
@@ -128,6 +230,15 @@ async def write_fig(
     See also the documentation for `Kaleido.write_fig()`.
 
     """
+    if _use_warm(kopts):
+        return await _warm_server.call_function_async(
+            "write_fig",
+            fig,
+            path=path,
+            opts=opts,
+            topojson=topojson,
+            **kwargs,
+        )
     async with Kaleido(**(kopts or {})) as k:
         return await k.write_fig(
             fig,
@@ -155,6 +266,12 @@ async def write_fig_from_object(
     See also the documentation for `Kaleido.write_fig_from_object()`.
 
     """
+    if _use_warm(kopts):
+        return await _warm_server.call_function_async(
+            "write_fig_from_object",
+            fig_dicts,
+            **kwargs,
+        )
     async with Kaleido(**(kopts or {})) as k:
         return await k.write_fig_from_object(
             fig_dicts,
@@ -166,6 +283,8 @@ def calc_fig_sync(*args: Any, **kwargs: Any):
     """Call `calc_fig` but blocking."""
     if _global_server.is_running():
         return _global_server.call_function("calc_fig", *args, **kwargs)
+    elif _use_warm(kwargs.get("kopts")):
+        return _warm_server.call_function("calc_fig", *args, **kwargs)
     else:
         return _sync_server.oneshot_async_run(calc_fig, args=args, kwargs=kwargs)
 
@@ -174,6 +293,8 @@ def write_fig_sync(*args: Any, **kwargs: Any):
     """Call `write_fig` but blocking."""
     if _global_server.is_running():
         return _global_server.call_function("write_fig", *args, **kwargs)
+    elif _use_warm(kwargs.get("kopts")):
+        return _warm_server.call_function("write_fig", *args, **kwargs)
     else:
         return _sync_server.oneshot_async_run(write_fig, args=args, kwargs=kwargs)
 
@@ -182,6 +303,8 @@ def write_fig_from_object_sync(*args: Any, **kwargs: Any):
     """Call `write_fig_from_object` but blocking."""
     if _global_server.is_running():
         return _global_server.call_function("write_fig_from_object", *args, **kwargs)
+    elif _use_warm(kwargs.get("kopts")):
+        return _warm_server.call_function("write_fig_from_object", *args, **kwargs)
     else:
         return _sync_server.oneshot_async_run(
             write_fig_from_object,
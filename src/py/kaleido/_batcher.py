@@ -0,0 +1,128 @@
+"""Groups small renders so a tab renders several in one devtools call."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING
+
+import logistro
+
+if TYPE_CHECKING:
+    from typing import Any, Awaitable, Callable, Coroutine
+
+    from ._kaleido_tab import _KaleidoTab
+    from ._profiler import RenderTaskProfile
+    from ._utils import fig_tools
+
+_logger = logistro.getLogger(__name__)
+
+
+class BatchItem:
+    """A render waiting for a batch."""
+
+    spec: fig_tools.Spec
+    topojson: str | None
+    render_prof: RenderTaskProfile
+    future: asyncio.Future[bytes]
+
+    __slots__ = tuple(__annotations__)
+
+    def __init__(
+        self,
+        spec: fig_tools.Spec,
+        topojson: str | None,
+        render_prof: RenderTaskProfile,
+    ) -> None:
+        self.spec = spec
+        self.topojson = topojson
+        self.render_prof = render_prof
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class RenderBatcher:
+    """
+    Hands queued renders to free tabs, several at a time.
+
+    Renders queue up while every tab is busy. The next tab to be free takes up
+    to `max_size` of them, with the same topojson, in one batch. So batches
+    only form when there is a backlog, and a lone figure is never held back.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        get_tab: Callable[[], Awaitable[_KaleidoTab]],
+        render: Callable[[_KaleidoTab, list[BatchItem]], Coroutine[Any, Any, None]],
+        start_task: Callable[[Coroutine[Any, Any, None]], None],
+    ) -> None:
+        """
+        Create a batcher. Nothing runs until a render is submitted.
+
+        Args:
+            max_size: the most renders in a batch.
+            get_tab: waits for a free tab.
+            render: renders a batch on a tab, resolving each item's future,
+                and gives the tab back.
+            start_task: runs a coroutine in the background, until close.
+
+        """
+        self.max_size = max_size
+        self._get_tab = get_tab
+        self._render = render
+        self._start_task = start_task
+        self._items: deque[BatchItem] = deque()
+        self._has_items = asyncio.Event()
+        self._running = False
+
+    def submit(
+        self,
+        spec: fig_tools.Spec,
+        topojson: str | None,
+        render_prof: RenderTaskProfile,
+    ) -> asyncio.Future[bytes]:
+        """Queue a render, returning a future for its bytes."""
+        item = BatchItem(spec, topojson, render_prof)
+        self._items.append(item)
+        self._has_items.set()
+        if not self._running:
+            self._running = True
+            self._start_task(self._dispatch())
+        return item.future
+
+    def _fail_all(self, e: Exception) -> None:
+        self._running = False
+        while self._items:
+            item = self._items.popleft()
+            if not item.future.done():
+                item.future.set_exception(e)
+        self._has_items.clear()
+
+    def _take(self) -> list[BatchItem]:
+        batch: list[BatchItem] = []
+        skipped: list[BatchItem] = []
+        while self._items and len(batch) < self.max_size:
+            item = self._items.popleft()
+            if item.future.done():  # cancelled while queued
+                continue
+            if batch and item.topojson != batch[0].topojson:
+                skipped.append(item)
+                continue
+            batch.append(item)
+        self._items.extendleft(reversed(skipped))
+        if not self._items:
+            self._has_items.clear()
+        return batch
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._has_items.wait()
+            try:
+                tab = await self._get_tab()
+            except Exception as e:  # noqa: BLE001 given to everyone waiting
+                self._fail_all(e)
+                return
+            batch = self._take()
+            _logger.debug(f"Batch of {len(batch)} for {tab.tab.target_id[:4]}")
+            self._start_task(self._render(tab, batch))
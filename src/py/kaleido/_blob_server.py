@@ -0,0 +1,139 @@
+"""A minimal HTTP server on localhost for moving large payloads to tabs."""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+from typing import TYPE_CHECKING
+
+import logistro
+
+from ._utils import http_tools
+
+if TYPE_CHECKING:
+    from ._utils.http_tools import Request, Response
+
+_logger = logistro.getLogger(__name__)
+
+_HOST = "127.0.0.1"
+_BLOB_PATH = "/blob/"
+_SINK_PATH = "/sink/"
+
+# The page is a file:// URL, so every request is cross-origin.
+_CORS_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: *\r\n"
+    b"Access-Control-Allow-Private-Network: true\r\n"
+)
+
+
+class BlobServer:
+    """
+    Serves bytes to the browser over a loopback socket.
+
+    Each blob gets an unguessable, single-use URL. The browser fetches it and
+    parses it directly, so the bytes are never wrapped in a devtools message.
+    The browser can also POST results back, to a sink URL, the same way.
+    """
+
+    _blobs: dict[str, bytes]
+    _sinks: dict[str, asyncio.Future[bytes]]
+    _server: asyncio.AbstractServer | None
+    _port: int | None
+
+    def __init__(self) -> None:
+        """Create an unopened server."""
+        self._blobs = {}
+        self._sinks = {}
+        self._server = None
+        self._port = None
+
+    async def open(self) -> None:
+        """Start listening on a free port on localhost."""
+        self._server = await asyncio.start_server(self._handle, _HOST, 0)
+        self._port = self._server.sockets[0].getsockname()[1]
+        _logger.info(f"Blob server listening on {self.base_url}")
+
+    async def close(self) -> None:
+        """Stop listening and drop any blobs and sinks that were never used."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._blobs.clear()
+        for future in self._sinks.values():
+            future.cancel()
+        self._sinks.clear()
+
+    @property
+    def base_url(self) -> str:
+        """The root URL of the server."""
+        if self._port is None:
+            raise RuntimeError("Blob server is not open.")
+        return f"http://{_HOST}:{self._port}"
+
+    def put(self, data: bytes) -> str:
+        """
+        Register bytes to be served once.
+
+        Args:
+            data: the bytes to serve.
+
+        Returns:
+            The URL from which the bytes can be fetched.
+
+        """
+        token = secrets.token_urlsafe(16)
+        self._blobs[token] = data
+        return f"{self.base_url}{_BLOB_PATH}{token}"
+
+    def expect(self) -> tuple[str, asyncio.Future[bytes]]:
+        """
+        Register a single-use URL to which the browser can POST bytes.
+
+        Returns:
+            The URL, and a future resolving to the body POSTed to it.
+
+        """
+        token = secrets.token_urlsafe(16)
+        future = asyncio.get_running_loop().create_future()
+        self._sinks[token] = future
+        return f"{self.base_url}{_SINK_PATH}{token}", future
+
+    def discard(self, url: str) -> None:
+        """Forget a blob or a sink, whether or not it was used."""
+        token = url.rsplit("/", 1)[-1]
+        self._blobs.pop(token, None)
+        if (future := self._sinks.pop(token, None)) and not future.done():
+            future.cancel()
+
+    def _respond(self, request: Request) -> Response:
+        method, target, _, body = request
+        _logger.debug(f"Blob server: {method} {target[:20]}")
+        if method == "OPTIONS":
+            return "204 No Content", b"", "application/octet-stream"
+        if method == "GET" and target.startswith(_BLOB_PATH):
+            token = target[len(_BLOB_PATH) :]
+            if (data := self._blobs.pop(token, None)) is not None:
+                return "200 OK", data, "application/json"
+        elif method == "POST" and target.startswith(_SINK_PATH):
+            token = target[len(_SINK_PATH) :]
+            future = self._sinks.pop(token, None)
+            if future and not future.done():
+                future.set_result(body)
+                return "204 No Content", b"", "application/octet-stream"
+        return "404 Not Found", b"", "application/octet-stream"
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        await http_tools.serve(
+            reader,
+            writer,
+            self._respond,
+            name="Blob server",
+            extra_headers=_CORS_HEADERS,
+        )
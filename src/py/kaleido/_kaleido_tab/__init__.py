@@ -1,8 +1,13 @@
+from ._code_cache import CodeCache
+from ._content_store import ContentStore
 from ._errors import JavascriptError, KaleidoError
-from ._tab import _KaleidoTab
+from ._tab import ReloadPolicy, _KaleidoTab
 
 __all__ = [
+    "CodeCache",
+    "ContentStore",
     "JavascriptError",
     "KaleidoError",
+    "ReloadPolicy",
     "_KaleidoTab",
 ]
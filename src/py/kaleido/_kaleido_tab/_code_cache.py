@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import logistro
+
+from ._errors import _raise_error
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    import choreographer
+
+_logger = logistro.getLogger(__name__)
+
+
+class CodeCache:
+    """
+    Compiled javascript shared between tabs, so each library is compiled once.
+
+    The first tab to load the page asks V8 to produce a code cache for each
+    script. Every tab after that is seeded with it once, before navigating or
+    at its first reload after the cache is produced, so the scripts are
+    deserialized instead of compiled. A seeded tab keeps the cache across
+    reloads, so it is never sent to a tab twice.
+    """
+
+    urls: list[str]
+    """The scripts to cache."""
+    data: dict[str, str]
+    """The base64 code cache of each script, once produced."""
+
+    def __init__(self, urls: list[str]) -> None:
+        self.urls = urls
+        self.data = {}
+        self._producer: choreographer.Tab | None = None
+
+    async def prepare(self, tab: choreographer.Tab) -> bool:
+        """
+        Seed a tab with the cache, or have it produce one if there's none.
+
+        Returns:
+            True once the tab needs no more preparing: it was seeded, or
+            seeding it failed.
+
+        """
+        seeding = bool(self.data)
+        try:
+            if seeding:
+                for url, data in self.data.items():
+                    _raise_error(
+                        await tab.send_command(
+                            "Page.addCompilationCache",
+                            params={"url": url, "data": data},
+                        ),
+                    )
+                return True
+            if self._producer is None:
+                self._producer = tab
+                tab.subscribe("Page.compilationCacheProduced", self._store)
+                _raise_error(await tab.send_command("Page.enable"))
+                _raise_error(
+                    await tab.send_command(
+                        "Page.produceCompilationCache",
+                        params={
+                            "scripts": [{"url": u, "eager": True} for u in self.urls],
+                        },
+                    ),
+                )
+        except Exception as e:  # noqa: BLE001 only an optimization
+            _logger.info("Couldn't use the code cache.", exc_info=e)
+            return seeding
+        return False
+
+    async def _store(self, event: Any) -> None:
+        params = event.get("params", {})
+        if params.get("url") in self.urls and params.get("data"):
+            _logger.debug(f"Code cache produced for {params['url']}")
+            self.data[params["url"]] = params["data"]
+        if self._producer is not None and set(self.data) >= set(self.urls):
+            self._producer.unsubscribe("Page.compilationCacheProduced")
@@ -0,0 +1,156 @@
+"""Large parts of figures kept in a tab, so each is only uploaded once."""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import logistro
+
+from kaleido._utils import fig_tools
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, List, Tuple, Union
+
+    from typing_extensions import TypeAlias
+
+    JsonPath: TypeAlias = List[Union[str, int]]
+    Ref: TypeAlias = Tuple[JsonPath, str]
+
+_logger = logistro.getLogger(__name__)
+
+MIN_SIZE = 16 * 1024
+"""Parts smaller than this many bytes, roughly, are always sent inline."""
+MAX_SIZE = 10 * 1024 * 1024
+"""Parts larger than this are sent inline, where large specs are chunked."""
+
+
+def _is_array(obj: Any) -> bool:
+    if isinstance(obj, dict):  # a plotly.js typed array
+        return "bdata" in obj and "dtype" in obj
+    if isinstance(obj, (list, tuple)):
+        return bool(obj) and not isinstance(obj[0], (dict, list, tuple))
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+
+class ContentStore:
+    """
+    Keeps track of the parts of figures one tab holds, least recently used first.
+
+    `split()` replaces a figure's template and large arrays with references to
+    their hash. `plan()` then says which of them the tab still needs, and which
+    it should drop to stay under its byte budget. kaleido_scopes puts the
+    parts back before rendering. The tab forgets everything when it reloads,
+    so call `clear()` then.
+    """
+
+    max_bytes: int
+    """The most bytes of parts to keep in the tab."""
+    min_size: int
+    """The smallest part, in approximate bytes, that is stored."""
+    bytes: int
+    """The bytes of parts in the tab."""
+
+    def __init__(self, max_bytes: int, min_size: int = MIN_SIZE) -> None:
+        """
+        Create an empty store.
+
+        Args:
+            max_bytes: the most bytes of parts to keep in the tab.
+            min_size: the smallest part, in approximate bytes, worth storing.
+                Defaults to MIN_SIZE.
+
+        """
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.bytes = 0
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+
+    def __contains__(self, digest: str) -> bool:
+        """Check if the tab holds a part."""
+        return digest in self._sizes
+
+    def clear(self) -> None:
+        """Forget every part, after the tab has lost them."""
+        self._sizes.clear()
+        self.bytes = 0
+
+    def split(
+        self,
+        spec: fig_tools.Spec,
+        dumps: Callable[[Any], bytes],
+    ) -> tuple[fig_tools.Spec, dict[str, bytes]]:
+        """
+        Replace the large parts of a spec's figure with references.
+
+        The template and any array of at least `min_size` bytes are taken out,
+        and the spec gets a "refs" list of `[path, hash]` pairs instead. The
+        spec passed in is not modified.
+
+        Args:
+            spec: the spec to split.
+            dumps: serializes a part to JSON, as the spec would be.
+
+        Returns:
+            The new spec, and the JSON of each part taken out by its hash.
+
+        """
+        max_size = min(MAX_SIZE, self.max_bytes)
+        refs: list[Ref] = []
+        parts: dict[str, bytes] = {}
+
+        def extract(obj: Any, path: JsonPath) -> Any:
+            if (
+                path == ["layout", "template"] or _is_array(obj)
+            ) and self.min_size <= fig_tools.approx_size(obj) <= max_size:
+                part = dumps(obj)
+                digest = hashlib.blake2b(part, digest_size=16).hexdigest()
+                parts[digest] = part
+                refs.append((["data", *path], digest))
+                return None  # kaleido_scopes puts the part here
+            if isinstance(obj, dict) and not _is_array(obj):
+                return {k: extract(v, [*path, k]) for k, v in obj.items()}
+            if isinstance(obj, (list, tuple)) and not _is_array(obj):
+                return [extract(v, [*path, i]) for i, v in enumerate(obj)]
+            return obj
+
+        data = extract(spec["data"], [])
+        if not refs:
+            return spec, {}
+        split_spec = dict(spec, data=data, refs=refs)
+        return split_spec, parts  # type: ignore[return-value]
+
+    def plan(self, parts: dict[str, bytes]) -> tuple[dict[str, bytes], list[str]]:
+        """
+        Decide what to send to the tab for a render, and count it as stored.
+
+        Args:
+            parts: every part the render refers to, by hash.
+
+        Returns:
+            The parts the tab doesn't have yet, and the hashes of parts it
+            should drop first, least recently used, to make room for them.
+            Parts the render needs are never dropped.
+
+        """
+        for digest in parts:
+            if digest in self._sizes:
+                self._sizes.move_to_end(digest)
+        new = {d: part for d, part in parts.items() if d not in self._sizes}
+        needed = sum(len(part) for part in new.values())
+        drop = []
+        for digest in list(self._sizes):
+            if self.bytes + needed <= self.max_bytes:
+                break
+            if digest not in parts:
+                self.bytes -= self._sizes.pop(digest)
+                drop.append(digest)
+        for digest, part in new.items():
+            self._sizes[digest] = len(part)
+            self.bytes += len(part)
+        if drop:
+            _logger.debug(f"Dropping {len(drop)} stored parts from a tab.")
+        return new, drop
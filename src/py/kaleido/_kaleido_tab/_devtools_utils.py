@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import base64
 import json
 from typing import TYPE_CHECKING
 
@@ -10,12 +11,15 @@ import logistro
 from ._errors import KaleidoError, _raise_error
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
     from typing import Any
 
     import choreographer
 
 _logger = logistro.getLogger(__name__)
 
+_STREAM_READ_SIZE = 1024 * 1024
+
 
 def get_js_id(result) -> int:
     """Grab javascript engine ID from a chrome executionContextStarted event."""
@@ -105,9 +109,42 @@ def check_kaleido_js_response(
     return js_response
 
 
+def check_kaleido_js_batch_response(
+    response,
+) -> list[dict | KaleidoError]:
+    """
+    Check the response of a batch, like `check_kaleido_js_response()`.
+
+    Errors with the call itself are raised, but a figure that failed only
+    gets a KaleidoError in its place, in the order the figures were sent.
+    """
+    _raise_error(response)
+    js_responses = json.loads(
+        response.get("result", {}).get("result", {}).get("value") or "null",
+    )
+    if not isinstance(js_responses, list):
+        raise RuntimeError(  # noqa: TRY004 as for a single response
+            f"Javascript response not understood: {response}",
+        )
+    return [
+        r if r["code"] == 0 else KaleidoError(r["code"], r["message"])
+        for r in js_responses
+    ]
+
+
 async def print_pdf(
     tab: choreographer.Tab,
-) -> str:
+) -> AsyncIterator[bytes]:
+    """
+    Print the page to PDF, yielding it in chunks as they are read.
+
+    Chrome keeps the PDF in a stream and we read it a piece at a time, so the
+    whole document is never held in one devtools message.
+
+    Args:
+        tab: the choreographer tab to print.
+
+    """
     pdf_params = {
         "printBackground": True,
         "marginTop": 0.1,
@@ -116,10 +153,30 @@ async def print_pdf(
         "marginRight": 0.1,
         "preferCSSPageSize": True,
         "pageRanges": "1",
+        "transferMode": "ReturnAsStream",
     }
     pdf_response = await tab.send_command(
         "Page.printToPDF",
         params=pdf_params,
     )
     _raise_error(pdf_response)
-    return pdf_response.get("result", {}).get("data")  # Check for None?
+    handle = pdf_response.get("result", {}).get("stream")
+    if not handle:
+        raise RuntimeError(f"Print to PDF returned no stream: {pdf_response}")
+    try:
+        while True:
+            read_response = await tab.send_command(
+                "IO.read",
+                params={"handle": handle, "size": _STREAM_READ_SIZE},
+            )
+            _raise_error(read_response)
+            result = read_response.get("result", {})
+            data = result.get("data", "")
+            if result.get("base64Encoded"):
+                yield base64.b64decode(data)
+            else:
+                yield data.encode()
+            if result.get("eof"):
+                break
+    finally:
+        await tab.send_command("IO.close", params={"handle": handle})
@@ -1,35 +1,233 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, TypedDict
 
 import logistro
 import orjson
 
+from kaleido import _utils
+from kaleido._utils import fig_tools
+
 from . import _devtools_utils as _dtools
 from . import _js_logger
 from ._errors import _raise_error
 
 if TYPE_CHECKING:
-    import asyncio
+    from collections.abc import AsyncIterator
     from pathlib import Path
+    from typing import Any
 
     import choreographer as choreo
 
-    from kaleido._utils import fig_tools
+    from kaleido._blob_server import BlobServer
+    from kaleido._resource_cache import ResourceCache
+
+    from ._code_cache import CodeCache
+    from ._content_store import ContentStore
 
 
 _TEXT_FORMATS = ("svg", "json")  # eps
-_CHUNK_SIZE = 10 * 1024 * 1024  # 10 MB
+_CHUNK_SIZE = 10 * 1024 * 1024  # 10 MB, also the first chunk's size
+_MIN_CHUNK_SIZE = 1024 * 1024
+_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+_CHUNK_TARGET_SECONDS = 0.25  # chunks are sized to take about this long
+_CHUNKS_IN_FLIGHT = 4
+_UTF8_CONTINUATION_MASK, _UTF8_CONTINUATION = 0xC0, 0x80  # 10xxxxxx
 
 _logger = logistro.getLogger(__name__)
 
+# Puts the page back the way it was after load, without reloading it. Returns
+# false if the libraries we need are missing, in which case we must reload.
+_RESET_JS_FN = (
+    r"function()"
+    r"{"
+    r"if (typeof Plotly === 'undefined' || typeof kaleido_scopes === 'undefined')"
+    r"{ return false; }"
+    r"document.querySelectorAll('.js-plotly-plot').forEach(function (gd)"
+    r"{ Plotly.purge(gd); gd.remove(); });"
+    r"delete window.__kaleido_chunks;"
+    r"var style = document.getElementById('head-style');"
+    r"var img = document.getElementById('kaleido-image');"
+    r"if (!style || !img) { return false; }"
+    r"style.innerHTML = '';"
+    r"img.onload = img.onerror = null;"
+    r"img.removeAttribute('src');"
+    r"return true;"
+    r"}"
+)
+
+
+# Chunks are written at their byte offset into a buffer sized for the whole
+# spec, so they can arrive in any order and are never joined.
+_CHUNKS_INIT_JS_FN = (
+    r"function(n)"
+    r"{ window.__kaleido_chunks = {buf: new Uint8Array(n), enc: new TextEncoder()}; }"
+)
+_CHUNK_PUT_JS_FN = (
+    r"function(offset, c)"
+    r"{"
+    r"var k = window.__kaleido_chunks;"
+    r"k.enc.encodeInto(c, k.buf.subarray(offset));"
+    r"}"
+)
+_CHUNKS_RENDER_JS_FN = (
+    r"function(...args)"
+    r"{"
+    r"var spec = JSON.parse(new TextDecoder().decode(window.__kaleido_chunks.buf));"
+    r"delete window.__kaleido_chunks;"
+    r"return kaleido_scopes.plotly(spec, ...args).then(JSON.stringify);"
+    r"}"
+)
+
+
+def _utf8_boundary(data: bytes, i: int) -> int:
+    """Move index `i` back to the start of a UTF-8 character."""
+    if i >= len(data):
+        return len(data)
+    while data[i] & _UTF8_CONTINUATION_MASK == _UTF8_CONTINUATION:
+        i -= 1
+    return i
+
+
+async def _write_chunks(chunks: AsyncIterator[bytes], path: Path) -> int:
+    """Write chunks to a file as they arrive. Returns the number of bytes."""
+    f = await _utils.to_thread(path.open, "wb")
+    written = 0
+    try:
+        async for chunk in chunks:
+            written += await _utils.to_thread(f.write, chunk)
+    finally:
+        await _utils.to_thread(f.close)
+    return written
+
+
+class _ChunkSizer:
+    """Sizes chunks from the throughput of the upload so far."""
+
+    def __init__(self) -> None:
+        self.size = _CHUNK_SIZE
+        self._sent = 0
+        self._start = time.perf_counter()
+
+    def record(self, size: int) -> None:
+        self._sent += size
+        elapsed = time.perf_counter() - self._start
+        if elapsed > 0:
+            ideal = int(self._sent / elapsed * _CHUNK_TARGET_SECONDS)
+            self.size = min(max(ideal, _MIN_CHUNK_SIZE), _MAX_CHUNK_SIZE)
+
+
+# For the http transport: fetch the spec from the blob server, and POST the
+# image back to a sink instead of returning it base64 encoded inside JSON.
+_FETCH_JS_FN = (
+    r"function(url, sinkUrl, ...args)"
+    r"{"
+    r"return fetch(url).then(function (r) {"
+    r"if (!r.ok) { throw new Error('Fetching figure failed: ' + r.status); }"
+    r"return r.json();"
+    r"}).then(function (spec) {"
+    r"return kaleido_scopes.plotly(spec, ...args);"
+    r"}).then(function (response) {"
+    r"var data = response.result;"
+    r"if (response.code !== 0 || typeof data !== 'string' || data.startsWith('data:'))"
+    r"{ return response; }"
+    r"var body = (response.format === 'svg' || response.format === 'json')"
+    r"? Promise.resolve(data)"
+    r": fetch('data:application/octet-stream;base64,' + data)"
+    r".then(function (r) { return r.blob(); });"
+    r"return body.then(function (b) {"
+    r"return fetch(sinkUrl, {method: 'POST', body: b});"
+    r"}).then(function (r) {"
+    r"if (!r.ok) { throw new Error('Sending image failed: ' + r.status); }"
+    r"response.result = null;"
+    r"response.sunk = true;"
+    r"return response;"
+    r"});"
+    r"}).then(JSON.stringify);"
+    r"}"
+)
+
+# Renders figures one after another in the page, returning all their results.
+_BATCH_JS_FN = (
+    r"function(specsStr, topojson)"
+    r"{"
+    r"return kaleido_scopes"
+    r".plotlyBatch(JSON.parse(specsStr), topojson)"
+    r".then(JSON.stringify);"
+    r"}"
+)
+
+# Keeps a large part of a figure in the page, see ContentStore.
+_STORE_PUT_JS_FN = (
+    r"function(drop, hash, json)"
+    r"{ return kaleido_scopes.store.put(drop, hash, json); }"
+)
+
+# Shows an image as the page's only content, sized to it, ready to print.
+_PDF_PAGE_JS_FN = (
+    r"function(src, width, height, bgColor)"
+    r"{"
+    r"document.getElementById('head-style').innerHTML ="
+    r"'@page { size: ' + width + 'px ' + height + 'px; }'"
+    r"+ ' body { margin: 0; padding: 0; background-color: ' + bgColor + ' }';"
+    r"var img = document.getElementById('kaleido-image');"
+    r"return new Promise(function (resolve, reject) {"
+    r"img.onload = function () { resolve(true); };"
+    r"img.onerror = function () { reject(new Error('Loading the PDF page failed.')); };"
+    r"img.src = src;"
+    r"});"
+    r"}"
+)
+
+# Adds MathJax to a page that was loaded without it, and waits until it has
+# started, for both MathJax 2 and 3. plotly.js finds it at render time.
+_LOAD_MATHJAX_JS_FN = (
+    r"function(src, charset)"
+    r"{"
+    r"var loaded = (window.MathJax && (window.MathJax.startup || window.MathJax.Hub))"
+    r"? Promise.resolve()"
+    r": new Promise(function (resolve, reject) {"
+    r"var script = document.createElement('script');"
+    r"script.src = src;"
+    r"if (charset) { script.charset = charset; }"
+    r"script.onload = resolve;"
+    r"script.onerror = function () {"
+    r"reject(new Error('Loading MathJax failed: ' + src));"
+    r"};"
+    r"document.head.appendChild(script);"
+    r"});"
+    r"return loaded.then(function () {"
+    r"if (window.MathJax.startup) { return window.MathJax.startup.promise; }"
+    r"return new Promise(function (resolve) {"
+    r"window.MathJax.Hub.Register.StartupHook('End', resolve);"
+    r"});"
+    r"}).then(function () { return true; });"
+    r"}"
+)
+
+
+class ReloadPolicy(TypedDict, total=False):
+    """
+    Decides when a tab is fully reloaded instead of reset in place.
+
+    A tab is always reloaded after a render fails.
+    """
 
-def _orjson_default(obj):
-    """Fallback for types orjson can't handle natively (e.g. NumPy string arrays)."""
-    if hasattr(obj, "tolist"):
-        return obj.tolist()
-    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+    every: int
+    """Reload after this many renders. The default, 1, reloads after every render."""
+    max_heap: int | None
+    """Reload if the tab's javascript heap uses more than this many bytes."""
+
+
+def _dumps(obj: Any) -> bytes:
+    return orjson.dumps(
+        obj,
+        default=_utils.orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
 
 
 def _subscribe_new(tab: choreo.Tab, event: str) -> asyncio.Future:
@@ -53,7 +251,18 @@ class _KaleidoTab:
     js_logger: _js_logger.JavascriptLogger
     """A log for recording javascript."""
 
-    def __init__(self, tab, *, headers: dict[str, str] | None = None):
+    def __init__(  # noqa: PLR0913
+        self,
+        tab,
+        *,
+        headers: dict[str, str] | None = None,
+        blob_server: BlobServer | None = None,
+        offloader: _utils.Offloader | None = None,
+        code_cache: CodeCache | None = None,
+        mathjax: tuple[str, str] | None = None,
+        content_store: ContentStore | None = None,
+        resource_cache: ResourceCache | None = None,
+    ):
         """
         Create a new _KaleidoTab.
 
@@ -64,9 +273,44 @@ class _KaleidoTab:
                 Extra HTTP headers to send with every request made by the
                 browser tab. Defaults to None.
 
+            blob_server (BlobServer | None, optional):
+                If set, figures are fetched by the tab from this server instead
+                of being sent as devtools arguments. Defaults to None.
+
+            offloader (Offloader | None, optional):
+                Runs large serializations and decodes off the event loop.
+                Defaults to None, which uses the default thread pool.
+
+            code_cache (CodeCache | None, optional):
+                Compiled javascript to seed the tab with, once it is produced.
+                Defaults to None.
+
+            mathjax (tuple[str, str] | None, optional):
+                The url and charset of a MathJax left out of the page. It is
+                loaded the first time a figure has LaTeX in it. Defaults to
+                None.
+
+            content_store (ContentStore | None, optional):
+                If set, templates and large arrays are uploaded once and kept
+                in the page between renders, until it reloads. Defaults to
+                None.
+
+            resource_cache (ResourceCache | None, optional):
+                If set, the tab's requests for data and images, like topojson,
+                are answered from it. Defaults to None.
+
         """
         self.tab = tab
         self._headers = headers
+        self._blob_server = blob_server
+        self._offloader = offloader or _utils.Offloader()
+        self._code_cache = code_cache
+        self._code_cache_seeded = False
+        self._mathjax = mathjax
+        self._mathjax_loaded = False
+        self._content_store = content_store
+        self._resource_cache = resource_cache
+        self._renders_since_reload = 0
         self.js_logger = _js_logger.JavascriptLogger(self.tab)
 
     async def navigate(self, url: str | Path = ""):
@@ -87,6 +331,15 @@ class _KaleidoTab:
         # Apply headers if they exist
         await self._apply_headers()
 
+        if self._resource_cache:
+            await self._resource_cache.prepare(
+                self.tab,
+                headers=self._headers,
+                exclude=(self._blob_server.base_url,) if self._blob_server else (),
+            )
+
+        await self._prepare_code_cache()
+
         # Navigating page. This will trigger the above events.
         _logger.debug2(f"Calling Page.navigate on {self.tab}")
         _raise_error(await self.tab.send_command("Page.navigate", params={"url": url}))
@@ -103,6 +356,10 @@ class _KaleidoTab:
         self._current_js_id = _dtools.get_js_id(await javascript_ready)
 
         await page_ready  # don't care result, ready is ready
+        self._renders_since_reload = 0
+        self._mathjax_loaded = False
+        if self._content_store:
+            self._content_store.clear()
 
         # this runs *after* page load because running it first thing
         # requires a couple extra lines
@@ -117,15 +374,94 @@ class _KaleidoTab:
 
         page_ready = _subscribe_new(self.tab, "Page.loadEventFired")
 
+        await self._prepare_code_cache()
+
         _logger.debug2(f"Calling Page.reload on {self.tab}")
         _raise_error(await self.tab.send_command("Page.reload"))
 
         self._current_js_id = _dtools.get_js_id(await javascript_ready)
 
         await page_ready
+        self._renders_since_reload = 0
+        self._mathjax_loaded = False
+        if self._content_store:
+            self._content_store.clear()
 
         self.js_logger.reset()
 
+    async def reset(self) -> bool:
+        """
+        Clean up the page after a render without reloading it.
+
+        Returns:
+            True if the page was reset, False if it needs a full reload.
+
+        """
+        _logger.debug(f"Resetting tab {self.tab} in place.")
+        try:
+            result = await _dtools.exec_js_fn(
+                self.tab,
+                self._current_js_id,
+                _RESET_JS_FN,
+            )
+            _raise_error(result)
+        except Exception as e:  # noqa: BLE001 any failure means reload
+            _logger.info(f"Resetting tab {self.tab} failed, will reload.", exc_info=e)
+            return False
+        if result.get("result", {}).get("result", {}).get("value") is not True:
+            _logger.info(f"Tab {self.tab} is missing its globals, will reload.")
+            return False
+        self.js_logger.reset()
+        return True
+
+    async def heap_usage(self) -> int:
+        """Return the number of bytes used by the tab's javascript heap."""
+        result = await self.tab.send_command("Runtime.getHeapUsage")
+        _raise_error(result)
+        return result.get("result", {}).get("usedSize", 0)
+
+    async def _needs_reload(self, policy: ReloadPolicy, *, errored: bool) -> bool:
+        if errored or self._renders_since_reload >= policy.get("every", 1):
+            return True
+        if (max_heap := policy.get("max_heap")) is not None:
+            try:
+                return await self.heap_usage() > max_heap
+            except Exception as e:  # noqa: BLE001 can't tell, so reload
+                _logger.info(f"Couldn't measure heap of {self.tab}.", exc_info=e)
+                return True
+        return False
+
+    async def recycle(
+        self,
+        policy: ReloadPolicy | None = None,
+        *,
+        errored: bool = False,
+    ) -> bool:
+        """
+        Prepare the tab for its next render, reloading it only if needed.
+
+        Args:
+            policy: the `ReloadPolicy` to follow. Defaults to reloading after
+                every render.
+            errored: whether the last render failed, which forces a reload.
+
+        Returns:
+            True if the tab was reloaded, False if it was reset in place.
+
+        """
+        self._renders_since_reload += 1
+        if await self._needs_reload(policy or {}, errored=errored) or (
+            not await self.reset()
+        ):
+            await self.reload()
+            return True
+        return False
+
+    async def _prepare_code_cache(self) -> None:
+        """Seed the tab with compiled javascript, once it is produced."""
+        if self._code_cache and not self._code_cache_seeded:
+            self._code_cache_seeded = await self._code_cache.prepare(self.tab)
+
     async def _apply_headers(self):
         """Apply extra HTTP headers to the tab if configured."""
         if self._headers:
@@ -139,24 +475,117 @@ class _KaleidoTab:
                 )
             )
 
-    async def _calc_fig(
+    async def _needs_mathjax(self, specs: list[fig_tools.Spec]) -> bool:
+        """Check if MathJax must be loaded first, off the loop for large specs."""
+        if not self._mathjax or self._mathjax_loaded:
+            return False
+        for spec in specs:
+            if await self._offloader.run(
+                fig_tools.approx_size(spec["data"]),
+                fig_tools.has_latex,
+                spec["data"],
+            ):
+                return True
+        return False
+
+    async def _load_mathjax(self) -> None:
+        if not self._mathjax:
+            raise RuntimeError("This tab has no MathJax to load.")
+        src, charset = self._mathjax
+        _logger.debug(f"Loading MathJax into {self.tab} from {src}")
+        result = await _dtools.exec_js_fn(
+            self.tab,
+            self._current_js_id,
+            _LOAD_MATHJAX_JS_FN,
+            src,
+            charset,
+        )
+        _raise_error(result)
+        self._mathjax_loaded = True
+
+    async def _store_content(
+        self,
+        specs: list[fig_tools.Spec],
+        render_profs: list,
+    ) -> tuple[list[fig_tools.Spec], list[int]]:
+        """
+        Upload the large parts of specs that the page doesn't have yet.
+
+        Returns the specs with references in their place, and the bytes sent
+        for each. Parts are planned together, so that no spec's parts are
+        dropped to make room for another's.
+        """
+        if not self._content_store:
+            return specs, [0] * len(specs)
+        split = []
+        every_part: dict[str, bytes] = {}
+        for spec, render_prof in zip(specs, render_profs):
+            render_prof.profile_log.tick("storing content")
+            split_spec, parts = await self._offloader.run(
+                fig_tools.approx_size(spec["data"]),
+                self._content_store.split,
+                spec,
+                _dumps,
+            )
+            split.append((split_spec, parts))
+            every_part.update(parts)
+        new, drop = self._content_store.plan(every_part)
+        for digest, part in new.items():
+            _raise_error(
+                await _dtools.exec_js_fn(
+                    self.tab,
+                    self._current_js_id,
+                    _STORE_PUT_JS_FN,
+                    drop,
+                    digest,
+                    part.decode(),
+                ),
+            )
+            drop = []
+        stored = []
+        for (_, parts), render_prof in zip(split, render_profs):
+            stored.append(sum(len(new.pop(d)) for d in parts if d in new))
+            render_prof.profile_log.tick("content stored")
+        return [spec for spec, _ in split], stored
+
+    async def _send_spec(
         self,
         spec: fig_tools.Spec,
         *,
         topojson: str | None,
         render_prof,
         stepper,
-    ) -> bytes:
+    ) -> tuple[dict, bytes | None]:
+        """
+        Serialize a spec and render it in the page, however it best fits.
+
+        Returns the checked javascript response, and the image bytes if the
+        page sent them to the blob server instead.
+        """
+        if await self._needs_mathjax([spec]):
+            render_prof.profile_log.tick("loading mathjax")
+            await self._load_mathjax()
+            render_prof.profile_log.tick("mathjax loaded")
+
+        (spec,), (stored,) = await self._store_content([spec], [render_prof])
         render_prof.profile_log.tick("serializing spec")
-        spec_str = orjson.dumps(
+        spec_bytes = await self._offloader.run(
+            fig_tools.approx_size(spec["data"]),
+            _dumps,
             spec,
-            default=_orjson_default,
-            option=orjson.OPT_SERIALIZE_NUMPY,
-        ).decode()
+        )
+        render_prof.data_in_size = len(spec_bytes) + stored
         render_prof.profile_log.tick("spec serialized")
 
         render_prof.profile_log.tick("sending javascript")
-        if len(spec_str) <= _CHUNK_SIZE:
+        sunk = None  # image bytes the page POSTed back to the blob server
+        if self._blob_server:
+            result, sunk = await self._calc_fig_fetched(
+                spec_bytes,
+                topojson=topojson,
+                stepper=stepper,
+            )
+        elif len(spec_bytes) <= _CHUNK_SIZE:
             kaleido_js_fn = (
                 r"function(specStr, ...args)"
                 r"{"
@@ -169,76 +598,266 @@ class _KaleidoTab:
                 self.tab,
                 self._current_js_id,
                 kaleido_js_fn,
-                spec_str,
+                spec_bytes.decode(),
                 topojson,
                 stepper,
             )
         else:
             result = await self._calc_fig_chunked(
-                spec_str,
+                spec_bytes,
                 topojson=topojson,
+                render_prof=render_prof,
                 stepper=stepper,
             )
         _raise_error(result)
         render_prof.profile_log.tick("javascript sent")
 
         _logger.debug2(f"Result of function call: {result}")
-        js_response = _dtools.check_kaleido_js_response(result)
+        return _dtools.check_kaleido_js_response(result), sunk
+
+    async def _decode(self, js_response: dict) -> bytes:
+        if js_response.get("format") in _TEXT_FORMATS:
+            return str.encode(js_response["result"])
+        return await self._offloader.run(
+            len(js_response["result"]),
+            base64.b64decode,
+            js_response["result"],
+        )
 
-        if (response_format := js_response.get("format")) == "pdf":
+    async def _calc_fig(
+        self,
+        spec: fig_tools.Spec,
+        *,
+        topojson: str | None,
+        render_prof,
+        stepper,
+        full_path: Path | None = None,
+    ) -> bytes | None:
+        """
+        Render a figure spec.
+
+        If `full_path` is given, a PDF is streamed straight to it and None is
+        returned. Otherwise, the image bytes are returned.
+        """
+        js_response, sunk = await self._send_spec(
+            spec,
+            topojson=topojson,
+            render_prof=render_prof,
+            stepper=stepper,
+        )
+
+        if js_response.get("format") == "pdf":
             render_prof.profile_log.tick("printing pdf")
-            img_raw = await _dtools.print_pdf(self.tab)
+            pdf_chunks = _dtools.print_pdf(self.tab)
+            if full_path:
+                render_prof.data_out_size = await _write_chunks(pdf_chunks, full_path)
+                render_prof.profile_log.tick("pdf printed")
+                render_prof.js_log = self.js_logger.log
+                return None
+            res = b"".join([chunk async for chunk in pdf_chunks])
             render_prof.profile_log.tick("pdf printed")
+        elif js_response.get("sunk"):
+            if sunk is None:
+                raise RuntimeError(
+                    "Image was sent to the blob server but not received."
+                )
+            res = sunk
         else:
-            img_raw = js_response["result"]
-
-        if response_format not in _TEXT_FORMATS:
-            res = base64.b64decode(img_raw)
-        else:
-            res = str.encode(img_raw)
+            res = await self._decode(js_response)
 
         render_prof.data_out_size = len(res)
         render_prof.js_log = self.js_logger.log
         return res
 
+    async def _calc_fig_outputs(
+        self,
+        spec: fig_tools.Spec,
+        *,
+        topojson: str | None,
+        render_prof,
+    ) -> list[bytes]:
+        """
+        Render every output of a spec, plotting the figure as few times as possible.
+
+        Returns the bytes of each output, in the order of `spec["outputs"]`.
+        PDFs are printed one at a time, after the page has made them all.
+        """
+        js_response, _ = await self._send_spec(
+            spec,
+            topojson=topojson,
+            render_prof=render_prof,
+            stepper=False,
+        )
+        js_outputs = js_response.get("outputs")
+        if not isinstance(js_outputs, list) or len(js_outputs) != len(
+            fig_tools.spec_outputs(spec),
+        ):
+            raise RuntimeError(f"Javascript outputs not understood: {js_response}")
+
+        results = []
+        for output in js_outputs:
+            if output["format"] != "pdf":
+                results.append(await self._decode(output))
+                continue
+            render_prof.profile_log.tick("printing pdf")
+            _raise_error(
+                await _dtools.exec_js_fn(
+                    self.tab,
+                    self._current_js_id,
+                    _PDF_PAGE_JS_FN,
+                    output["result"],
+                    output["width"] * output["scale"],
+                    output["height"] * output["scale"],
+                    output.get("pdfBgColor"),
+                ),
+            )
+            pdf_chunks = _dtools.print_pdf(self.tab)
+            results.append(b"".join([chunk async for chunk in pdf_chunks]))
+            render_prof.profile_log.tick("pdf printed")
+
+        render_prof.data_out_size = sum(len(r) for r in results)
+        render_prof.js_log = self.js_logger.log
+        return results
+
+    async def _calc_fig_batch(
+        self,
+        specs: list[fig_tools.Spec],
+        *,
+        topojson: str | None,
+        render_profs: list,
+    ) -> list[bytes | Exception]:
+        """
+        Render several small figure specs in one call.
+
+        PDFs can't be batched, as each one is printed from the page. Figures
+        that fail get their error in place of their bytes.
+        """
+        if await self._needs_mathjax(specs):
+            await self._load_mathjax()
+
+        specs, stored = await self._store_content(specs, render_profs)
+        parts = []
+        for spec, render_prof, stored_bytes in zip(specs, render_profs, stored):
+            render_prof.profile_log.tick("serializing spec")
+            parts.append(_dumps(spec))
+            render_prof.data_in_size = len(parts[-1]) + stored_bytes
+            render_prof.profile_log.tick("sending javascript")
+
+        result = await _dtools.exec_js_fn(
+            self.tab,
+            self._current_js_id,
+            _BATCH_JS_FN,
+            (b"[" + b",".join(parts) + b"]").decode(),
+            topojson,
+        )
+        js_responses = _dtools.check_kaleido_js_batch_response(result)
+        if len(js_responses) != len(specs):
+            raise RuntimeError(
+                f"Sent {len(specs)} figures but got {len(js_responses)} back.",
+            )
+
+        results: list[bytes | Exception] = []
+        for js_response, render_prof in zip(js_responses, render_profs):
+            render_prof.profile_log.tick("javascript sent")
+            render_prof.js_log = self.js_logger.log
+            if isinstance(js_response, Exception):
+                results.append(js_response)
+                continue
+            if js_response["format"] in _TEXT_FORMATS:
+                res = str.encode(js_response["result"])
+            else:
+                res = base64.b64decode(js_response["result"])
+            render_prof.data_out_size = len(res)
+            results.append(res)
+        return results
+
+    async def _calc_fig_fetched(
+        self,
+        spec_bytes: bytes,
+        *,
+        topojson: str | None,
+        stepper,
+    ) -> tuple[Any, bytes | None]:
+        if not self._blob_server:
+            raise RuntimeError("Fetching figures requires a blob server.")
+        url = self._blob_server.put(spec_bytes)
+        sink_url, sink = self._blob_server.expect()
+        try:
+            result = await _dtools.exec_js_fn(
+                self.tab,
+                self._current_js_id,
+                _FETCH_JS_FN,
+                url,
+                sink_url,
+                topojson,
+                stepper,
+            )
+            return result, sink.result() if sink.done() else None
+        finally:
+            self._blob_server.discard(url)
+            self._blob_server.discard(sink_url)
+
     async def _calc_fig_chunked(
         self,
-        spec_str: str,
+        spec_bytes: bytes,
         *,
         topojson: str | None,
+        render_prof,
         stepper,
     ):
         _raise_error(
             await _dtools.exec_js_fn(
                 self.tab,
                 self._current_js_id,
-                r"function() { window.__kaleido_chunks = []; }",
+                _CHUNKS_INIT_JS_FN,
+                len(spec_bytes),
             )
         )
 
-        for i in range(0, len(spec_str), _CHUNK_SIZE):
-            chunk = spec_str[i : i + _CHUNK_SIZE]
-            _raise_error(
-                await _dtools.exec_js_fn(
-                    self.tab,
-                    self._current_js_id,
-                    r"function(c) { window.__kaleido_chunks.push(c); }",
-                    chunk,
+        sizer = _ChunkSizer()
+        slots = asyncio.Semaphore(_CHUNKS_IN_FLIGHT)
+        view = memoryview(spec_bytes)
+
+        async def upload(offset: int, end: int) -> None:
+            try:
+                start = time.perf_counter()
+                _raise_error(
+                    await _dtools.exec_js_fn(
+                        self.tab,
+                        self._current_js_id,
+                        _CHUNK_PUT_JS_FN,
+                        offset,
+                        str(view[offset:end], "utf-8"),
+                    )
                 )
-            )
+                render_prof.chunk_log.append(
+                    (offset, end - offset, time.perf_counter() - start),
+                )
+                sizer.record(end - offset)
+            finally:
+                slots.release()
+
+        uploads: list[asyncio.Task] = []
+        try:
+            offset = 0
+            while offset < len(spec_bytes):
+                await slots.acquire()
+                for t in uploads:  # stop early if a chunk failed
+                    if t.done() and (e := t.exception()):
+                        raise e
+                end = _utf8_boundary(spec_bytes, offset + sizer.size)
+                uploads.append(asyncio.create_task(upload(offset, end)))
+                offset = end
+            await asyncio.gather(*uploads)
+        finally:
+            for t in uploads:
+                t.cancel()
+            await asyncio.gather(*uploads, return_exceptions=True)
 
-        kaleido_js_fn = (
-            r"function(...args)"
-            r"{"
-            r"var spec = JSON.parse(window.__kaleido_chunks.join(''));"
-            r"delete window.__kaleido_chunks;"
-            r"return kaleido_scopes.plotly(spec, ...args).then(JSON.stringify);"
-            r"}"
-        )
         return await _dtools.exec_js_fn(
             self.tab,
             self._current_js_id,
-            kaleido_js_fn,
+            _CHUNKS_RENDER_JS_FN,
             topojson,
             stepper,
         )
@@ -0,0 +1,286 @@
+"""Live counters and histograms of a Kaleido's renders and tabs."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+import threading
+from typing import TYPE_CHECKING
+
+import logistro
+
+from ._kaleido_tab._errors import KaleidoError
+from ._utils import http_tools
+
+if TYPE_CHECKING:
+    from typing import Callable, Literal, Tuple
+
+    from typing_extensions import TypeAlias
+
+    from ._profiler import RenderTaskProfile
+    from ._utils.http_tools import Request, Response
+
+    Labels: TypeAlias = Tuple[Tuple[str, str], ...]
+    Kind: TypeAlias = Literal["counter", "gauge", "histogram"]
+
+_logger = logistro.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+"""The upper bounds, in seconds, of every histogram's buckets."""
+
+_METRICS: dict[str, tuple[Kind, str]] = {
+    "kaleido_renders_total": (
+        "counter",
+        "Renders finished, by format and outcome (ok, error, or timeout).",
+    ),
+    "kaleido_render_errors_total": (
+        "counter",
+        "Failed renders, by KaleidoError code or exception type.",
+    ),
+    "kaleido_render_duration_seconds": (
+        "histogram",
+        "Time from taking a figure to finishing its render, by format.",
+    ),
+    "kaleido_stage_duration_seconds": (
+        "histogram",
+        "Time spent in each stage of a render, named after profiler ticks.",
+    ),
+    "kaleido_tab_wait_seconds": ("histogram", "Time renders waited for a tab."),
+    "kaleido_tab_recycle_seconds": (
+        "histogram",
+        "Time to ready a tab after a render, by action (reset or reload).",
+    ),
+    "kaleido_bytes_in_total": ("counter", "Bytes of figures sent to tabs."),
+    "kaleido_bytes_out_total": ("counter", "Bytes of images received from tabs."),
+    "kaleido_cache_requests_total": (
+        "counter",
+        "Render cache lookups, by result (hit or miss).",
+    ),
+    "kaleido_tabs": ("gauge", "Tabs open."),
+    "kaleido_tabs_busy": ("gauge", "Tabs rendering or being recycled."),
+    "kaleido_renders_waiting": ("gauge", "Renders waiting for a tab."),
+}
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(BUCKETS, value)
+        if i < len(BUCKETS):
+            self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Metrics:
+    """
+    Counters, histograms, and gauges in the Prometheus text format.
+
+    Every Kaleido keeps one as `Kaleido.metrics`. Renders are counted from
+    their profiles as they finish, so the stages are the same as the profiler's.
+    Values can be read with `get()`, or all at once with `exposition()`. All
+    methods are thread-safe.
+    """
+
+    def __init__(self) -> None:
+        """Create a registry with every metric at zero."""
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+
+    @staticmethod
+    def _check(name: str, kind: Kind) -> None:
+        if _METRICS.get(name, (None,))[0] != kind:
+            raise ValueError(f"{name} is not a known {kind}.")
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add to a counter."""
+        self._check(name, "counter")
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Add a value, in seconds, to a histogram."""
+        self._check(name, "histogram")
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            series.setdefault(key, _Histogram()).observe(value)
+
+    def set_gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Have a gauge read its value from a function when exposed."""
+        self._check(name, "gauge")
+        self._gauges[name] = read
+
+    def get(self, name: str, **labels: str) -> float:
+        """
+        Return the value of a counter or gauge, or the count of a histogram.
+
+        Args:
+            name: the metric.
+            **labels: the labels of the series. Missing series are zero.
+
+        """
+        key = _labels(labels)
+        with self._lock:
+            if name in self._gauges:
+                return self._gauges[name]()
+            if name in self._histograms:
+                histogram = self._histograms[name].get(key)
+                return histogram.count if histogram else 0
+            return self._counters.get(name, {}).get(key, 0)
+
+    def observe_render(self, render_prof: RenderTaskProfile) -> None:
+        """Count a finished render from its profile."""
+        error = render_prof.error
+        fmt = str(render_prof.info.get("format", "unknown"))
+        if isinstance(error, asyncio.TimeoutError):
+            outcome = "timeout"
+        elif error is not None:
+            outcome = "error"
+            code = (
+                str(error._code)  # noqa: SLF001
+                if isinstance(error, KaleidoError)
+                else type(error).__name__
+            )
+            self.inc("kaleido_render_errors_total", code=code)
+        else:
+            outcome = "ok"
+        self.inc("kaleido_renders_total", format=fmt, outcome=outcome)
+
+        if render_prof.cache_hit is not None:
+            result = "hit" if render_prof.cache_hit else "miss"
+            self.inc("kaleido_cache_requests_total", result=result)
+        if render_prof.data_in_size:
+            self.inc("kaleido_bytes_in_total", render_prof.data_in_size)
+        if render_prof.data_out_size:
+            self.inc("kaleido_bytes_out_total", render_prof.data_out_size)
+
+        stages = render_prof.profile_log.stages()
+        for stage, seconds in stages.items():
+            self.observe("kaleido_stage_duration_seconds", seconds, stage=stage)
+        if "waiting for tab" in stages:
+            self.observe("kaleido_tab_wait_seconds", stages["waiting for tab"])
+        if stages:
+            self.observe(
+                "kaleido_render_duration_seconds",
+                sum(stages.values()),
+                format=fmt,
+            )
+
+    def exposition(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in _METRICS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                if kind == "gauge" and name in self._gauges:
+                    lines.append(f"{name} {_format_value(self._gauges[name]())}")
+                for key, value in self._counters.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                for key, histogram in self._histograms.get(name, {}).items():
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.buckets):
+                        cumulative += count
+                        le = _format_labels((*key, ("le", _format_value(bound))))
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = _format_labels((*key, ("le", "+Inf")))
+                    total = _format_value(histogram.sum)
+                    lines += [
+                        f"{name}_bucket{le} {histogram.count}",
+                        f"{name}_sum{_format_labels(key)} {total}",
+                        f"{name}_count{_format_labels(key)} {histogram.count}",
+                    ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves `Metrics.exposition()` at /metrics, for a scraper to poll."""
+
+    _server: asyncio.AbstractServer | None
+    _port: int | None
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 0):
+        """
+        Create an unopened server.
+
+        Args:
+            metrics: what to serve.
+            host: the address to listen on. Defaults to localhost only.
+            port: the port to listen on. Defaults to 0, any free port.
+
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def open(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        _logger.info(f"Serving metrics on {self.url}")
+
+    async def close(self) -> None:
+        """Stop listening."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        """The URL of the metrics."""
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def _respond(self, request: Request) -> Response:
+        method, target, _, _ = request
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+        if method == "GET" and target.split("?")[0] == "/metrics":
+            return "200 OK", self.metrics.exposition().encode(), content_type
+        return "404 Not Found", b"", content_type
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        await http_tools.serve(
+            reader,
+            writer,
+            self._respond,
+            name="Metrics server",
+            keep_alive=False,
+        )
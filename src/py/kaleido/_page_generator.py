@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import hashlib
+import re
+import warnings
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
 import logistro
 
+from ._script_bundle import ScriptBundle
 from ._utils import path_tools
 
 if TYPE_CHECKING:
-    from typing import Tuple, Union
+    from typing import Literal, Tuple, Union
 
     from typing_extensions import TypeAlias
 
@@ -25,6 +29,8 @@ DEFAULT_MATHJAX = (
 
 KJS_PATH = Path(__file__).resolve().parent / "vendor" / "kaleido_scopes.js"
 
+_VERSION = re.compile(r"\d+\.\d+")
+
 
 def _ensure_file(path: Path | str | UrlAndCharset) -> None:
     if isinstance(path, tuple):
@@ -41,6 +47,19 @@ def _ensure_file(path: Path | str | UrlAndCharset) -> None:
     raise FileNotFoundError(f"{path!s} does not exist.")
 
 
+def _is_pinned(url: str) -> bool:
+    """Tell if a url names a version, like plotly-2.35.2.js, so its content is fixed."""
+    path = url.split("?")[0]
+    return bool(_VERSION.search(path)) and "latest" not in path
+
+
+def _script_url(script: Path | str | UrlAndCharset) -> str:
+    url = script[0] if isinstance(script, tuple) else script
+    if path_tools.is_httpish(str(url)):
+        return str(url)
+    return path_tools.get_path(url).resolve().as_uri()
+
+
 class PageGenerator:
     """
     A page generator can set the versions of the js libraries used to render.
@@ -71,13 +90,15 @@ class PageGenerator:
 """
     """The footer is the HTML that always goes on the bottom. Rarely needs changing."""
 
-    def __init__(  # noqa: C901
+    def __init__(  # noqa: PLR0913
         self,
         *,
         plotly: None | Path | str | UrlAndCharset = None,
         mathjax: None | Path | str | bool | UrlAndCharset = None,
         others: None | list[Path | str | UrlAndCharset] = None,
         force_cdn: bool = False,
+        bundle: bool | str | Path = False,
+        mathjax_on_demand: bool = False,
     ):
         """
         Create a PageGenerator.
@@ -91,15 +112,26 @@ class PageGenerator:
             others: A list of other script urls to include. Usually strings, but
                 can be (str, str) where it's (url, encoding).
             force_cdn: Set True to force CDN use, defaults to False.
+            bundle: Set True, or to a directory, to download remote scripts
+                once and load them from a local, hash-checked copy, so pages
+                load faster and work offline. Remote MathJax is left as is,
+                since it loads more files from where it lives. Defaults to
+                False.
+            mathjax_on_demand: Set True to leave MathJax out of the page. Its
+                url and charset are kept in `on_demand_mathjax`, for Kaleido to
+                load into a tab when a figure has LaTeX in it. Defaults to
+                False.
 
         """
         self._scripts = []
+        self._localized: list[Path | str | UrlAndCharset] | None = None
+        self._mathjax = None
+        self.on_demand_mathjax: tuple[str, str] | None = None
+        self._bundle = (
+            ScriptBundle(None if bundle is True else bundle) if bundle else None
+        )
         if mathjax is not False:
-            if mathjax is None or mathjax is True:
-                mathjax = DEFAULT_MATHJAX
-            elif mathjax:
-                _ensure_file(mathjax)
-            self._scripts.append(mathjax)
+            self._add_mathjax(mathjax, on_demand=mathjax_on_demand)
         if force_cdn:
             plotly = (DEFAULT_PLOTLY, "utf-8")
         elif not plotly:
@@ -135,12 +167,60 @@ class PageGenerator:
                 _ensure_file(o)
             self._scripts.extend(others)
 
+    def _add_mathjax(
+        self,
+        mathjax: None | Path | str | Literal[True] | UrlAndCharset,
+        *,
+        on_demand: bool,
+    ) -> None:
+        if mathjax is None or mathjax is True:
+            mathjax = DEFAULT_MATHJAX
+        elif mathjax:
+            _ensure_file(mathjax)
+        self._mathjax = mathjax
+        if on_demand:
+            charset = mathjax[1] if isinstance(mathjax, tuple) else ""
+            self.on_demand_mathjax = (_script_url(mathjax), charset)
+        else:
+            self._scripts.append(mathjax)
+        mathjax_url = mathjax[0] if isinstance(mathjax, tuple) else mathjax
+        if self._bundle and path_tools.is_httpish(str(mathjax_url)):
+            _logger.info("MathJax is not bundled, it loads from its url.")
+
+    def _localize(self, script: Path | str | UrlAndCharset):
+        if not self._bundle or script is self._mathjax:
+            return script
+        url, *charset = script if isinstance(script, tuple) else (script,)
+        if not isinstance(url, str) or not path_tools.is_httpish(url):
+            return script
+        local = self._bundle.localize(url).as_uri()
+        return (local, *charset) if charset else local
+
+    def localize(self) -> None:
+        """
+        Download and check the bundled copies of remote scripts, if bundling.
+
+        This blocks, so Kaleido calls it in a thread. The page, `script_urls()`
+        and `fingerprint()` use the copies found by the last call, calling it
+        first if it hasn't been called.
+        """
+        self._localized = [self._localize(script) for script in self._scripts]
+
+    def _local_scripts(self) -> list[Path | str | UrlAndCharset]:
+        if self._localized is None:
+            self.localize()
+        return cast("list[Path | str | UrlAndCharset]", self._localized)
+
+    def script_urls(self) -> list[str]:
+        """List the urls of the scripts the page loads, in order."""
+        return [_script_url(script) for script in [*self._local_scripts(), KJS_PATH]]
+
     def generate_index(self):
         """Generate the page."""
         page = self.header
         script_tag = '\n        <script src="%s"></script>'
         script_tag_charset = '\n        <script src="%s" charset="%s"></script>'
-        for script in self._scripts:
+        for script in self._local_scripts():
             if isinstance(script, (str, Path)):
                 page += script_tag % str(script)
             else:
@@ -148,3 +228,31 @@ class PageGenerator:
         page += self.footer
         _logger.debug2(page)
         return page
+
+    def fingerprint(self) -> str:
+        """
+        Identify the page and the exact scripts it loads.
+
+        Local scripts are identified by their size and modification time as
+        well as their path, so upgrading plotly.py changes the fingerprint.
+        Remote scripts are identified by their url, and bundled ones by their
+        content, so a render cache needs remote urls that name a version. An
+        unpinned url, like plotly-latest, gives a warning.
+        """
+        h = hashlib.sha256(self.generate_index().encode())
+        for script in [*self._local_scripts(), KJS_PATH]:
+            url = script[0] if isinstance(script, tuple) else script
+            if isinstance(url, str) and path_tools.is_httpish(url):
+                h.update(url.encode())
+                if not _is_pinned(url):
+                    warnings.warn(
+                        f"{url} doesn't name a version, so cached renders won't "
+                        "change when it does. Use a pinned url or bundle=True.",
+                        UserWarning,
+                        stacklevel=2,
+                    )
+                continue
+            if (path := path_tools.get_path(url)).is_file():
+                stat = path.stat()
+                h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return h.hexdigest()
@@ -0,0 +1,506 @@
+"""Spread renders over several processes, each with its own Kaleido."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+from typing import TYPE_CHECKING
+
+import logistro
+
+from . import _utils
+from ._utils import fig_tools, path_tools
+from .kaleido import Kaleido, _is_figuredict
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, Iterable
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+    from multiprocessing.queues import Queue
+    from pathlib import Path
+    from types import TracebackType
+    from typing import Any, Callable, TypeVar, Union
+
+    from typing_extensions import Self
+
+    from .kaleido import FigureDict
+
+    T = TypeVar("T")
+    AnyIterable = Union[AsyncIterable[T], Iterable[T]]
+
+_logger = logistro.getLogger(__name__)
+
+_MONITOR_INTERVAL = 0.5  # seconds between checks for crashed workers
+_MAX_ATTEMPTS = 2  # a job is retried once if its worker crashes
+_MAX_FAILED_STARTS = 3  # a worker slot is abandoned after this many
+
+
+def _picklable(e: BaseException) -> BaseException:
+    try:
+        pickle.dumps(e)
+    except Exception:  # noqa: BLE001 anything can go wrong pickling
+        return RuntimeError(f"{type(e).__name__}: {e!s}")
+    return e
+
+
+async def _run_job(k: Kaleido, job: tuple, results: Connection) -> None:
+    job_id, method, args, kwargs = job
+    try:
+        res = await getattr(k, method)(*args, **kwargs)
+    except Exception as e:  # noqa: BLE001 sent to the parent
+        results.send(("error", os.getpid(), job_id, _picklable(e)))
+    else:
+        results.send(("done", os.getpid(), job_id, res))
+
+
+async def _worker_loop(
+    kaleido_kwargs: dict,
+    inbox: Queue,
+    results: Connection,
+) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        k = Kaleido(**kaleido_kwargs)
+        await k.open()
+    except Exception as e:  # noqa: BLE001 sent to the parent
+        results.send(("failed", os.getpid(), None, _picklable(e)))
+        return
+    results.send(("ready", os.getpid(), None, None))
+    running: set[asyncio.Task] = set()
+    try:
+        while (job := await loop.run_in_executor(None, inbox.get)) is not None:
+            task = asyncio.create_task(_run_job(k, job, results))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        await asyncio.gather(*running)
+    finally:
+        await k.close()
+
+
+def _worker_main(kaleido_kwargs: dict, inbox: Queue, results: Connection) -> None:
+    """Run a Kaleido in a worker process, taking jobs from `inbox`."""
+    asyncio.run(_worker_loop(kaleido_kwargs, inbox, results))
+
+
+class _Job:
+    __slots__ = ("args", "attempts", "future", "id", "kwargs", "method")
+
+    def __init__(self, job_id, method, args, kwargs, future) -> None:
+        self.id = job_id
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.attempts = 0
+
+
+class _Worker:
+    __slots__ = (
+        "failed_starts",
+        "feeder",
+        "inbox",
+        "jobs",
+        "process",
+        "reader",
+        "ready",
+        "slots",
+    )
+
+    process: BaseProcess
+    inbox: Queue
+    reader: threading.Thread
+    ready: asyncio.Future[None]
+    slots: asyncio.Semaphore
+    jobs: dict[int, _Job]
+    feeder: asyncio.Task | None
+    failed_starts: int
+
+
+def _layout_of(fig: fig_tools.Figurish) -> dict:
+    """Return a figure's layout, without converting the rest of it."""
+    if isinstance(fig, dict):
+        return fig.get("layout") or {}
+    layout = getattr(fig, "layout", None)
+    if hasattr(layout, "to_plotly_json"):
+        return layout.to_plotly_json()
+    return fig.to_dict().get("layout") or {}
+
+
+class KaleidoPool:
+    """
+    Renders figures in several processes, each with its own Kaleido.
+
+    A single Kaleido does all its serializing and devtools messaging on one
+    core. The pool starts `processes` workers, each with its own browser and
+    tabs, and hands figures to whichever worker has room. Workers that crash
+    are restarted, and the figures they were rendering are retried once.
+
+    It has the same rendering methods as Kaleido. File names are decided here,
+    not in the workers, so they never collide, but only from each figure's
+    layout and options: figures are converted and coerced in the workers.
+
+    async with KaleidoPool(processes=4, n=2) as pool:
+        await pool.write_fig_from_object(fig_dicts)
+    """
+
+    _worker_target: Callable[[dict, Queue, Connection], None] = staticmethod(
+        _worker_main,
+    )
+
+    def __init__(self, processes: int | None = None, **kwargs: Any) -> None:
+        """
+        Create a pool. Nothing is started until it is opened.
+
+        Args:
+            processes (int | None, optional):
+                How many worker processes to start. Defaults to None, which
+                means the number of CPUs.
+
+            **kwargs (Any):
+                Passed to `Kaleido()` in every worker, so they must be
+                picklable. `n` is the number of tabs per worker.
+
+        """
+        self._processes = processes or os.cpu_count() or 1
+        self._kaleido_kwargs = kwargs
+        # enough queued in each worker to keep its tabs busy
+        self._slots_per_worker = 2 * (kwargs.get("max_tabs") or kwargs.get("n", 1))
+        self._filenames = path_tools.FilenameIndex()
+        self._workers: list[_Worker | None] = []
+        self._by_pid: dict[int, _Worker] = {}
+        self._pending: dict[int, _Job] = {}
+        self._job_ids = itertools.count()
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue()
+        self._monitor: asyncio.Task | None = None
+
+    async def __aenter__(self) -> Self:
+        """Open the pool."""
+        await self.open()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the pool."""
+        await self.close()
+
+    async def open(self) -> None:
+        """Start the workers and wait for their browsers to be ready."""
+        self._loop = asyncio.get_running_loop()
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [self._start_worker() for _ in range(self._processes)]
+        try:
+            await asyncio.gather(*(w.ready for w in self._workers if w))
+        except BaseException:
+            await self.close()
+            raise
+        self._monitor = _utils.create_task_log_error(self._watch_workers())
+        _logger.info(f"Kaleido pool ready with {self._processes} workers.")
+
+    async def close(self) -> None:
+        """Stop the workers, after they finish the figures they have."""
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+        workers = [w for w in self._workers if w]
+        for worker in workers:
+            if worker.feeder:
+                worker.feeder.cancel()
+            worker.inbox.put(None)
+        for worker in workers:
+            await _utils.to_thread(worker.process.join)
+            await _utils.to_thread(worker.reader.join)
+        self._workers = []
+        self._by_pid.clear()
+        for job in self._pending.values():
+            job.future.cancel()
+
+    ### WORKER MANAGEMENT ###
+
+    def _start_worker(self, failed_starts: int = 0) -> _Worker:
+        worker = _Worker()
+        worker.inbox = self._context.Queue()
+        # a pipe each, since a worker dying mid-write would wedge a shared queue
+        receiver, sender = self._context.Pipe(duplex=False)
+        worker.process = self._context.Process(
+            target=self._worker_target,
+            args=(self._kaleido_kwargs, worker.inbox, sender),
+            daemon=True,
+        )
+        worker.process.start()
+        sender.close()  # so the receiver sees EOF when the worker exits
+        worker.reader = threading.Thread(
+            target=self._read_results,
+            args=(receiver,),
+            daemon=True,
+        )
+        worker.reader.start()
+        worker.ready = self._loop.create_future()
+        worker.slots = asyncio.Semaphore(self._slots_per_worker)
+        worker.jobs = {}
+        worker.failed_starts = failed_starts
+        if worker.process.pid is not None:
+            self._by_pid[worker.process.pid] = worker
+        worker.feeder = asyncio.create_task(self._feed(worker))
+        return worker
+
+    def _read_results(self, receiver: Connection) -> None:
+        try:
+            while True:
+                message = receiver.recv()
+                self._loop.call_soon_threadsafe(self._on_message, *message)
+        except (EOFError, OSError, RuntimeError):  # worker or loop gone
+            pass
+        finally:
+            receiver.close()
+
+    def _on_message(self, kind: str, pid: int, job_id: int | None, payload) -> None:
+        worker = self._by_pid.get(pid)
+        if kind == "ready" and worker:
+            worker.ready.set_result(None)
+            return
+        if kind == "failed":
+            if worker and not worker.ready.done():
+                worker.ready.set_exception(payload)
+            return
+        if worker and worker.jobs.pop(job_id, None):  # type: ignore[arg-type]
+            worker.slots.release()
+        job = self._pending.pop(job_id, None)  # type: ignore[arg-type]
+        if job is None or job.future.done():
+            return  # cancelled, or already answered before a crash
+        if kind == "done":
+            job.future.set_result(payload)
+        else:
+            job.future.set_exception(payload)
+
+    async def _feed(self, worker: _Worker) -> None:
+        try:
+            await worker.ready
+        except Exception:  # noqa: BLE001 the monitor deals with it
+            return
+        while True:
+            await worker.slots.acquire()
+            job = await self._queue.get()
+            if job.future.done():  # cancelled while queued
+                worker.slots.release()
+                continue
+            job.attempts += 1
+            worker.jobs[job.id] = job
+            worker.inbox.put((job.id, job.method, job.args, job.kwargs))
+
+    async def _watch_workers(self) -> None:
+        while True:
+            await asyncio.sleep(_MONITOR_INTERVAL)
+            for i, worker in enumerate(self._workers):
+                if worker and not worker.process.is_alive():
+                    self._replace_worker(i, worker)
+
+    def _replace_worker(self, i: int, worker: _Worker) -> None:
+        _logger.warning(
+            f"Kaleido worker {worker.process.pid} exited with code "
+            f"{worker.process.exitcode}.",
+        )
+        if worker.feeder:
+            worker.feeder.cancel()
+        if worker.process.pid is not None:
+            self._by_pid.pop(worker.process.pid, None)
+        started = worker.ready.done() and not worker.ready.exception()
+        if not worker.ready.done():
+            worker.ready.set_exception(RuntimeError("Worker exited on start."))
+            worker.ready.exception()  # retrieved
+        self._requeue(worker.jobs.values())
+        failed_starts = 0 if started else worker.failed_starts + 1
+        if failed_starts < _MAX_FAILED_STARTS:
+            self._workers[i] = self._start_worker(failed_starts)
+            return
+        _logger.error("A Kaleido worker failed to start too many times.")
+        self._workers[i] = None
+        if not any(self._workers):
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                if not job.future.done():
+                    job.future.set_exception(
+                        RuntimeError("No Kaleido workers are running."),
+                    )
+
+    def _requeue(self, jobs: Iterable[_Job]) -> None:
+        for job in jobs:
+            if job.future.done():
+                continue
+            if job.attempts < _MAX_ATTEMPTS:
+                self._queue.put_nowait(job)
+            else:
+                job.future.set_exception(
+                    RuntimeError("A Kaleido worker crashed rendering this figure."),
+                )
+
+    async def _submit(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        if not any(self._workers):
+            raise RuntimeError("No Kaleido workers are running. Was it opened?")
+        future = self._loop.create_future()
+        job = _Job(next(self._job_ids), method, args, kwargs, future)
+        self._pending[job.id] = job
+        self._queue.put_nowait(job)
+        try:
+            return await job.future
+        finally:
+            self._pending.pop(job.id, None)
+
+    ### API ###
+
+    async def calc_fig(
+        self,
+        fig: fig_tools.Figurish,
+        opts: None | fig_tools.LayoutOpts = None,
+        *,
+        topojson: str | None = None,
+    ) -> bytes:
+        """
+        Render a figure in a worker and return the bytes.
+
+        See `Kaleido.calc_fig()`.
+        """
+        return await self._submit("calc_fig", fig, opts=opts, topojson=topojson)
+
+    async def _write_one(
+        self,
+        fig_dict: FigureDict,
+        names: path_tools.FilenameIndex,
+    ) -> None:
+        fig = fig_dict.get("fig")
+        if not fig_tools.is_figurish(fig):
+            raise TypeError("Figure supplied doesn't seem to be a valid plotly figure.")
+        # names only need the layout, the worker coerces the whole figure
+        spec = fig_tools.coerce_for_js(
+            {"data": [], "layout": _layout_of(fig)},
+            fig_dict.get("path", None),
+            fig_dict.get("opts", None),
+        )
+        opts: fig_tools.LayoutOpts = {
+            "format": spec["format"],
+            "width": spec["width"],
+            "height": spec["height"],
+            "scale": spec["scale"],
+        }
+        if "outputs" in spec:
+            outputs = spec["outputs"]
+            full_paths = path_tools.output_paths(
+                fig_dict.get("path", None), spec, names
+            )
+            opts["format"] = list(dict.fromkeys(o["format"] for o in outputs))
+            if any("label" in o for o in outputs):
+                opts["variants"] = [
+                    {"width": o["width"], "height": o["height"], "scale": o["scale"]}
+                    for o in outputs
+                    if o["format"] == spec["format"]
+                ]
+        else:
+            full_paths = [
+                path_tools.determine_path(
+                    fig_dict.get("path", None),
+                    spec["data"],
+                    spec["format"],
+                    names,
+                ),
+            ]
+        for full_path in full_paths:
+            full_path.touch()  # claim our names
+        job: FigureDict = {
+            "fig": fig,
+            "path": full_paths if "outputs" in spec else full_paths[0],
+            "opts": opts,
+            "topojson": fig_dict.get("topojson"),
+        }
+        try:
+            await self._submit("write_fig_from_object", job, cancel_on_error=True)
+        except BaseException:
+            for full_path in full_paths:
+                full_path.unlink(missing_ok=True)
+            raise
+
+    async def write_fig_from_object(
+        self,
+        fig_dicts: FigureDict | AnyIterable[FigureDict],
+        *,
+        cancel_on_error: bool = False,
+    ) -> None | tuple[Exception, ...]:
+        """
+        Write figures from dictionaries, spread over the workers.
+
+        Figures are taken from `fig_dicts` only as fast as the workers can
+        render them. See `Kaleido.write_fig_from_object()`.
+
+        Returns:
+            If cancel_on_error is True, it always returns None on success.
+            If cancel_on_error is False, it always returns a tuple, possibly
+            with errors.
+
+        """
+        if _is_figuredict(fig_dicts):
+            fig_dicts = [fig_dicts]
+        limit = self._slots_per_worker * max(len(self._workers), 1)
+        pending: set[asyncio.Future] = set()
+        errors: list[Exception] = []
+
+        def collect(done: set[asyncio.Future]) -> None:
+            for task in done:
+                if (e := task.exception()) is None:
+                    continue
+                if cancel_on_error or not isinstance(e, Exception):
+                    raise e
+                _logger.info(f"Render failed, continuing: {e!s}")
+                errors.append(e)
+
+        with self._filenames.in_use() as names:
+            try:
+                async for fig_dict in _utils.ensure_async_iter(fig_dicts):
+                    while len(pending) >= limit:
+                        done, pending = await asyncio.wait(
+                            pending,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        collect(done)
+                    pending.add(asyncio.ensure_future(self._write_one(fig_dict, names)))
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    collect(done)
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        return None if cancel_on_error else tuple(errors)
+
+    async def write_fig(
+        self,
+        fig: fig_tools.Figurish,
+        path: None | Path | str = None,
+        opts: None | fig_tools.LayoutOpts = None,
+        *,
+        topojson: str | None = None,
+        cancel_on_error: bool = False,
+    ) -> None | tuple[Exception, ...]:
+        """
+        Write one or more figures, spread over the workers.
+
+        See `Kaleido.write_fig()`.
+        """
+        figs = [fig] if fig_tools.is_figurish(fig) else fig
+
+        async def fig_dicts():
+            async for f in _utils.ensure_async_iter(figs):
+                yield {"fig": f, "path": path, "opts": opts, "topojson": topojson}
+
+        return await self.write_fig_from_object(
+            fig_dicts(),
+            cancel_on_error=cancel_on_error,
+        )
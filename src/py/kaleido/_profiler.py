@@ -1,26 +1,40 @@
 from __future__ import annotations
 
+import abc
+import os
 import time
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+import orjson
+
 if TYPE_CHECKING:
-    from pathlib import Path
-    from typing import Any
+    from collections.abc import Iterable
+    from types import TracebackType
+    from typing import Any, Callable, Dict
+
+    from typing_extensions import Self, TypeAlias
 
     from ._utils import fig_tools
 
     Event = str
+    ProfileRecord: TypeAlias = Dict[str, Any]
+    ProfileSinkLike: TypeAlias = Callable[[ProfileRecord], None]
 
 
 class WriteCall:
     name: str
     renders: list[RenderTaskProfile]
+    cache_hits: int
+    cache_misses: int
 
     __slots__ = tuple(__annotations__)
 
     def __init__(self, name: str):
         self.name = name
         self.renders = []
+        self.cache_hits = 0
+        self.cache_misses = 0
 
 
 class RenderTaskProfile:
@@ -30,28 +44,61 @@ class RenderTaskProfile:
     profile_log: ProfileLog
     data_in_size: int | None
     data_out_size: int | None
+    chunk_log: list[tuple[int, int, float]]  # offset, size, seconds
+    cache_hit: bool | None  # None if there is no cache
 
     __slots__ = tuple(__annotations__)
 
-    def __init__(
-        self,
-        spec: fig_tools.Spec,
-        full_path: Path | None,
-        tab_id: str,
-    ) -> None:
+    def __init__(self) -> None:
         self.info = {}
         self.error = None
         self.js_log = []
         self.profile_log = ProfileLog()
         self.data_in_size = None  # need to get this from choreographer
         self.data_out_size = None
+        self.chunk_log = []
+        self.cache_hit = None
 
+    def describe(
+        self,
+        spec: fig_tools.Spec,
+        full_path: Path | None,
+        tab_id: str | None,
+    ) -> None:
+        """Record what is being rendered, and where."""
         self.info.update(
             {k: v for k, v in spec.items() if k != "data"},
         )
         self.info["path"] = full_path
         self.info["tab"] = tab_id
 
+    def to_record(self, call: str) -> ProfileRecord:
+        """
+        Summarize the render as a dictionary of JSON types, for a profile sink.
+
+        Args:
+            call: the name of the call that made the render.
+
+        """
+        ticks = self.profile_log.get_logs()
+        path = self.info.get("path")
+        return {
+            "call": call,
+            "tab": self.info.get("tab"),
+            "format": self.info.get("format"),
+            "width": self.info.get("width"),
+            "height": self.info.get("height"),
+            "scale": self.info.get("scale"),
+            "path": str(path) if path else None,
+            "data_in_size": self.data_in_size,
+            "data_out_size": self.data_out_size,
+            "cache_hit": self.cache_hit,
+            "error": repr(self.error) if self.error else None,
+            "ticks": ticks,
+            "stages": self.profile_log.stages(),
+            "total": max(ticks.values()) - min(ticks.values()) if ticks else None,
+        }
+
 
 class ProfileLog:
     _logs: dict[Event, float]
@@ -66,3 +113,196 @@ class ProfileLog:
 
     def get_logs(self) -> dict[Event, float]:
         return self._logs
+
+    def stages(self) -> dict[Event, float]:
+        """
+        Time each stage, in seconds.
+
+        A stage is named after the tick that starts it, and lasts until the
+        next tick. The last tick starts no stage.
+        """
+        ticks = sorted(self._logs.items(), key=lambda item: item[1])
+        return {name: end - start for (name, start), (_, end) in zip(ticks, ticks[1:])}
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the q-th percentile of some values, interpolating between them."""
+    values = sorted(values)
+    k = (len(values) - 1) * q / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def stage_percentiles(
+    records: Iterable[ProfileRecord],
+    qs: Iterable[float] = (50, 95, 99),
+) -> dict[str, dict[str, float]]:
+    """
+    Aggregate the stages of many renders.
+
+    Args:
+        records: the records given to a profile sink, or read back from a
+            JsonLinesSink file.
+        qs: the percentiles to compute. Defaults to p50, p95, and p99.
+
+    Returns:
+        For each stage, and for "total", a dictionary with the count and
+        each percentile, like `{"count": 10, "p50": 0.1, "p95": 0.3, ...}`.
+
+    """
+    durations: dict[str, list[float]] = {}
+    for record in records:
+        for stage, seconds in record["stages"].items():
+            durations.setdefault(stage, []).append(seconds)
+        if record.get("total") is not None:
+            durations.setdefault("total", []).append(record["total"])
+    qs = tuple(qs)
+    return {
+        stage: {
+            "count": len(values),
+            **{f"p{q:g}": percentile(values, q) for q in qs},
+        }
+        for stage, values in durations.items()
+    }
+
+
+class ProfileSink(abc.ABC):
+    """
+    Receives a record for every finished render.
+
+    Any function taking a record can be a sink. Subclasses write records
+    somewhere, and should be closed when done, or used as a context manager.
+    """
+
+    @abc.abstractmethod
+    def __call__(self, record: ProfileRecord) -> None:
+        """Take one record."""
+
+    def close(self) -> None:  # noqa: B027 most sinks need no closing
+        """Finish writing."""
+
+    def __enter__(self) -> Self:
+        """Use the sink."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the sink."""
+        self.close()
+
+
+class JsonLinesSink(ProfileSink):
+    """Appends each record to a file as one line of JSON."""
+
+    def __init__(self, path: str | Path) -> None:
+        """
+        Open the file, appending to it if it exists.
+
+        Args:
+            path: the file to write to.
+
+        """
+        self.path = Path(path)
+        self._file = self.path.open("ab")
+
+    def __call__(self, record: ProfileRecord) -> None:
+        """Write one record."""
+        self._file.write(orjson.dumps(record) + b"\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    @staticmethod
+    def read(path: str | Path) -> list[ProfileRecord]:
+        """Read back the records in a file, for `stage_percentiles()`."""
+        with Path(path).open("rb") as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+
+
+class ChromeTraceSink(ProfileSink):
+    """
+    Writes records as Chrome trace events, for Perfetto or chrome://tracing.
+
+    Each tab is a thread, each render a slice, and each stage a slice inside
+    it. Events are written as they come, in the JSON array format, which
+    viewers accept even if the file is never closed.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """
+        Create or overwrite the trace file.
+
+        Args:
+            path: the file to write to.
+
+        """
+        self.path = Path(path)
+        self._file = self.path.open("wb")
+        self._file.write(b"[\n")
+        self._pid = os.getpid()
+        self._tids: dict[str | None, int] = {}
+
+    def _write(self, event: dict[str, Any]) -> None:
+        self._file.write(orjson.dumps(event) + b",\n")
+
+    def _tid(self, tab: str | None) -> int:
+        if (tid := self._tids.get(tab)) is None:
+            tid = self._tids[tab] = len(self._tids) + 1
+            self._write(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": f"tab {tab}" if tab else "no tab"},
+                },
+            )
+        return tid
+
+    def __call__(self, record: ProfileRecord) -> None:
+        """Write the events for one render."""
+        ticks = record["ticks"]
+        if not ticks:
+            return
+        tid = self._tid(record["tab"])
+        start = min(ticks.values())
+        args = {k: v for k, v in record.items() if k not in ("ticks", "stages")}
+        self._write(
+            {
+                "ph": "X",
+                "name": "error" if record["error"] else f"render {record['format']}",
+                "cat": record["call"],
+                "pid": self._pid,
+                "tid": tid,
+                "ts": start * 1e6,
+                "dur": (record["total"] or 0) * 1e6,
+                "args": args,
+            },
+        )
+        for stage, seconds in record["stages"].items():
+            self._write(
+                {
+                    "ph": "X",
+                    "name": stage,
+                    "cat": record["call"],
+                    "pid": self._pid,
+                    "tid": tid,
+                    "ts": ticks[stage] * 1e6,
+                    "dur": seconds * 1e6,
+                },
+            )
+        self._file.flush()
+
+    def close(self) -> None:
+        """End the array and close the file."""
+        if self._file.closed:
+            return
+        self._file.write(b"{}]\n")  # the trailing comma needs something after it
+        self._file.close()
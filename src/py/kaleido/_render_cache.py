@@ -0,0 +1,261 @@
+"""Caches of rendered images, keyed by a hash of everything that affects them."""
+
+from __future__ import annotations
+
+import abc
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import logistro
+import orjson
+
+from ._utils import orjson_default
+
+if TYPE_CHECKING:
+    from ._utils import fig_tools
+
+_logger = logistro.getLogger(__name__)
+
+
+def cache_key(
+    spec: fig_tools.Spec,
+    topojson: str | None,
+    page_fingerprint: str,
+) -> str:
+    """
+    Hash everything that decides what a render looks like.
+
+    Args:
+        spec: the coerced figure, with its format, size, and scale.
+        topojson: the topojson url, if any.
+        page_fingerprint: identifies the page and its javascript libraries.
+
+    Returns:
+        A hex sha256 digest.
+
+    """
+    h = hashlib.sha256(
+        orjson.dumps(
+            spec,
+            default=orjson_default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        ),
+    )
+    h.update(b"\0" + (topojson or "").encode())
+    h.update(b"\0" + page_fingerprint.encode())
+    return h.hexdigest()
+
+
+class RenderCache(abc.ABC):
+    """
+    The base of all render caches, which evict least recently used entries.
+
+    This class keeps the index, the limits, and the statistics. Subclasses
+    only store, load, and delete bytes. All methods are thread-safe.
+    """
+
+    max_bytes: int | None
+    max_entries: int | None
+    ttl: float | None
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int | None = None,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        """
+        Create a cache.
+
+        Args:
+            max_bytes: the most bytes to hold, or None for no limit.
+            max_entries: the most images to hold, or None for no limit.
+            ttl: seconds after which an image is stale, or None to keep them.
+
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of images held."""
+        return len(self._index)
+
+    @property
+    def size(self) -> int:
+        """The number of bytes held."""
+        return self._size
+
+    def get(self, key: str) -> bytes | None:
+        """Return the image stored under `key`, or None."""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            stored, _ = self._index[key]
+            expired = self.ttl is not None and time.time() - stored > self.ttl
+            data = None if expired else self._load(key)
+            if data is None:  # expired, or deleted behind our back
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an image under `key`, evicting others if over the limits."""
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+            if self.max_bytes is not None and len(data) > self.max_bytes:
+                return
+            self._store(key, data)
+            self._index[key] = (time.time(), len(data))
+            self._size += len(data)
+            while self._over_limits():
+                self._remove(next(iter(self._index)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every image."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def _over_limits(self) -> bool:
+        return (self.max_bytes is not None and self._size > self.max_bytes) or (
+            self.max_entries is not None and len(self._index) > self.max_entries
+        )
+
+    def _remove(self, key: str) -> None:
+        _, size = self._index.pop(key)
+        self._size -= size
+        self._delete(key)
+
+    @abc.abstractmethod
+    def _load(self, key: str) -> bytes | None:
+        """Return the bytes stored under `key`, or None if they're gone."""
+
+    @abc.abstractmethod
+    def _store(self, key: str, data: bytes) -> None:
+        """Store bytes under `key`, replacing any."""
+
+    @abc.abstractmethod
+    def _delete(self, key: str) -> None:
+        """Delete the bytes under `key`, if there are any."""
+
+
+class MemoryCache(RenderCache):
+    """A render cache held in memory, for the life of the process."""
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Create an empty cache in memory.
+
+        Args:
+            **kwargs: max_bytes, max_entries, and ttl, see RenderCache.
+
+        """
+        super().__init__(**kwargs)
+        self._data: dict[str, bytes] = {}
+
+    def _load(self, key: str) -> bytes | None:
+        return self._data.get(key)
+
+    def _store(self, key: str, data: bytes) -> None:
+        self._data[key] = data
+
+    def _delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class DiskCache(RenderCache):
+    """
+    A render cache kept as files in a directory, so it outlives the process.
+
+    Images already in the directory are loaded, oldest first. Temporary files
+    left by interrupted writes are deleted when the cache is created and when
+    it evicts. Do not share a directory between processes that write to it at
+    the same time.
+    """
+
+    def __init__(self, directory: str | Path, **kwargs) -> None:
+        """
+        Create a cache in a directory, creating the directory if needed.
+
+        Args:
+            directory: where to keep the images.
+            **kwargs: max_bytes, max_entries, and ttl, see RenderCache.
+
+        """
+        super().__init__(**kwargs)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sweep()
+        entries = []
+        for p in self.directory.glob("*.bin"):
+            stat = p.stat()
+            entries.append((stat.st_mtime, p.stem, stat.st_size))
+        for stored, key, size in sorted(entries):
+            self._index[key] = (stored, size)
+            self._size += size
+        while self._over_limits():
+            self._remove(next(iter(self._index)))
+        _logger.debug(f"Disk cache has {len(self)} images in {self.directory}")
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an image under `key`, evicting others if over the limits."""
+        evictions = self.evictions
+        super().put(key, data)
+        if self.evictions != evictions:
+            with self._lock:
+                self._sweep()
+
+    def _sweep(self) -> None:
+        for p in self.directory.glob("*.tmp"):
+            _logger.debug(f"Deleting {p.name}, left by an interrupted write.")
+            p.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.bin"
+
+    def _load(self, key: str) -> bytes | None:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key: str, data: bytes) -> None:
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory,
+            prefix=f"{key}.",
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            tmp = Path(f.name)
+            try:
+                f.write(data)
+            except BaseException:
+                f.close()
+                tmp.unlink()
+                raise
+        tmp.replace(self._path(key))  # readers never see half a file
+
+    def _delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
@@ -0,0 +1,312 @@
+"""A cache of what tabs fetch from the network, like topojson and images."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import http.client
+import mimetypes
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import logistro
+
+from . import _utils
+from ._kaleido_tab._errors import _raise_error
+from ._render_cache import DiskCache, MemoryCache
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from typing import Any
+
+    import choreographer
+
+    from ._render_cache import RenderCache
+
+_logger = logistro.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+"""The most bytes of downloaded resources kept, unless told otherwise."""
+
+_DOWNLOAD_TIMEOUT = 60
+# scripts and stylesheets are the page's, see PageGenerator(bundle=...)
+_RESOURCE_TYPES = ("XHR", "Fetch", "Image")
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _guess_type(url: str) -> str:
+    return mimetypes.guess_type(url.split("?")[0])[0] or "application/octet-stream"
+
+
+def _download(url: str, headers: dict[str, str] | None) -> tuple[str, bytes]:
+    _logger.info(f"Downloading {url} to the resource cache.")
+    request = urllib.request.Request(url, headers=headers or {})  # noqa: S310 http(s)
+    with urllib.request.urlopen(request, timeout=_DOWNLOAD_TIMEOUT) as response:  # noqa: S310
+        return response.headers.get("Content-Type") or _guess_type(url), response.read()
+
+
+class ResourceCache:
+    """
+    Answers tabs' requests for data and images from a cache shared by tabs.
+
+    Each tab has Chrome pause its http(s) XHR, fetch, and image requests, with
+    the devtools Fetch domain. A cached resource is answered directly. Anything
+    else is downloaded once, for every tab waiting on it, and kept, evicting
+    the least recently used past `max_bytes`. So topojson and layout images
+    are downloaded once, however often tabs reload, and with a directory, once
+    across runs. Only successful GETs are cached, and requests that can't be
+    downloaded are left to the browser.
+
+    Files seeded from a directory are read from it as they are and never
+    evicted, so figures that only need them render offline.
+
+    Downloads are made by Python, not the browser: the tab's extra headers
+    are sent, but not its proxy settings or cookies, and Cache-Control is
+    ignored. Entries never expire, so don't use it for urls whose content
+    changes.
+    """
+
+    hits: int
+    """Requests answered from the cache or a seeded file."""
+    misses: int
+    """Requests downloaded, or left to the browser."""
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        *,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        seed: Mapping[str, str | Path] | None = None,
+    ) -> None:
+        """
+        Create a cache.
+
+        Args:
+            directory: where to keep downloads, creating it if needed. Defaults
+                to None, which keeps them in memory.
+            max_bytes: the most bytes of downloads to keep, or None for no
+                limit. Defaults to DEFAULT_MAX_BYTES.
+            seed: a directory to serve for each base url, see `seed()`.
+
+        """
+        self._cache: RenderCache = (
+            DiskCache(directory, max_bytes=max_bytes)
+            if directory
+            else MemoryCache(max_bytes=max_bytes)
+        )
+        self._seeded: dict[str, Path] = {}
+        self._downloads: dict[str, asyncio.Future[tuple[str, bytes] | None]] = {}
+        self.hits = 0
+        self.misses = 0
+        for base_url, seed_dir in (seed or {}).items():
+            self.seed(base_url, seed_dir)
+
+    def seed(self, base_url: str, directory: str | Path) -> int:
+        """
+        Serve the files in a directory, instead of downloading them.
+
+        Args:
+            base_url: the url of the directory, e.g. the topojson url.
+            directory: the local copy. Each file is served as `base_url`
+                followed by its path in the directory.
+
+        Returns:
+            The number of files seeded.
+
+        """
+        root = Path(directory)
+        if not root.is_dir():
+            raise FileNotFoundError(f"{root!s} is not a directory.")
+        base_url = base_url if base_url.endswith("/") else f"{base_url}/"
+        files = [p for p in root.rglob("*") if p.is_file()]
+        for p in files:
+            self._seeded[base_url + p.relative_to(root).as_posix()] = p
+        _logger.debug(f"Seeded {len(files)} resources for {base_url}")
+        return len(files)
+
+    def get(self, url: str) -> tuple[str, bytes] | None:
+        """Return the content type and body stored for `url`, or None."""
+        if url in self._seeded:
+            try:
+                return _guess_type(url), self._seeded[url].read_bytes()
+            except FileNotFoundError:
+                del self._seeded[url]
+        record = self._cache.get(_key(url))
+        if record is None:
+            return None
+        content_type, _, body = record.partition(b"\n")
+        return content_type.decode(), body
+
+    def put(self, url: str, content_type: str, body: bytes) -> None:
+        """Store a resource for `url`."""
+        self._cache.put(_key(url), content_type.encode() + b"\n" + body)
+
+    async def fetch(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[str, bytes] | None:
+        """
+        Return a resource from the cache, downloading it if needed.
+
+        Args:
+            url: the http(s) url of the resource.
+            headers: extra headers to download it with.
+
+        Returns:
+            The content type and body, or None if it couldn't be downloaded.
+
+        """
+        resource = await _utils.to_thread(self.get, url)
+        if resource is not None:
+            self.hits += 1
+            return resource
+        self.misses += 1
+        download = self._downloads.get(url)
+        if download is None or download.get_loop() is not asyncio.get_running_loop():
+            download = asyncio.ensure_future(self._download(url, headers))
+            self._downloads[url] = download
+
+            def forget(done: asyncio.Future) -> None:
+                if self._downloads.get(url) is done:
+                    del self._downloads[url]
+
+            download.add_done_callback(forget)
+        return await asyncio.shield(download)
+
+    async def _download(
+        self,
+        url: str,
+        headers: dict[str, str] | None,
+    ) -> tuple[str, bytes] | None:
+        try:
+            content_type, body = await _utils.to_thread(_download, url, headers)
+        except (
+            urllib.error.URLError,
+            http.client.HTTPException,
+            OSError,
+            ValueError,
+        ) as e:
+            _logger.info(f"Couldn't download {url}, leaving it to the browser: {e}")
+            return None
+        try:
+            await _utils.to_thread(self.put, url, content_type, body)
+        except OSError as e:
+            _logger.warning(f"Couldn't store {url} in the resource cache: {e}")
+        return content_type, body
+
+    async def prepare(
+        self,
+        tab: choreographer.Tab,
+        *,
+        headers: dict[str, str] | None = None,
+        exclude: tuple[str, ...] = (),
+    ) -> None:
+        """
+        Have a tab's requests for data and images answered from the cache.
+
+        This lasts for the life of the tab, across reloads.
+
+        Args:
+            tab: the tab.
+            headers: extra headers to download with, as the tab would send.
+            exclude: url prefixes to leave to the browser, e.g. local servers.
+
+        """
+
+        async def serve(event: Any) -> None:
+            await self._serve(tab, event, headers, exclude)
+
+        tab.unsubscribe("Fetch.requestPaused")
+        tab.subscribe("Fetch.requestPaused", serve)
+        _raise_error(
+            await tab.send_command(
+                "Fetch.enable",
+                params={
+                    "patterns": [
+                        {"urlPattern": f"{scheme}://*", "resourceType": kind}
+                        for scheme in ("http", "https")
+                        for kind in _RESOURCE_TYPES
+                    ],
+                },
+            ),
+        )
+
+    async def _serve(
+        self,
+        tab: choreographer.Tab,
+        event: Any,
+        headers: dict[str, str] | None,
+        exclude: tuple[str, ...],
+    ) -> None:
+        params = event["params"]
+        request_id, url = params["requestId"], params["request"].get("url", "")
+        try:
+            resource = None
+            if params["request"]["method"] == "GET" and not url.startswith(exclude):
+                resource = await self.fetch(url, headers)
+            if resource is not None:
+                await self._fulfill(tab, request_id, url, *resource)
+                return
+        except Exception as e:  # noqa: BLE001 the request must not stay paused
+            _logger.warning(f"Resource cache failed on {url}: {e!r}")
+        await self._release(tab, request_id, url)
+
+    async def _fulfill(
+        self,
+        tab: choreographer.Tab,
+        request_id: str,
+        url: str,
+        content_type: str,
+        body: bytes,
+    ) -> None:
+        _logger.debug2(f"Serving {url} from the resource cache.")
+        _raise_error(
+            await tab.send_command(
+                "Fetch.fulfillRequest",
+                params={
+                    "requestId": request_id,
+                    "responseCode": 200,
+                    "responseHeaders": [
+                        {"name": "Content-Type", "value": content_type},
+                        {"name": "Content-Length", "value": str(len(body))},
+                        # the page is a file, so every request is cross origin
+                        {"name": "Access-Control-Allow-Origin", "value": "*"},
+                    ],
+                    "body": base64.b64encode(body).decode(),
+                },
+            ),
+        )
+
+    async def _release(
+        self,
+        tab: choreographer.Tab,
+        request_id: str,
+        url: str,
+    ) -> None:
+        """Let the browser fetch `url` itself, or fail it, but never leave it."""
+        _logger.debug2(f"Letting the browser fetch {url}")
+        try:
+            _raise_error(
+                await tab.send_command(
+                    "Fetch.continueRequest",
+                    params={"requestId": request_id},
+                ),
+            )
+        except Exception as e:  # noqa: BLE001 fail it instead
+            _logger.warning(f"Couldn't continue the request for {url}: {e!r}")
+            try:
+                _raise_error(
+                    await tab.send_command(
+                        "Fetch.failRequest",
+                        params={"requestId": request_id, "errorReason": "Failed"},
+                    ),
+                )
+            except Exception:  # the tab is likely gone
+                _logger.exception(f"Couldn't fail the request for {url}.")
@@ -0,0 +1,116 @@
+"""A local copy of remote javascript libraries, so pages load offline."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import urllib.request
+from pathlib import Path
+
+import logistro
+import orjson
+
+_logger = logistro.getLogger(__name__)
+
+DEFAULT_BUNDLE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "kaleido"
+    / "scripts"
+)
+"""Where remote scripts are kept, unless told otherwise."""
+
+_MANIFEST = "manifest.json"
+_DOWNLOAD_TIMEOUT = 60
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ScriptBundle:
+    """
+    Keeps verified copies of remote scripts in a directory.
+
+    Each script is downloaded once and stored under its sha256. A manifest maps
+    urls to hashes, and a copy is checked against its hash the first time it
+    is used, and again whenever its size or modification time changes, so a
+    corrupted or edited file is downloaded again instead of loaded.
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        """
+        Create a bundle in a directory, creating the directory if needed.
+
+        Args:
+            directory: where to keep the scripts. Defaults to
+                DEFAULT_BUNDLE_DIR.
+
+        """
+        self.directory = Path(directory) if directory else DEFAULT_BUNDLE_DIR
+        self._lock = threading.Lock()
+        # the size and mtime of each copy when its hash was last checked
+        self._verified: dict[Path, tuple[int, int]] = {}
+
+    def _read_manifest(self) -> dict[str, str]:
+        try:
+            return orjson.loads((self.directory / _MANIFEST).read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return {}
+
+    def _write(self, name: str, data: bytes) -> None:
+        tmp = self.directory / f"{name}.tmp"
+        tmp.write_bytes(data)
+        tmp.replace(self.directory / name)  # readers never see half a file
+
+    def _verify(self, path: Path, expected: str) -> bool:
+        stamp = _stamp(path)
+        if self._verified.get(path) == stamp:
+            return True
+        if _sha256(path.read_bytes()) != expected:
+            return False
+        self._verified[path] = stamp
+        return True
+
+    def _download(self, url: str) -> bytes:
+        _logger.info(f"Downloading {url} to the script bundle.")
+        # only http(s) urls reach here
+        request = urllib.request.urlopen(url, timeout=_DOWNLOAD_TIMEOUT)  # noqa: S310
+        with request as response:
+            return response.read()
+
+    def localize(self, url: str) -> Path:
+        """
+        Return the path of a verified local copy of `url`, downloading it if needed.
+
+        Args:
+            url: the http(s) url of the script.
+
+        Returns:
+            The path to the local copy.
+
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            manifest = self._read_manifest()
+            if expected := manifest.get(url):
+                path = self.directory / f"{expected}.js"
+                try:
+                    if self._verify(path, expected):
+                        return path
+                    _logger.warning(f"{path} is corrupted, downloading again.")
+                except FileNotFoundError:
+                    pass
+            data = self._download(url)
+            digest = _sha256(data)
+            self._write(f"{digest}.js", data)
+            path = self.directory / f"{digest}.js"
+            self._verified[path] = _stamp(path)
+            manifest[url] = digest
+            self._write(_MANIFEST, orjson.dumps(manifest))
+            return path
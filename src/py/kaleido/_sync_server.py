@@ -2,48 +2,70 @@ from __future__ import annotations
 
 import asyncio
 import atexit
+import concurrent.futures
+import threading
 import warnings
 from functools import partial
 from queue import Queue
 from threading import Thread
-from typing import TYPE_CHECKING, NamedTuple
+from typing import TYPE_CHECKING
 
+from . import _utils
 from .kaleido import Kaleido
 
 if TYPE_CHECKING:
     from typing import Any, Callable
 
 
-class Task(NamedTuple):
-    fn: str
-    args: Any
-    kwargs: Any
-
-
 class _BadFunctionName(BaseException):
     """For use when programmed poorly."""
 
 
 class GlobalKaleidoServer:
+    """
+    A Kaleido running in its own thread, for use from synchronous code.
+
+    Every call runs as its own coroutine on the server's loop, so calls from
+    many threads render in parallel, up to the number of tabs.
+    """
+
     _instance = None
 
-    async def _server(self, *args, **kwargs):
-        async with Kaleido(*args, **kwargs) as k:  # multiple processor? Enable GPU?
-            while True:
-                task = self._task_queue.get()  # thread dies if main thread dies
-                if task is None:
-                    self._task_queue.task_done()
-                    return
-                if not hasattr(k, task.fn):
-                    raise _BadFunctionName(f"Kaleido has no attribute {task.fn}")
-                try:
-                    self._return_queue.put(
-                        await getattr(k, task.fn)(*task.args, **task.kwargs),
-                    )
-                except Exception as e:  # noqa: BLE001
-                    self._return_queue.put(e)
-
-                self._task_queue.task_done()
+    # the server's state is passed in, as it may be reopened before it stops
+    async def _server(self, kaleido, closing, /, *args, **kwargs):
+        try:
+            async with Kaleido(*args, **kwargs) as k:
+                kaleido.set_result(k)
+                await asyncio.wrap_future(closing)
+        except Exception as e:  # noqa: BLE001 handed to every caller
+            if not kaleido.done():
+                kaleido.set_exception(e)
+                await asyncio.wrap_future(closing)
+
+    def _run(self, loop, kaleido, closing, /, *args, **kwargs):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._server(kaleido, closing, *args, **kwargs))
+        finally:
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                # before python 3.9, close() shuts the executor down without waiting
+                if hasattr(loop, "shutdown_default_executor"):
+                    loop.run_until_complete(loop.shutdown_default_executor())
+            finally:
+                loop.close()
+
+    async def _call(
+        self,
+        kaleido: concurrent.futures.Future[Kaleido],
+        cmd: str,
+        args: Any,
+        kwargs: Any,
+    ):
+        k = await asyncio.wrap_future(kaleido)
+        if not hasattr(k, cmd):
+            raise _BadFunctionName(f"Kaleido has no attribute {cmd}")
+        return await getattr(k, cmd)(*args, **kwargs)
 
     def __new__(cls):
         # Create the singleton on first instantiation
@@ -65,18 +87,19 @@ class GlobalKaleidoServer:
                     stacklevel=2,
                 )
             return
-        coroutine = self._server(*args, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._kaleido: concurrent.futures.Future[Kaleido] = concurrent.futures.Future()
+        self._closing: concurrent.futures.Future[None] = concurrent.futures.Future()
         self._thread: Thread = Thread(
-            target=asyncio.run,
-            args=(coroutine,),
+            target=self._run,
+            args=(self._loop, self._kaleido, self._closing, *args),
+            kwargs=kwargs,
             daemon=True,
         )
-        self._task_queue: Queue[Task | None] = Queue()
-        self._return_queue: Queue[Any] = Queue()
         self._thread.start()
         self._initialized = True
-        close = partial(self.close, silence_warnings=True)
-        atexit.register(close)
+        self._atexit = partial(self.close, silence_warnings=True)
+        atexit.register(self._atexit)
 
     def close(self, *, silence_warnings=False):
         """Reset the singleton back to an uninitialized state."""
@@ -88,12 +111,20 @@ class GlobalKaleidoServer:
                     stacklevel=2,
                 )
             return
-        self._task_queue.put(None)
-        self._thread.join()
+        self._stop().join()
+
+    def _stop(self) -> Thread:
+        """Reset the singleton, returning the server's thread to join."""
+        atexit.unregister(self._atexit)
+        self._closing.set_result(None)
+        thread = self._thread
         del self._thread
-        del self._task_queue
-        del self._return_queue
+        del self._loop
+        del self._kaleido
+        del self._closing
+        del self._atexit
         self._initialized = False
+        return thread
 
     def call_function(self, cmd: str, *args: Any, **kwargs: Any):
         """
@@ -101,7 +132,7 @@ class GlobalKaleidoServer:
 
         Preferred functions would be: `calc_fig`, `write_fig`, and
         `write_fig_from_object`. Methods that doesn't exist will raise a
-        BaseException.
+        BaseException. It is safe to call this from many threads at once.
 
         Args:
             cmd (str): the name of the method to call
@@ -109,21 +140,122 @@ class GlobalKaleidoServer:
             kwargs (Any): the method's keyword arguments
 
         """
+        return self._submit(cmd, args, kwargs).result()
+
+    async def call_function_async(self, cmd: str, *args: Any, **kwargs: Any):
+        """Call any function on the singleton Kaleido object from any loop."""
+        return await asyncio.wrap_future(self._submit(cmd, args, kwargs))
+
+    def _submit(self, cmd: str, args: Any, kwargs: Any) -> concurrent.futures.Future:
         if not self.is_running():
             raise RuntimeError("Can't call function on stopped server.")
         if kwargs.pop("kopts", None):
             warnings.warn(
                 "The kopts argument is ignored if using a server.",
                 UserWarning,
-                stacklevel=3,
+                stacklevel=4,
             )
-        self._task_queue.put(Task(cmd, args, kwargs))
-        self._task_queue.join()
-        res = self._return_queue.get()
-        if isinstance(res, BaseException):
-            raise res
-        else:
-            return res
+        return asyncio.run_coroutine_threadsafe(
+            self._call(self._kaleido, cmd, args, kwargs),
+            self._loop,
+        )
+
+
+class WarmKaleidoServer(GlobalKaleidoServer):
+    """
+    A server that opens on first use and closes after being idle.
+
+    If enabled, the one-shot helpers (`kaleido.calc_fig()` and the like) use
+    it instead of starting and stopping a browser for every call.
+    """
+
+    _instance = None
+    enabled = False
+    idle_timeout = 300.0
+    _lock = threading.Lock()
+    _in_flight = 0
+    _close_when_idle = False
+    _idle_timer: threading.Timer | None = None
+
+    def enable(self, *, idle_timeout: float | None = None) -> None:
+        """Use the warm server, closing it after `idle_timeout` unused seconds."""
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        with self._lock:
+            self._close_when_idle = False
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop using the warm server, closing it once calls in progress finish."""
+        self.enabled = False
+        stopped = None
+        with self._lock:
+            self._cancel_idle_timer()
+            if self._in_flight:
+                self._close_when_idle = True
+            elif self.is_running():
+                stopped = self._stop()
+        if stopped:
+            stopped.join()
+
+    def call_function(self, cmd: str, *args: Any, **kwargs: Any):
+        """Call a function on the warm Kaleido, opening it if needed."""
+        self._check_out()
+        try:
+            return super().call_function(cmd, *args, **kwargs)
+        finally:
+            stopped = self._check_in()
+            if stopped:
+                stopped.join()
+
+    async def call_function_async(self, cmd: str, *args: Any, **kwargs: Any):
+        """Call a function on the warm Kaleido from any loop, opening it if needed."""
+        self._check_out()
+        try:
+            return await super().call_function_async(cmd, *args, **kwargs)
+        finally:
+            stopped = self._check_in()
+            if stopped:  # don't block the caller's loop
+                await _utils.to_thread(stopped.join)
+
+    def _check_out(self) -> None:
+        with self._lock:
+            self._cancel_idle_timer()
+            if not self.is_running():
+                self.open(silence_warnings=True)
+            self._in_flight += 1
+
+    def _check_in(self) -> Thread | None:
+        """Check a call back in, returning a stopped server's thread to join."""
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight:
+                return None
+            close, self._close_when_idle = self._close_when_idle, False
+            if not self.is_running():
+                return None
+            if close:  # disabled during the call
+                return self._stop()
+            if self._kaleido.done() and self._kaleido.exception():
+                return self._stop()  # try again next time
+            self._idle_timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+            return None
+
+    def _cancel_idle_timer(self) -> None:
+        if self._idle_timer:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _close_if_idle(self) -> None:
+        stopped = None
+        with self._lock:
+            self._idle_timer = None
+            if not self._in_flight and self.is_running():
+                stopped = self._stop()
+        if stopped:  # joined unlocked, so callers can open a new server meanwhile
+            stopped.join()
 
 
 def oneshot_async_run(
@@ -12,8 +12,11 @@ from packaging.version import Version
 _logger = logistro.getLogger(__name__)
 
 if TYPE_CHECKING:
+    from concurrent.futures import Executor
     from typing import Any, AsyncIterator, Callable, Coroutine
 
+OFFLOAD_THRESHOLD = 1024 * 1024  # bytes, below this a thread hop isn't worth it
+
 
 def event_printer(name: str) -> Callable[[Any], Coroutine[Any, Any, None]]:
     """Return function that prints whatever argument received."""
@@ -59,11 +62,75 @@ def ensure_async_iter(obj) -> AsyncIterator[Any]:
     return _AIter()
 
 
+async def aenumerate(obj) -> AsyncIterator[tuple[int, Any]]:
+    """Enumerate any iterable, sync or async."""
+    i = 0
+    async for item in ensure_async_iter(obj):
+        yield i, item
+        i += 1
+
+
+def orjson_default(obj: Any) -> Any:
+    """Fallback for types orjson can't handle natively (e.g. NumPy string arrays)."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
 async def to_thread(func, *args, **kwargs):
     """Polyfill `asyncio.to_thread()`."""
     _loop = asyncio.get_running_loop()
     fn = partial(func, *args, **kwargs)
-    await _loop.run_in_executor(None, fn)
+    return await _loop.run_in_executor(None, fn)
+
+
+class Offloader:
+    """
+    Runs CPU-heavy functions in an executor when their input is large.
+
+    Small inputs are handled directly on the event loop, where they are
+    faster than a trip to the executor. Large ones are sent to the executor,
+    so the loop keeps serving other tabs while they are processed.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        threshold: int | None = OFFLOAD_THRESHOLD,
+    ) -> None:
+        """
+        Create an offloader.
+
+        Args:
+            executor: where to run large jobs. None means the event loop's
+                default thread pool. A process pool works too, as long as the
+                arguments can be pickled.
+            threshold: the size in bytes from which jobs are offloaded, or
+                None to never offload.
+
+        """
+        self.executor = executor
+        self.threshold = threshold
+
+    async def run(self, size: int | None, func, *args, **kwargs) -> Any:
+        """
+        Call `func(*args, **kwargs)`, in the executor if `size` is large.
+
+        Args:
+            size: about how many bytes `func` has to process, or None if
+                unknown, in which case it is always offloaded.
+            func: the function to call.
+            *args: its positional arguments.
+            **kwargs: its keyword arguments.
+
+        """
+        if self.threshold is None or (size is not None and size < self.threshold):
+            return func(*args, **kwargs)
+        _loop = asyncio.get_running_loop()
+        return await _loop.run_in_executor(
+            self.executor,
+            partial(func, *args, **kwargs),
+        )
 
 
 def warn_incompatible_plotly():
@@ -6,6 +6,10 @@ It 1. validates, 2. write defaults, 3. packages object.
 
 from __future__ import annotations
 
+import base64
+import re
+import sys
+from array import array
 from typing import TYPE_CHECKING, Literal, TypedDict
 
 import logistro
@@ -16,18 +20,36 @@ if TYPE_CHECKING:
     from pathlib import Path
     from typing import Any
 
-    from typing_extensions import TypeGuard
+    from typing_extensions import NotRequired, TypeGuard
 
     Figurish = Any  # Be nice to make it more specific, dictionary or something
     FormatString = Literal["png", "jpg", "jpeg", "webp", "svg", "json", "pdf"]
 
 
+# One size of image to make, anything left out is the figure's own
+class Variant(TypedDict, total=False):
+    width: int | float
+    height: int | float
+    scale: int | float
+
+
 # Input of to_spec (user gives us this)
 class LayoutOpts(TypedDict, total=False):
-    format: FormatString | None
+    format: FormatString | list[FormatString] | None
     scale: int | float
     height: int | float
     width: int | float
+    variants: list[Variant]
+
+
+# One image made from a spec
+class Output(TypedDict):
+    format: FormatString
+    width: int | float
+    height: int | float
+    scale: int | float
+    # only for variants, "{width}x{height}@{scale}", added to the file name
+    label: NotRequired[str]
 
 
 # Output of to_spec (we give kaleido_scopes.js this)
@@ -38,6 +60,8 @@ class Spec(TypedDict):
     height: int | float
     scale: int | float
     data: Figurish
+    # only for several formats or for variants
+    outputs: NotRequired[list[Output]]
 
 
 _logger = logistro.getLogger(__name__)
@@ -57,6 +81,171 @@ SUPPORTED_FORMATS: tuple[FormatString, ...] = (
     "pdf",
 )
 
+# Typed arrays: https://plotly.com/javascript/reference/#typed-arrays
+TYPED_ARRAY_MIN_LENGTH = 1000
+"""Plain lists shorter than this are left as JSON when encoding typed arrays."""
+_TYPED_ARRAY_DTYPES = {
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+# plotly.js has no 64 bit integers, so we try to fit them in something smaller
+_NARROWER_INTS = {
+    "int64": ("int8", "int16", "int32"),
+    "uint64": ("uint8", "uint16", "uint32"),
+}
+# same as plotly.py: these are lists, but not data arrays
+_TYPED_ARRAY_SKIP_KEYS = ("geojson", "layer", "layers", "range")
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+
+_APPROX_SCALAR_SIZE = 8  # a number, bool, or null, with its comma
+
+# plotly.js typesets any text with a $...$ in it, if MathJax is loaded
+_LATEX = re.compile(r"\$[^$]*\$")
+
+
+def _numpy_to_typed_array(v: Any) -> Any:
+    import numpy as np  # noqa: PLC0415 only called if numpy is already imported
+
+    if not v.size:
+        return v
+    if (dtype := v.dtype.name) in _NARROWER_INTS:
+        lo, hi = v.min(), v.max()
+        for narrower in _NARROWER_INTS[dtype]:
+            info = np.iinfo(narrower)
+            if info.min <= lo and hi <= info.max:
+                v = v.astype(narrower)
+                break
+        else:
+            return v
+    if (plotly_dtype := _TYPED_ARRAY_DTYPES.get(v.dtype.name)) is None:
+        return v
+    v = np.ascontiguousarray(v, dtype=v.dtype.newbyteorder("<"))
+    typed = {
+        "dtype": plotly_dtype,
+        "bdata": base64.b64encode(v).decode("ascii"),
+    }
+    if v.ndim > 1:
+        typed["shape"] = ",".join(str(d) for d in v.shape)
+    return typed
+
+
+def _list_to_typed_array(v: list) -> Any:
+    if not all(type(x) is int or type(x) is float for x in v):  # no bools
+        return v
+    if all(type(x) is int and _INT32_MIN <= x <= _INT32_MAX for x in v):
+        typecode, plotly_dtype = "i", "i4"
+    else:
+        typecode, plotly_dtype = "d", "f8"
+    packed = array(typecode, v)
+    if packed.itemsize != int(plotly_dtype[1]):
+        return v  # exotic platform
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return {
+        "dtype": plotly_dtype,
+        "bdata": base64.b64encode(packed).decode("ascii"),
+    }
+
+
+def _encode_typed_value(v: Any, min_length: int) -> Any:
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(v, numpy.ndarray):
+        return _numpy_to_typed_array(v)
+    if isinstance(v, list) and len(v) >= min_length:
+        typed = _list_to_typed_array(v)
+        if typed is not v:
+            return typed
+    return encode_typed_arrays(v, min_length)
+
+
+def encode_typed_arrays(
+    obj: Any,
+    min_length: int = TYPED_ARRAY_MIN_LENGTH,
+) -> Any:
+    """
+    Convert numeric arrays in a figure to plotly.js's base64 typed arrays.
+
+    NumPy arrays of a supported dtype are always converted. Plain lists of
+    numbers are converted if they have at least `min_length` elements. The
+    object passed in is not modified, containers are copied where needed.
+
+    Args:
+        obj: a figure dictionary, or any part of one.
+        min_length: the shortest plain list to convert.
+
+    Returns:
+        A figure dictionary (or part of one) with typed arrays.
+
+    """
+    if isinstance(obj, dict):
+        return {
+            k: v if k in _TYPED_ARRAY_SKIP_KEYS else _encode_typed_value(v, min_length)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        # lists of numbers or strings have nothing to convert inside them
+        if not obj or not isinstance(obj[0], (dict, list, tuple)):
+            return obj
+        return [encode_typed_arrays(v, min_length) for v in obj]
+    return obj
+
+
+def approx_size(obj: Any) -> int:
+    """
+    Estimate the size of an object's JSON in bytes, much faster than encoding it.
+
+    Lists of numbers or strings are counted from their length and their first
+    element, not walked, so this only visits containers.
+
+    Args:
+        obj: a figure dictionary, or any part of one.
+
+    Returns:
+        A rough number of bytes.
+
+    """
+    if isinstance(obj, dict):
+        return sum(len(k) + approx_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        if not obj:
+            return 2
+        if isinstance(obj[0], (dict, list, tuple)):
+            return sum(approx_size(v) for v in obj)
+        return len(obj) * approx_size(obj[0])
+    if isinstance(obj, str):
+        return len(obj) + 2
+    return int(getattr(obj, "nbytes", _APPROX_SCALAR_SIZE))  # numpy arrays
+
+
+def has_latex(obj: Any) -> bool:
+    """
+    Check if a figure has any text that plotly.js would typeset with MathJax.
+
+    Titles, annotations, tick labels, trace names, and categories are all
+    checked, including every string in a list that also has numbers.
+    NumPy and typed arrays are skipped.
+
+    Args:
+        obj: a figure dictionary, or any part of one.
+
+    Returns:
+        True if MathJax is needed to render the figure.
+
+    """
+    if isinstance(obj, str):
+        return "$" in obj and _LATEX.search(obj) is not None
+    if isinstance(obj, dict):
+        return any(has_latex(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(has_latex(v) for v in obj if not isinstance(v, (int, float)))
+    return False
+
 
 def is_figurish(o: Any) -> TypeGuard[Figurish]:
     """Detect if input is a plotly figure or equivalent."""
@@ -93,6 +282,8 @@ def coerce_for_js(
     fig: Figurish,
     path: Path | str | None,
     opts: LayoutOpts | None,
+    *,
+    typed_arrays: bool = False,
 ) -> Spec:
     """
     Package fig, path, and opts into a dictionary that javascript understands.
@@ -101,12 +292,17 @@ def coerce_for_js(
         - validate the inputs
         - coerce the inputs if needed (eg. jpeg --> jpg)
         - provide defaults if we can
+        - convert numeric arrays to typed arrays, if `typed_arrays` is True
     """
     if not is_figurish(fig):  # VALIDATE FIG
         raise TypeError("Figure supplied doesn't seem to be a valid plotly figure.")
     if hasattr(fig, "to_dict"):  # COERCE FIG
         fig = fig.to_dict()
+    if typed_arrays:
+        fig = encode_typed_arrays(fig)
 
+    if isinstance(path, (list, tuple)):  # a path for each output
+        path = path[0] if path else None
     path = path_tools.get_path(path) if path else None
 
     opts = opts or {}
@@ -115,10 +311,8 @@ def coerce_for_js(
         raise AttributeError(f"Unknown key(s) in layout options: {_rest}")
 
     # Extract info
-    file_format = _coerce_format(
-        opts.get("format")
-        or (path.suffix.lstrip(".") if path and path.suffix else DEFAULT_EXT),
-    )
+    formats = _coerce_formats(opts.get("format"), path)
+    file_format = formats[0]
 
     layout = fig.get("layout", {})
 
@@ -146,5 +340,60 @@ def coerce_for_js(
         "scale": scale,
         "data": fig,
     }
+    variants = _coerce_variants(opts.get("variants"))
+    if len(formats) > 1 or variants:
+        spec["outputs"] = []
+        for variant in variants or [{}]:
+            w = variant.get("width", width)
+            h = variant.get("height", height)
+            s = variant.get("scale", scale)
+            for f in formats:
+                output: Output = {"format": f, "width": w, "height": h, "scale": s}
+                if variants:
+                    output["label"] = f"{_label(w)}x{_label(h)}@{_label(s)}"
+                spec["outputs"].append(output)
 
     return spec
+
+
+def _coerce_formats(
+    requested: FormatString | list[FormatString] | None,
+    path: Path | None,
+) -> list[FormatString]:
+    if isinstance(requested, (list, tuple)):
+        if not requested:
+            raise ValueError("The list of formats is empty.")
+        return list(dict.fromkeys(_coerce_format(f) for f in requested))
+    return [
+        _coerce_format(
+            requested
+            or (path.suffix.lstrip(".") if path and path.suffix else DEFAULT_EXT),
+        ),
+    ]
+
+
+def _coerce_variants(variants: list[Variant] | None) -> list[Variant]:
+    if variants is None:
+        return []
+    if not variants:
+        raise ValueError("The list of variants is empty.")
+    for variant in variants:
+        if _rest := variant.keys() - Variant.__annotations__.keys():
+            raise AttributeError(f"Unknown key(s) in variant: {_rest}")
+    return variants
+
+
+def _label(n: float) -> str:
+    return str(int(n)) if float(n).is_integer() else str(n)
+
+
+def spec_outputs(spec: Spec) -> list[Output]:
+    """Return every image a spec makes, even if it only makes one."""
+    return spec.get("outputs") or [
+        {
+            "format": spec["format"],
+            "width": spec["width"],
+            "height": spec["height"],
+            "scale": spec["scale"],
+        },
+    ]
@@ -0,0 +1,88 @@
+"""The little HTTP/1.1 that Kaleido's loopback servers speak."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import logistro
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, Tuple
+
+    from typing_extensions import TypeAlias
+
+    Headers: TypeAlias = Dict[str, str]
+    Request: TypeAlias = Tuple[str, str, Headers, bytes]
+    """The method, target, lowercased headers, and body of a request."""
+    Response: TypeAlias = Tuple[str, bytes, str]
+    """The status, body, and content type of a response."""
+
+_logger = logistro.getLogger(__name__)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Request | None:
+    """Read one request, or return None if the connection closed first."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers: Headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def write_response(
+    writer: asyncio.StreamWriter,
+    response: Response,
+    extra_headers: bytes = b"",
+) -> None:
+    """Write a response, `extra_headers` being complete lines of headers."""
+    status, body, content_type = response
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+    ).encode()
+    writer.write(head + extra_headers + b"\r\n")
+    if body:
+        writer.write(body)  # no copy, the transport takes the buffer
+
+
+async def serve(  # noqa: PLR0913
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    respond: Callable[[Request], Response],
+    *,
+    name: str,
+    extra_headers: bytes = b"",
+    keep_alive: bool = True,
+) -> None:
+    """
+    Answer the requests on a connection, then close it.
+
+    Args:
+        reader: the connection's reader.
+        writer: the connection's writer.
+        respond: makes the response to a request.
+        name: the server's name, for logs.
+        extra_headers: complete lines of headers to add to every response.
+        keep_alive: set False to close the connection after one response.
+
+    """
+    if not keep_alive:
+        extra_headers += b"Connection: close\r\n"
+    try:
+        while request := await read_request(reader):
+            write_response(writer, respond(request), extra_headers)
+            await writer.drain()
+            if not keep_alive or request[2].get("connection") == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+        _logger.debug(f"{name} connection dropped: {e!s}")
+    finally:
+        writer.close()
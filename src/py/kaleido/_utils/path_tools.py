@@ -2,22 +2,28 @@ from __future__ import annotations
 
 import glob
 import re
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, overload
 from urllib.parse import urlparse
 from urllib.request import url2pathname
 
 import logistro
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
     from . import fig_tools
 
 _logger = logistro.getLogger(__name__)
 
 
-def _next_filename(path: Path | str, prefix: str, ext: str) -> str:
-    """Figure out proper suffix for generated file name."""
-    path = path if isinstance(path, Path) else Path(path)
+def _numbered(prefix: str, ext: str, n: int) -> str:
+    return f"{prefix}.{ext}" if n == 1 else f"{prefix}-{n}.{ext}"
+
+
+def _highest_number(path: Path, prefix: str, ext: str) -> int:
     default = 1 if (path / f"{prefix}.{ext}").exists() else 0
     re_number = re.compile(
         r"^" + re.escape(prefix) + r"\-(\d+)\." + re.escape(ext) + r"$",
@@ -29,15 +35,132 @@ def _next_filename(path: Path | str, prefix: str, ext: str) -> str:
         for name in path.glob(f"{escaped_prefix}-*.{escaped_ext}")
         if (match := re_number.match(Path(name).name))
     ]
-    n = max(numbers, default=default) + 1
-    return f"{prefix}.{ext}" if n == 1 else f"{prefix}-{n}.{ext}"
+    return max(numbers, default=default)
+
+
+def _next_filename(path: Path | str, prefix: str, ext: str) -> str:
+    """Figure out proper suffix for generated file name."""
+    return _next_filenames(path, [(prefix, ext)])[0]
+
+
+def _next_filenames(
+    path: Path | str,
+    stems: Sequence[tuple[str, str]],
+) -> list[str]:
+    """Like `_next_filename`, but one number free for every (prefix, ext)."""
+    path = path if isinstance(path, Path) else Path(path)
+    n = max(_highest_number(path, prefix, ext) for prefix, ext in stems) + 1
+    return [_numbered(prefix, ext, n) for prefix, ext in stems]
+
+
+# "prefix.ext" or "prefix-N.ext", as made by _next_filename
+_NUMBERED_NAME = re.compile(r"^(.*?)(?:\-(\d+))?\.([^.]*)$")
+
+
+class FilenameIndex:
+    """
+    Hands out the same names as `_next_filename`, without a scan for each.
+
+    Each directory is listed once, the first time a name is wanted in it, and
+    the highest number used by each prefix and extension is kept. Names handed
+    out count as used, so one index never hands out a name twice, even if the
+    file is deleted. Names are still checked against the disk before they are
+    handed out, so files written since the listing are never overwritten.
+
+    Share one index between batches of writes that may overlap, each inside
+    `in_use()`, so they don't pick the same name before either file exists.
+    The index is emptied when the last one finishes, and the next batch lists
+    the directories again.
+    """
 
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._directories: dict[Path, dict[tuple[str, str], int]] = {}
+        self._users = 0
+        self._lock = threading.Lock()
 
+    @contextmanager
+    def in_use(self) -> Iterator[FilenameIndex]:
+        """Hold the index for a batch of writes, emptying it after the last."""
+        with self._lock:
+            self._users += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._users -= 1
+                if not self._users:
+                    self._directories.clear()
+
+    def _scan(self, directory: Path) -> dict[tuple[str, str], int]:
+        highest: dict[tuple[str, str], int] = {}
+
+        def use(prefix: str, ext: str, n: int) -> None:
+            highest[(prefix, ext)] = max(highest.get((prefix, ext), 0), n)
+
+        for entry in directory.iterdir():
+            if match := _NUMBERED_NAME.match(entry.name):
+                prefix, number, ext = match.groups()
+                if number is None:
+                    use(prefix, ext, 1)
+                else:  # "a-2.png" is also the unnumbered name of prefix "a-2"
+                    use(prefix, ext, int(number))
+                    use(f"{prefix}-{number}", ext, 1)
+        return highest
+
+    def next_filename(self, directory: Path, prefix: str, ext: str) -> str:
+        """Return an unused name in `directory`, and count it as used."""
+        return self.next_filenames(directory, [(prefix, ext)])[0]
+
+    def next_filenames(
+        self,
+        directory: Path,
+        stems: Sequence[tuple[str, str]],
+    ) -> list[str]:
+        """Return a name for each (prefix, ext), all with the same unused number."""
+        key = directory.resolve()
+        with self._lock:
+            if (highest := self._directories.get(key)) is None:
+                highest = self._directories[key] = self._scan(directory)
+            n = max(highest.get(stem, 0) for stem in stems) + 1
+            while any((directory / _numbered(*stem, n)).exists() for stem in stems):
+                n += 1  # written since the scan, by someone else
+            for stem in stems:
+                highest[stem] = n
+            return [_numbered(prefix, ext, n) for prefix, ext in stems]
+
+
+def _same_format(suffix: str, ext: str) -> bool:
+    suffix = suffix.lstrip(".").lower()
+    return suffix == ext or {suffix, ext} == {"jpg", "jpeg"}
+
+
+@overload
 def determine_path(
     path: Path | str | None,
     fig: dict,
     ext: fig_tools.FormatString,
-) -> Path:
+    names: FilenameIndex | None = None,
+    *,
+    labels: Sequence[str] | None = None,
+) -> Path: ...
+@overload
+def determine_path(
+    path: Path | str | None,
+    fig: dict,
+    ext: Sequence[fig_tools.FormatString],
+    names: FilenameIndex | None = None,
+    *,
+    labels: Sequence[str] | None = None,
+) -> list[Path]: ...
+def determine_path(
+    path: Path | str | None,
+    fig: dict,
+    ext: fig_tools.FormatString | Sequence[fig_tools.FormatString],
+    names: FilenameIndex | None = None,
+    *,
+    labels: Sequence[str] | None = None,
+) -> Path | list[Path]:
     """
     Determine the filename by the algorithm described below.
 
@@ -48,7 +171,17 @@ def determine_path(
 
     If we are given a full path name, we simple make sure that all the subdirs
     exist and we accept the user's argument.
+
+    Pass the same `names` index for every figure in a batch, so that the
+    directory is only scanned once.
+
+    If `ext` is a list of formats, a path is returned for each. Generated
+    names share one number, and a full path gets each format's suffix, except
+    for the format it already has. `labels`, one for each format, are added to
+    the names after a dash: "fig-200x100@2.png", then "fig-200x100@2-2.png".
     """
+    exts = [ext] if isinstance(ext, str) else list(ext)
+    labels = labels or [""] * len(exts)
     path = Path(path) if path else Path()
 
     if not path.suffix or path.is_dir():  # they gave us a directory
@@ -62,15 +195,64 @@ def determine_path(
         prefix = prefix or "fig"
         prefix = prefix[:80]  # in case of long titles
         _logger.debug(f"Found: {prefix}")
-        name = _next_filename(directory, prefix, ext)
-        full_path = directory / name
+        stems = [
+            (f"{prefix}-{label}" if label else prefix, e)
+            for label, e in zip(labels, exts)
+        ]
+        filenames = (
+            names.next_filenames(directory, stems)
+            if names is not None
+            else _next_filenames(directory, stems)
+        )
+        full_paths = [directory / name for name in filenames]
     else:  # we have full path, supposedly
-        full_path = path
-        if not full_path.parent.is_dir():
+        if not path.parent.is_dir():
             raise RuntimeError(
                 f"Cannot reach path {path.parent}. Are all directories created?",
             )
-    return full_path
+        full_paths = (
+            [path]
+            if isinstance(ext, str)
+            else [
+                path.with_name(
+                    (f"{path.stem}-{label}" if label else path.stem)
+                    + (path.suffix if _same_format(path.suffix, e) else f".{e}"),
+                )
+                for label, e in zip(labels, exts)
+            ]
+        )
+    return full_paths[0] if isinstance(ext, str) else full_paths
+
+
+def output_paths(
+    path: Path | str | Sequence[Path | str] | None,
+    spec: fig_tools.Spec,
+    names: FilenameIndex | None = None,
+) -> list[Path]:
+    """
+    Determine a path for each of a spec's outputs, see `determine_path`.
+
+    `path` may also be a list with a path for each output, used as it is.
+    """
+    outputs = spec.get("outputs") or [spec]
+    if isinstance(path, (list, tuple)):
+        if len(path) != len(outputs):
+            raise ValueError(f"Got {len(path)} paths for {len(outputs)} outputs.")
+        full_paths = [get_path(p) for p in path]
+        for full_path in full_paths:
+            if not full_path.parent.is_dir():
+                raise RuntimeError(
+                    f"Cannot reach path {full_path.parent}. "
+                    "Are all directories created?",
+                )
+        return full_paths
+    return determine_path(
+        path,
+        spec["data"],
+        [output["format"] for output in outputs],
+        names,
+        labels=[output.get("label", "") for output in outputs],
+    )
 
 
 def get_path(p: str | Path) -> Path:
@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import hashlib
+import time
 import warnings
 from collections import deque
-from collections.abc import AsyncIterable, Iterable
+from collections.abc import AsyncIterable, Iterable, Mapping
 from pathlib import Path
 from typing import TYPE_CHECKING, TypedDict, cast, overload
 
@@ -14,12 +17,16 @@ import logistro
 from choreographer.errors import ChromeNotFoundError
 from choreographer.utils import TmpDirectory
 
-from . import _profiler, _utils
-from ._kaleido_tab import _KaleidoTab
+from . import _profiler, _render_cache, _utils
+from ._batcher import RenderBatcher
+from ._blob_server import BlobServer
+from ._kaleido_tab import CodeCache, ContentStore, ReloadPolicy, _KaleidoTab
+from ._metrics import Metrics, MetricsServer
 from ._page_generator import PageGenerator
 from ._utils import fig_tools, path_tools
 
 if TYPE_CHECKING:
+    from concurrent.futures import Executor
     from types import TracebackType
     from typing import (
         Any,
@@ -34,6 +41,9 @@ if TYPE_CHECKING:
 
     from typing_extensions import NotRequired, Required, TypeAlias, TypeGuard
 
+    from ._batcher import BatchItem
+    from ._resource_cache import ResourceCache
+
     T = TypeVar("T")
     AnyIterable: TypeAlias = Union[Iterable[T], AsyncIterable[T]]  # not runtime
 
@@ -45,7 +55,7 @@ if TYPE_CHECKING:
         """The type a fig_dicts returns for `write_fig_from_object`."""
 
         fig: Required[fig_tools.Figurish]
-        path: NotRequired[None | str | Path]
+        path: NotRequired[None | str | Path | list[str | Path]]
         opts: NotRequired[fig_tools.LayoutOpts | None]
         topojson: NotRequired[None | str]
 
@@ -56,6 +66,8 @@ def _is_figuredict(obj: Any) -> TypeGuard[FigureDict]:
 
 _logger = logistro.getLogger(__name__)
 
+_GROW_AFTER = 0.1  # seconds a render waits for a tab before we open another
+
 # Show a warning if the installed Plotly version
 # is incompatible with this version of Kaleido
 _utils.warn_incompatible_plotly()
@@ -99,13 +111,16 @@ class Kaleido(choreo.Browser):
     _main_render_coroutines: set[asyncio.Task]
     # technically Tasks, user sees coroutines
     profiler: deque[_profiler.WriteCall]
+    metrics: Metrics
+    metrics_server: MetricsServer | None
 
     _total_tabs: int
     _html_tmp_dir: None | TmpDirectory
+    _blob_server: None | BlobServer
 
     ### KALEIDO LIFECYCLE FUNCTIONS ###
 
-    def __init__(  # noqa: PLR0913
+    def __init__(  # noqa: PLR0913, PLR0915 a statement per option
         self,
         # *args: Any, force named vars for all choreographer passthrough
         n: int = 1,
@@ -114,6 +129,24 @@ class Kaleido(choreo.Browser):
         plotlyjs: str | Path | None = None,
         mathjax: str | Path | Literal[False] | None = None,
         headers: dict[str, str] | None = None,
+        reload_policy: ReloadPolicy | None = None,
+        prefetch: int | None = None,
+        transport: Literal["devtools", "http"] = "devtools",
+        typed_arrays: bool = False,  # noqa: FBT001, FBT002
+        cache: _render_cache.RenderCache | None = None,
+        resource_cache: ResourceCache | None = None,
+        max_tabs: int | None = None,
+        tab_idle_timeout: float = 60,
+        executor: Executor | None = None,
+        offload_threshold: int | None = _utils.OFFLOAD_THRESHOLD,
+        bundle: bool | str | Path = False,  # noqa: FBT001, FBT002
+        code_cache: bool = False,  # noqa: FBT001, FBT002
+        mathjax_on_demand: bool = False,  # noqa: FBT001, FBT002
+        profile_sink: _profiler.ProfileSinkLike | None = None,
+        metrics_port: int | None = None,
+        batch_size: int = 1,
+        batch_threshold: int = 64 * 1024,
+        content_store: int | None = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -152,6 +185,127 @@ class Kaleido(choreo.Browser):
                 Uses the Chrome DevTools Protocol Network.setExtraHTTPHeaders.
                 Defaults to None.
 
+            reload_policy (ReloadPolicy | None, optional):
+                A dictionary deciding when a tab is fully reloaded after a
+                render. Otherwise, the tab is reset in place, which is much
+                faster. It can have the keys `every` (reload after this many
+                renders) and `max_heap` (reload if the tab's javascript heap is
+                larger than this many bytes). A tab is always reloaded after an
+                error. Defaults to None, which reloads after every render.
+
+            prefetch (int | None, optional):
+                The most figures that will be read from an iterable and
+                prepared at once, including those being rendered. Figures are
+                only taken from the iterable as renders finish, so memory use
+                stays bounded however many figures there are. Defaults to None,
+                which means twice the number of tabs.
+
+            transport ("devtools" | "http", optional):
+                How figures are sent to the browser. "devtools" passes them as
+                arguments to a javascript call. "http" serves them from a
+                server on localhost which the browser fetches, so a figure's
+                JSON is sent once and never escaped into another JSON string.
+                Images are POSTed back to the same server as raw bytes instead
+                of base64 inside JSON. This is much cheaper for large figures
+                and images. Defaults to "devtools".
+
+            typed_arrays (bool, optional):
+                If True, NumPy arrays and long lists of numbers in figures are
+                sent as plotly.js typed arrays (base64 encoded binary) instead
+                of JSON numbers. This makes large figures several times smaller
+                and faster to parse. Figures from plotly.py 6 or later already
+                encode their NumPy arrays this way. Defaults to False.
+
+            cache (RenderCache | None, optional):
+                A `kaleido.MemoryCache` or `kaleido.DiskCache`. Renders are
+                looked up in it by a hash of the figure, format, size, scale,
+                topojson, and the page's javascript libraries, and are only
+                sent to the browser if they aren't found. Remote scripts are
+                only identified by their url, so use urls that name a version,
+                not plotly-latest. Hits and misses are counted in the profiler.
+                Defaults to None, no cache.
+
+            resource_cache (ResourceCache | None, optional):
+                A `kaleido.ResourceCache` to answer the tabs' requests for data
+                and images, like topojson and `layout.images` urls, instead of
+                the network. Each is downloaded once for every tab and reload,
+                and it can be seeded from a directory to work offline.
+                Defaults to None.
+
+            max_tabs (int | None, optional):
+                If larger than `n`, the number of tabs grows from `n` up to
+                `max_tabs` while renders are waiting for a tab, and shrinks back
+                to `n` as tabs go unused. Defaults to None, which means a fixed
+                `n` tabs.
+
+            tab_idle_timeout (float, optional):
+                With `max_tabs`, how many seconds a tab can go unused before it
+                is closed. Defaults to 60.
+
+            executor (Executor | None, optional):
+                Where to convert plotly figures to dictionaries, serialize large
+                figures, and decode large images, so the event loop keeps
+                talking to other tabs meanwhile. Defaults to None, which means
+                the event loop's default thread pool. A process pool can be
+                used if figures can be pickled.
+
+            offload_threshold (int | None, optional):
+                The approximate size in bytes from which figures and images are
+                sent to the executor. Plotly figure objects are always
+                converted there. None keeps everything on the event loop.
+                Defaults to 1 MB.
+
+            bundle (bool | str | Path, optional):
+                Set True, or to a directory, to download remote plotly.js and
+                other scripts once and load them from a local, hash-checked
+                copy, so tabs load faster and work offline. See PageGenerator.
+                Defaults to False.
+
+            code_cache (bool, optional):
+                If True, the javascript libraries are compiled once, by the
+                first tab to load them, and every other tab is sent the
+                compiled code once, to reuse for every later load and reload.
+                This uses experimental devtools commands. Only applies to pages
+                made by a PageGenerator. Defaults to False.
+
+            mathjax_on_demand (bool, optional):
+                If True, MathJax is left out of the page, and only loaded into
+                a tab when a figure has LaTeX ($...$) in it, so tabs start and
+                reload faster. Only applies to pages made by a PageGenerator.
+                Defaults to False.
+
+            profile_sink (Callable[[dict], None] | None, optional):
+                Called with a record of every render as it finishes: its call,
+                tab, format, size, scale, path, bytes in and out, cache hit,
+                error, timestamps, and the seconds spent in each stage. Use a
+                `kaleido.JsonLinesSink` or `kaleido.ChromeTraceSink` to write
+                them to a file, and `kaleido.stage_percentiles()` to aggregate
+                them. Defaults to None.
+
+            metrics_port (int | None, optional):
+                If set, `Kaleido.metrics` are served in the Prometheus text
+                format at http://127.0.0.1:{metrics_port}/metrics while the
+                browser is open. 0 picks a free port, see
+                `Kaleido.metrics_server.url`. Defaults to None, no server.
+
+            batch_size (int, optional):
+                The most small figures a tab renders in one devtools call.
+                Figures queued while every tab is busy are grouped, so many
+                tiny charts cost far fewer round trips and reloads. PDFs and
+                the stepper are never batched. Defaults to 1, no batching.
+
+            batch_threshold (int, optional):
+                With `batch_size`, the approximate size in bytes of the largest
+                figure that is batched. Defaults to 64 KB.
+
+            content_store (int | None, optional):
+                If set, the most bytes of figure templates and large arrays
+                each tab keeps between renders. They are uploaded to a tab
+                once, and figures that repeat them only send a reference, so
+                this pays off when tabs are reset rather than reloaded, see
+                `reload_policy`. The least recently used are dropped first.
+                Defaults to None, which sends every figure whole.
+
             **kwargs (Any):
                 Additional keyword arguments passed through to the underlying
                 Choreographer.browser constructor. Notable options include
@@ -161,25 +315,73 @@ class Kaleido(choreo.Browser):
                 respectively.
 
         """
+        if max_tabs is not None and max_tabs < n:
+            raise ValueError("max_tabs cannot be less than n.")
+        self._n = n
+        self._max_tabs = max_tabs or n
+        self._tab_idle_timeout = tab_idle_timeout
+
         # State variables
         self._main_render_coroutines = set()
-        self.tabs_ready = asyncio.Queue(maxsize=0)
+        # with a LIFO queue, busy tabs are reused and the rest go idle
+        self.tabs_ready = (
+            asyncio.LifoQueue(maxsize=0)
+            if self._autoscaling
+            else asyncio.Queue(maxsize=0)
+        )
         self._total_tabs = 0  # tabs properly registered
+        self._tabs_opening = 0
+        self._tab_idle_since: dict[_KaleidoTab, float] = {}
+        self._pool_tasks: set[asyncio.Task] = set()
         self._html_tmp_dir = None
+        self._blob_server = None
         self.profiler: deque[_profiler.WriteCall] = deque(maxlen=5)
+        self._renders_waiting = 0
+        self.metrics = self._create_metrics()
+        self.metrics_server = None
 
         # Kaleido Config
-        if page_generator and (plotlyjs is not None or mathjax is not None):
+        if page_generator and (plotlyjs is not None or mathjax is not None or bundle):
             raise ValueError(
-                "page_generator cannot be set with mathjax or plotlyjs",
+                "page_generator cannot be set with mathjax, plotlyjs, or bundle",
             )
 
         page = page_generator
         self._timeout = timeout
-        self._n = n
         self._plotlyjs = plotlyjs
         self._mathjax = mathjax
         self._headers = headers
+        self._reload_policy = reload_policy
+        self._prefetch = prefetch
+        if transport not in ("devtools", "http"):
+            raise ValueError('transport must be one of: "devtools", "http".')
+        self._transport = transport
+        self._typed_arrays = typed_arrays
+        self._cache = cache
+        self._resource_cache = resource_cache
+        self._last_path_claim: asyncio.Future[None] | None = None
+        self._filenames = path_tools.FilenameIndex()
+        self._page_fingerprint = ""
+        self._offloader = _utils.Offloader(executor, offload_threshold)
+        self._bundle = bundle
+        self._use_code_cache = code_cache
+        self._code_cache: CodeCache | None = None
+        self._mathjax_on_demand = mathjax_on_demand
+        self._lazy_mathjax: tuple[str, str] | None = None
+        self._profile_sink = profile_sink
+        self._metrics_port = metrics_port
+        self._batch_threshold = batch_threshold
+        self._content_store_bytes = content_store
+        self._batcher = (
+            RenderBatcher(
+                max_size=batch_size,
+                get_tab=self._get_kaleido_tab,
+                render=self._render_batch,
+                start_task=self._start_pool_task,
+            )
+            if batch_size > 1
+            else None
+        )
 
         # Diagnostic
         _logger.debug(f"Timeout: {self._timeout}")
@@ -205,6 +407,10 @@ class Kaleido(choreo.Browser):
         if isinstance(page, (Path, str)):
             if (_p := path_tools.get_path(page)).is_file():
                 self._index = _p.as_uri()
+                if self._cache is not None:
+                    self._page_fingerprint = hashlib.sha256(
+                        _p.read_bytes(),
+                    ).hexdigest()
             else:
                 raise FileNotFoundError(f"{page!s} does not exist.")
         elif not page or hasattr(page, "generate_index"):
@@ -212,15 +418,53 @@ class Kaleido(choreo.Browser):
             index = self._html_tmp_dir.path / "index.html"
             self._index = index.as_uri()
             if not page:
-                page = PageGenerator(plotly=self._plotlyjs, mathjax=self._mathjax)
+                page = PageGenerator(
+                    plotly=self._plotlyjs,
+                    mathjax=self._mathjax,
+                    bundle=self._bundle,
+                    mathjax_on_demand=self._mathjax_on_demand,
+                )
+            if hasattr(page, "localize"):  # downloads and hashes bundled scripts
+                await _utils.to_thread(page.localize)
+            html = page.generate_index()
             with index.open("w") as f:  # is blocking but ok
-                f.write(page.generate_index())
+                f.write(html)
+            self._lazy_mathjax = getattr(page, "on_demand_mathjax", None)
+            if self._use_code_cache and hasattr(page, "script_urls"):
+                self._code_cache = CodeCache(page.script_urls())
+            if self._cache is not None:
+                self._page_fingerprint = (
+                    page.fingerprint()
+                    if hasattr(page, "fingerprint")
+                    else hashlib.sha256(html.encode()).hexdigest()
+                )
         else:
             raise TypeError(
                 "page_generator must be one of: None, a"
                 " PageGenerator, or a file path to an index.html.",
             )
+        await self._open_servers()
         await super().open()
+        if self._autoscaling:
+            self._start_pool_task(self._close_idle_tabs())
+
+    def _create_metrics(self) -> Metrics:
+        metrics = Metrics()
+        metrics.set_gauge("kaleido_tabs", lambda: self._total_tabs)
+        metrics.set_gauge(
+            "kaleido_tabs_busy",
+            lambda: self._total_tabs - self.tabs_ready.qsize(),
+        )
+        metrics.set_gauge("kaleido_renders_waiting", lambda: self._renders_waiting)
+        return metrics
+
+    async def _open_servers(self) -> None:
+        if self._transport == "http":
+            self._blob_server = BlobServer()
+            await self._blob_server.open()
+        if self._metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics, port=self._metrics_port)
+            await self.metrics_server.open()
 
     async def _create_kaleido_tab(self) -> None:
         tab = await super().create_tab(
@@ -237,12 +481,29 @@ class Kaleido(choreo.Browser):
             _logger.debug2(f"Subscribing * to tab: {tab}.")
             tab.subscribe("*", _utils.event_printer(f"tab-{i!s}: Event Dump:"))
 
-        kaleido_tabs = [_KaleidoTab(tab, headers=self._headers) for tab in tabs]
+        kaleido_tabs = [
+            _KaleidoTab(
+                tab,
+                headers=self._headers,
+                blob_server=self._blob_server,
+                offloader=self._offloader,
+                code_cache=self._code_cache,
+                mathjax=self._lazy_mathjax,
+                content_store=(
+                    ContentStore(self._content_store_bytes)
+                    if self._content_store_bytes
+                    else None
+                ),
+                resource_cache=self._resource_cache,
+            )
+            for tab in tabs
+        ]
 
         await asyncio.gather(*(tab.navigate(self._index) for tab in kaleido_tabs))
 
         for ktab in kaleido_tabs:
             self._total_tabs += 1
+            self._tab_idle_since[ktab] = time.monotonic()
             await self.tabs_ready.put(ktab)
 
     async def populate_targets(self) -> None:
@@ -270,6 +531,15 @@ class Kaleido(choreo.Browser):
         else:
             _logger.debug("No kaleido._html_tmp_dir to clean up.")
 
+        if self._blob_server:
+            await self._blob_server.close()
+
+        if self.metrics_server:
+            await self.metrics_server.close()
+
+        for task in self._pool_tasks:
+            task.cancel()
+
         await super().close()
 
         # cancellation only happens if crash/early
@@ -304,49 +574,283 @@ class Kaleido(choreo.Browser):
             raise RuntimeError(
                 "Before generating a figure, you must await `k.open()`.",
             )
-        tab = await self.tabs_ready.get()
+        self._renders_waiting += 1
+        try:
+            return await self._wait_for_tab()
+        finally:
+            self._renders_waiting -= 1
+
+    async def _wait_for_tab(self) -> _KaleidoTab:
+        if self._autoscaling and self.tabs_ready.empty():
+            getter = asyncio.ensure_future(self.tabs_ready.get())
+            try:
+                done, _ = await asyncio.wait({getter}, timeout=_GROW_AFTER)
+                if not done and self._total_tabs + self._tabs_opening < self._max_tabs:
+                    self._tabs_opening += 1  # count it now so others don't overshoot
+                    self._start_pool_task(self._grow_pool())
+                tab = await getter
+            except BaseException:
+                if getter.done() and not getter.cancelled():  # don't lose the tab
+                    self.tabs_ready.put_nowait(getter.result())
+                getter.cancel()
+                raise
+        else:
+            tab = await self.tabs_ready.get()
         _logger.info(f"Got {tab.tab.target_id[:4]}")
         return tab
 
-    async def _return_kaleido_tab(self, tab: _KaleidoTab) -> None:
-        _logger.info(f"Reloading tab {tab.tab.target_id[:4]} before return.")
-        await tab.reload()
+    async def _return_kaleido_tab(
+        self,
+        tab: _KaleidoTab,
+        *,
+        errored: bool = False,
+    ) -> None:
+        _logger.info(f"Recycling tab {tab.tab.target_id[:4]} before return.")
+        start = time.perf_counter()
+        reloaded = await tab.recycle(self._reload_policy, errored=errored)
+        self.metrics.observe(
+            "kaleido_tab_recycle_seconds",
+            time.perf_counter() - start,
+            action="reload" if reloaded else "reset",
+        )
         _logger.info(
             f"Putting tab {tab.tab.target_id[:4]} back (queue size: "
             f"{self.tabs_ready.qsize()}).",
         )
+        self._tab_idle_since[tab] = time.monotonic()
         await self.tabs_ready.put(tab)
         _logger.debug(f"{tab.tab.target_id[:4]} put back.")
 
-    # _retuner_task MUST calculate full_path before it awaits
-    async def _render_task(
+    @property
+    def _autoscaling(self) -> bool:
+        return self._max_tabs > self._n
+
+    def _start_pool_task(self, coroutine) -> None:
+        task = _utils.create_task_log_error(coroutine)
+        self._pool_tasks.add(task)
+        task.add_done_callback(self._pool_tasks.discard)
+
+    async def _grow_pool(self) -> None:
+        _logger.info(f"Opening another tab ({self._total_tabs} open).")
+        try:
+            await self._create_kaleido_tab()
+        finally:
+            self._tabs_opening -= 1
+
+    async def _close_idle_tabs(self) -> None:
+        """Close tabs unused for longer than the idle timeout, down to n tabs."""
+        while True:
+            await asyncio.sleep(self._tab_idle_timeout / 2)
+            now = time.monotonic()
+            tabs = []
+            while not self.tabs_ready.empty():
+                tabs.append(self.tabs_ready.get_nowait())
+            closing = []
+            for tab in reversed(tabs):  # least recently used first
+                idle = now - self._tab_idle_since.get(tab, now)
+                if (
+                    idle > self._tab_idle_timeout
+                    and self._total_tabs - len(closing) > self._n
+                ):
+                    closing.append(tab)
+                else:
+                    self.tabs_ready.put_nowait(tab)
+            for tab in closing:
+                _logger.info(f"Closing idle tab {tab.tab.target_id[:4]}.")
+                self._total_tabs -= 1
+                self._tab_idle_since.pop(tab, None)
+                try:
+                    await self.close_tab(tab.tab.target_id)
+                except Exception as e:  # noqa: BLE001 it's gone either way
+                    _logger.warning(f"Couldn't close idle tab: {e!s}")
+
+    def _prefetch_limit(self) -> int:
+        batch_size = self._batcher.max_size if self._batcher else 1
+        return self._prefetch or (
+            2 * max(self._max_tabs, self._total_tabs, 1) * batch_size
+        )
+
+    async def _render_tasks_as_completed(
         self,
-        fig_arg: FigureDict,
+        keyed_fig_dicts: AnyIterable[tuple[Any, FigureDict]],
         *,
-        topojson: str | None,
         _write: bool,
         profiler: _profiler.WriteCall,
         stepper: bool,
-    ) -> None | bytes:
-        spec = fig_tools.coerce_for_js(
-            fig_arg.get("fig"),
+    ) -> AsyncGenerator[tuple[Any, asyncio.Task, _profiler.RenderTaskProfile], None]:
+        """Yield finished render tasks, only pulling figures when there is room."""
+        names = self._filenames if _write else None
+        pending: dict[asyncio.Task, tuple[Any, _profiler.RenderTaskProfile]] = {}
+        with names.in_use() if names else contextlib.nullcontext():
+            try:
+                async for key, fig_arg in _utils.ensure_async_iter(keyed_fig_dicts):
+                    while len(pending) >= self._prefetch_limit():
+                        done, _ = await asyncio.wait(
+                            pending,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        for task in done:
+                            done_key, done_prof = pending.pop(task)
+                            self._emit_profile(profiler, task, done_prof)
+                            yield done_key, task, done_prof
+                    render_prof = _profiler.RenderTaskProfile()
+                    t: asyncio.Task = asyncio.create_task(
+                        self._render_task(
+                            fig_arg=fig_arg,
+                            topojson=fig_arg.get("topojson"),
+                            _write=_write,  # backwards compatibility
+                            names=names,
+                            profiler=profiler,
+                            render_prof=render_prof,
+                            stepper=stepper,
+                        ),
+                    )
+                    pending[t] = (key, render_prof)
+                    await asyncio.sleep(0)  # this forces the added task to run
+                while pending:
+                    done, _ = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for task in done:
+                        done_key, done_prof = pending.pop(task)
+                        self._emit_profile(profiler, task, done_prof)
+                        yield done_key, task, done_prof
+            finally:
+                for task in pending:
+                    if not task.done():
+                        task.cancel()
+
+    def _emit_profile(
+        self,
+        profiler: _profiler.WriteCall,
+        task: asyncio.Task,
+        render_prof: _profiler.RenderTaskProfile,
+    ) -> None:
+        if render_prof.error is None and not task.cancelled() and task.exception():
+            render_prof.error = task.exception()  # failed before reaching a tab
+        self.metrics.observe_render(render_prof)
+        if self._profile_sink is None:
+            return
+        try:
+            self._profile_sink(render_prof.to_record(profiler.name))
+        except Exception as e:  # noqa: BLE001 profiling must not break renders
+            _logger.warning(f"Profile sink failed: {e!r}")
+
+    async def _coerce_spec(self, fig_arg: FigureDict) -> fig_tools.Spec:
+        fig = fig_arg.get("fig")
+        if not isinstance(fig, dict):
+            size = None  # converting a plotly figure is slow, whatever its size
+        elif self._typed_arrays:
+            size = fig_tools.approx_size(fig)
+        else:
+            size = 0  # nothing to do but validate
+        return await self._offloader.run(
+            size,
+            fig_tools.coerce_for_js,
+            fig,
             fig_arg.get("path", None),
             fig_arg.get("opts", None),
+            typed_arrays=self._typed_arrays,
         )
 
-        if _write:
-            full_path = path_tools.determine_path(
-                fig_arg.get("path", None),
-                spec["data"],
-                spec["format"],  # should just take spec
+    async def _prepare(
+        self,
+        fig_arg: FigureDict,
+        *,
+        _write: bool,
+        names: path_tools.FilenameIndex | None = None,
+    ) -> tuple[fig_tools.Spec, Path | list[Path] | None]:
+        if not _write:
+            return await self._coerce_spec(fig_arg), None
+        # take a turn now, so generated names follow the order of the figures
+        previous = self._last_path_claim
+        claimed = self._last_path_claim = asyncio.get_running_loop().create_future()
+        try:
+            spec = await self._coerce_spec(fig_arg)
+            if previous is not None:
+                await previous
+            path = fig_arg.get("path", None)
+            if "outputs" in spec:
+                full_path: Path | list[Path] = path_tools.output_paths(
+                    path,
+                    spec,
+                    names,
+                )
+                for p in full_path:
+                    p.touch()  # claim our names
+            elif isinstance(path, (list, tuple)):  # a list of the one path
+                (full_path,) = path_tools.output_paths(path, spec, names)
+                full_path.touch()  # claim our name
+            else:
+                full_path = path_tools.determine_path(
+                    path,
+                    spec["data"],
+                    spec["format"],  # should just take spec
+                    names,
+                )
+                full_path.touch()  # claim our name
+        finally:
+            claimed.set_result(None)
+        return spec, full_path
+
+    # _render_task MUST call _prepare before it awaits anything else
+    async def _render_task(  # noqa: PLR0913
+        self,
+        fig_arg: FigureDict,
+        *,
+        topojson: str | None,
+        _write: bool,
+        names: path_tools.FilenameIndex | None = None,
+        profiler: _profiler.WriteCall,
+        render_prof: _profiler.RenderTaskProfile,
+        stepper: bool,
+    ) -> None | bytes | dict[str, bytes]:
+        render_prof.profile_log.tick("preparing")
+        spec, full_path = await self._prepare(fig_arg, _write=_write, names=names)
+        if isinstance(full_path, list) or "outputs" in spec:
+            return await self._render_outputs(
+                spec,
+                topojson=topojson,
+                full_paths=full_path if isinstance(full_path, list) else None,
+                profiler=profiler,
+                render_prof=render_prof,
+            )
+
+        cache_key = None
+        if self._cache is not None:
+            cache_key = await self._offloader.run(
+                fig_tools.approx_size(spec["data"]),
+                _render_cache.cache_key,
+                spec,
+                topojson,
+                self._page_fingerprint,
+            )
+            cached = await _utils.to_thread(self._cache.get, cache_key)
+            render_prof.cache_hit = cached is not None
+            if cached is not None:
+                render_prof.profile_log.tick("cache hit")
+                profiler.cache_hits += 1
+                render_prof.describe(spec, full_path, None)
+                profiler.renders.append(render_prof)
+                return await self._write_cached(cached, full_path, render_prof)
+            profiler.cache_misses += 1
+
+        if self._batchable(spec, stepper=stepper):
+            render_prof.describe(spec, full_path if _write else None, None)
+            profiler.renders.append(render_prof)
+            return await self._render_batched(
+                spec,
+                topojson=topojson,
+                full_path=full_path if _write else None,
+                render_prof=render_prof,
+                cache_key=cache_key,
             )
-            full_path.touch()  # claim our name
-        else:
-            full_path = None
 
+        render_prof.profile_log.tick("waiting for tab")
         tab = await self._get_kaleido_tab()
 
-        render_prof = _profiler.RenderTaskProfile(
+        render_prof.describe(
             spec,
             full_path if _write else None,
             tab.tab.target_id,
@@ -361,27 +865,193 @@ class Kaleido(choreo.Browser):
                     topojson=topojson,
                     render_prof=render_prof,
                     stepper=stepper,
+                    full_path=full_path,
                 ),
                 self._timeout,
             )
-            if _write and full_path:
+            # img_bytes is None if it was already streamed to full_path
+            if img_bytes is not None and _write and full_path:
                 render_prof.profile_log.tick("starting file write")
                 await _utils.to_thread(full_path.write_bytes, img_bytes)
                 render_prof.profile_log.tick("file write done")
-                return None
-            else:
-                return img_bytes
         except BaseException as e:
             render_prof.profile_log.tick("errored out")
             if _write and full_path:
                 full_path.unlink()  # failure, no write
             render_prof.error = e
             raise
+        else:
+            if cache_key is not None:
+                await self._cache_put(cache_key, img_bytes, full_path)
+            return None if full_path else img_bytes
         finally:
             render_prof.profile_log.tick("returning tab")
-            await self._return_kaleido_tab(tab)
+            await self._return_kaleido_tab(
+                tab,
+                errored=render_prof.error is not None,
+            )
             render_prof.profile_log.tick("tab returned")
 
+    async def _render_outputs(
+        self,
+        spec: fig_tools.Spec,
+        *,
+        topojson: str | None,
+        full_paths: list[Path] | None,
+        profiler: _profiler.WriteCall,
+        render_prof: _profiler.RenderTaskProfile,
+    ) -> None | dict[str, bytes]:
+        """
+        Render a spec with several outputs from one upload of the figure.
+
+        These skip the render cache and batching, and ignore the stepper.
+        """
+        render_prof.profile_log.tick("waiting for tab")
+        tab = await self._get_kaleido_tab()
+        render_prof.describe(
+            spec,
+            full_paths[0] if full_paths else None,
+            tab.tab.target_id,
+        )
+        render_prof.profile_log.tick("acquired tab")
+        profiler.renders.append(render_prof)
+
+        try:
+            results = await asyncio.wait_for(
+                tab._calc_fig_outputs(  # noqa: SLF001
+                    spec,
+                    topojson=topojson,
+                    render_prof=render_prof,
+                ),
+                self._timeout,
+            )
+            if full_paths:
+                render_prof.profile_log.tick("starting file write")
+                for full_path, img_bytes in zip(full_paths, results):
+                    await _utils.to_thread(full_path.write_bytes, img_bytes)
+                render_prof.profile_log.tick("file write done")
+        except BaseException as e:
+            render_prof.profile_log.tick("errored out")
+            for full_path in full_paths or ():
+                full_path.unlink(missing_ok=True)  # failure, no write
+            render_prof.error = e
+            raise
+        finally:
+            render_prof.profile_log.tick("returning tab")
+            await self._return_kaleido_tab(
+                tab,
+                errored=render_prof.error is not None,
+            )
+            render_prof.profile_log.tick("tab returned")
+        if full_paths:
+            return None
+        outputs = fig_tools.spec_outputs(spec)
+        return {
+            f"{o['label']}.{o['format']}" if "label" in o else o["format"]: img
+            for o, img in zip(outputs, results)
+        }
+
+    def _batchable(self, spec: fig_tools.Spec, *, stepper: bool) -> bool:
+        return (
+            self._batcher is not None
+            and not stepper
+            and spec["format"] != "pdf"
+            and fig_tools.approx_size(spec["data"]) <= self._batch_threshold
+        )
+
+    async def _render_batched(
+        self,
+        spec: fig_tools.Spec,
+        *,
+        topojson: str | None,
+        full_path: Path | None,
+        render_prof: _profiler.RenderTaskProfile,
+        cache_key: str | None,
+    ) -> None | bytes:
+        if self._batcher is None:
+            raise RuntimeError("Batching is off, see Kaleido(batch_size=...).")
+        render_prof.profile_log.tick("waiting for tab")
+        try:
+            img_bytes = await self._batcher.submit(spec, topojson, render_prof)
+            if full_path:
+                render_prof.profile_log.tick("starting file write")
+                await _utils.to_thread(full_path.write_bytes, img_bytes)
+                render_prof.profile_log.tick("file write done")
+        except BaseException as e:
+            render_prof.profile_log.tick("errored out")
+            if full_path:
+                full_path.unlink()  # failure, no write
+            render_prof.error = e
+            raise
+        if cache_key is not None:
+            await self._cache_put(cache_key, img_bytes, None)
+        return None if full_path else img_bytes
+
+    async def _render_batch(self, tab: _KaleidoTab, batch: list[BatchItem]) -> None:
+        if not batch:  # every render was cancelled while we waited for a tab
+            await self.tabs_ready.put(tab)
+            return
+        for item in batch:
+            item.render_prof.info["tab"] = tab.tab.target_id
+            item.render_prof.profile_log.tick("acquired tab")
+        try:
+            results: list[bytes | Exception] = await asyncio.wait_for(
+                tab._calc_fig_batch(  # noqa: SLF001
+                    [item.spec for item in batch],
+                    topojson=batch[0].topojson,
+                    render_profs=[item.render_prof for item in batch],
+                ),
+                None if self._timeout is None else self._timeout * len(batch),
+            )
+        except Exception as e:  # noqa: BLE001 every figure in the batch failed
+            results = [e] * len(batch)
+        except BaseException:
+            for item in batch:
+                item.future.cancel()
+            await self._return_kaleido_tab(tab, errored=True)
+            raise
+        errored = False
+        for item, res in zip(batch, results):
+            if isinstance(res, Exception):
+                errored = True
+                if not item.future.done():
+                    item.future.set_exception(res)
+            elif not item.future.done():
+                item.future.set_result(res)
+        await self._return_kaleido_tab(tab, errored=errored)
+
+    async def _write_cached(
+        self,
+        img_bytes: bytes,
+        full_path: Path | None,
+        render_prof: _profiler.RenderTaskProfile,
+    ) -> None | bytes:
+        if not full_path:
+            return img_bytes
+        try:
+            await _utils.to_thread(full_path.write_bytes, img_bytes)
+        except BaseException as e:
+            full_path.unlink()
+            render_prof.error = e
+            raise
+        return None
+
+    async def _cache_put(
+        self,
+        cache_key: str,
+        img_bytes: bytes | None,
+        full_path: Path | None,
+    ) -> None:
+        if self._cache is None:
+            return
+        try:
+            if img_bytes is None and full_path:
+                img_bytes = await _utils.to_thread(full_path.read_bytes)
+            if img_bytes is not None:
+                await _utils.to_thread(self._cache.put, cache_key, img_bytes)
+        except OSError as e:
+            _logger.warning(f"Couldn't store render in cache: {e!s}")
+
     ### API ###
     @overload
     async def write_fig_from_object(
@@ -430,7 +1100,7 @@ class Kaleido(choreo.Browser):
         cancel_on_error=False,
         _write: bool = True,  # backwards compatibility!
         stepper: bool = False,
-    ) -> None | bytes | tuple[Exception]:
+    ) -> None | bytes | dict[str, bytes] | tuple[Exception]:
         """
         Create one or more plotly figures from a specification dictionary.
 
@@ -443,6 +1113,8 @@ class Kaleido(choreo.Browser):
                 figure dictionaries *must* have a "fig" key with a plotly figure or
                 its dict representation. It can have the following keys: path, opts,
                 and topojson. This is roughly equal to the `write_fig` arguments.
+                With several formats or variants, path may also be a list with a
+                path for each, variants first, then formats.
 
             cancel_on_error (boolean, default: False):
                 If False, any errors during rendering will be returned from the function
@@ -474,34 +1146,33 @@ class Kaleido(choreo.Browser):
         profiler = _profiler.WriteCall(name)
         self.profiler.append(profiler)
 
-        tasks: set[asyncio.Task] = set()
+        errors: list[Exception] = []
+        render_tasks = self._render_tasks_as_completed(
+            _utils.aenumerate(fig_dicts),
+            _write=_write,
+            profiler=profiler,
+            stepper=stepper,
+        )
 
         try:
-            async for fig_arg in _utils.ensure_async_iter(fig_dicts):
-                t: asyncio.Task = asyncio.create_task(
-                    self._render_task(
-                        fig_arg=fig_arg,
-                        topojson=fig_arg.get("topojson"),
-                        _write=_write,  # backwards compatibility
-                        profiler=profiler,
-                        stepper=stepper,
-                    ),
-                )
-                tasks.add(t)
-                await asyncio.sleep(0)  # this forces the added task to run
-
-            res = await asyncio.gather(*tasks, return_exceptions=not cancel_on_error)
-            if not _write:
-                return cast("bytes", res[0])
-            elif cancel_on_error:
+            async for _, task, _ in render_tasks:
+                try:
+                    res = task.result()
+                except Exception as e:
+                    if cancel_on_error:
+                        raise
+                    _logger.info(f"Render failed, continuing: {e!s}")
+                    errors.append(e)
+                    continue
+                if not _write:
+                    return cast("bytes", res)
+            if cancel_on_error:
                 return None
             else:
-                return cast("tuple[Exception]", tuple(r for r in res if r))
+                return cast("tuple[Exception]", tuple(errors))
 
         finally:
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
+            await render_tasks.aclose()
             if main_task:
                 self._main_render_coroutines.remove(main_task)
 
@@ -539,7 +1210,13 @@ class Kaleido(choreo.Browser):
                 - scale: a number to multiply the image by.
                 - width: a number to set the pixel width.
                 - height: a number to set the pixel height.
-                - format: One of jpg, png, svg, pdf, json, or webp.
+                - format: One of jpg, png, svg, pdf, json, or webp, or a list of
+                  them to write a file of each format from one plot. Their
+                  names differ only by extension.
+                - variants: a list of dictionaries of width, height and scale,
+                  to write a file of each size from one upload of the figure.
+                  Anything left out is taken from the options above, and each
+                  name gets "-{width}x{height}@{scale}" before its extension.
 
             topojson:
                 An optional json-format map specification when using geomaps.
@@ -597,7 +1274,9 @@ class Kaleido(choreo.Browser):
         The arguments are the same as write_fig, but path does nothing.
 
         Returns:
-            The calculated bytes.
+            The calculated bytes. If `opts["format"]` is a list, a dictionary
+            of the bytes of each format instead. With `opts["variants"]`, the
+            keys are "{width}x{height}@{scale}.{format}".
 
         """
         if path is not None:
@@ -621,3 +1300,70 @@ class Kaleido(choreo.Browser):
             _write=False,
             stepper=stepper,
         )
+
+    async def calc_figs(
+        self,
+        fig_dicts: FigureDict | AnyIterable[FigureDict] | Mapping[Any, FigureDict],
+        *,
+        stepper: bool = False,
+    ) -> AsyncGenerator[
+        tuple[Any, bytes | Exception, _profiler.RenderTaskProfile],
+        None,
+    ]:
+        """
+        Render many figures, yielding each one's bytes as soon as it is ready.
+
+        Renders are yielded in the order they finish, not the order they were
+        given. Figures are pulled from `fig_dicts` as renders finish, like
+        `write_fig_from_object`.
+
+        Args:
+            fig_dicts:
+                Any single figure dict, an iterable of figure dicts, or a
+                mapping of keys to figure dicts. See `write_fig_from_object`.
+                Any "path" key is ignored.
+
+            stepper (boolean, default False):
+                This is a debugging argument and is not part of the stable API.
+                If set to true, kaleido will wait for a key press to render each
+                image, in case one would want to inspect the browser environment.
+
+        Yields:
+            A tuple of the figure's key (or its index if `fig_dicts` wasn't a
+            mapping), its bytes or the exception that stopped it rendering,
+            and its render profile.
+
+        """
+        if _is_figuredict(fig_dicts):
+            fig_dicts = [fig_dicts]
+
+        keyed_fig_dicts: AnyIterable[tuple[Any, FigureDict]] = (
+            fig_dicts.items()
+            if isinstance(fig_dicts, Mapping)
+            else _utils.aenumerate(fig_dicts)
+        )
+
+        name = "No Name"
+        if main_task := asyncio.current_task():
+            name = main_task.get_name()
+
+        profiler = _profiler.WriteCall(name)
+        self.profiler.append(profiler)
+
+        render_tasks = self._render_tasks_as_completed(
+            keyed_fig_dicts,
+            _write=False,
+            profiler=profiler,
+            stepper=stepper,
+        )
+        try:
+            async for key, task, render_prof in render_tasks:
+                try:
+                    res = task.result()
+                except Exception as e:  # noqa: BLE001 we hand it to the caller
+                    render_prof.error = render_prof.error or e
+                    yield key, e, render_prof
+                else:
+                    yield key, res, render_prof
+        finally:
+            await render_tasks.aclose()
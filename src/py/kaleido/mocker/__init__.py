@@ -4,18 +4,24 @@ from __future__ import annotations
 
 import asyncio
 import sys
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
 from random import sample
 from typing import TYPE_CHECKING
 
 import logistro
+import orjson
 
 import kaleido
 
-from . import _utils
+from . import _benchmark, _utils
 from ._args import args
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from typing import Any
+
+    from kaleido._profiler import ProfileRecord
 
 _logger = logistro.getLogger(__name__)
 
@@ -32,6 +38,15 @@ def random_config(paths: list[Path]) -> list[Path]:
     return sample(paths, args.random)
 
 
+async def _render(k: kaleido.Kaleido, paths: list[Path]):
+    # pyright doesn't understand bool = Literal[True] | Literal[False]
+    return await k.write_fig_from_object(  # type: ignore[reportCallIssue]
+        _utils.load_figures_from_paths(paths),
+        stepper=args.stepper,
+        cancel_on_error=args.fail_fast,
+    )
+
+
 # Function to process the images
 async def _main():
     paths = _utils.get_jsons_in_paths(args.input)
@@ -44,21 +59,108 @@ async def _main():
         headless=args.headless,
         timeout=args.timeout,
     ) as k:
-        # pyright doesn't understand bool = Literal[True] | Literal[False]
-        return await k.write_fig_from_object(  # type: ignore[reportCallIssue]
-            _utils.load_figures_from_paths(paths),
-            stepper=args.stepper,
-            cancel_on_error=args.fail_fast,
-        ), k.profiler
+        return await _render(k, paths), k.profiler
+
+
+def _kaleido_version() -> str | None:
+    try:
+        return version("kaleido")
+    except PackageNotFoundError:
+        return None
+
+
+async def _benchmark_main() -> tuple[dict[str, Any], tuple[Exception, ...]]:
+    paths = _utils.get_jsons_in_paths(args.input)
+    if args.random:
+        paths = random_config(paths)
+
+    records: list[ProfileRecord] = []
+    runs = []
+    errors: list[Exception] = []
+    async with kaleido.Kaleido(
+        page_generator=kaleido.PageGenerator(force_cdn=True),
+        n=args.n,
+        headless=args.headless,
+        timeout=args.timeout,
+        profile_sink=records.append,
+    ) as k:
+        browser = getattr(k, "subprocess", None)
+        sampler = _benchmark.PeakSampler(browser.pid if browser else None)
+        for i in range(args.warmup + args.iterations):
+            measured = i >= args.warmup
+            if measured and sampler.peak is None:
+                sampler.start()
+            start = len(records)
+            began = time.perf_counter()
+            run_errors = await _render(k, paths) or ()
+            seconds = time.perf_counter() - began
+            errors += run_errors
+            _logger.info(f"Iteration {i + 1} took {seconds:.2f}s.")
+            if not measured:
+                del records[start:]
+                continue
+            runs.append(
+                {
+                    "seconds": seconds,
+                    "figures": len(records) - start,
+                    "errors": len(run_errors),
+                },
+            )
+        await sampler.stop()
+
+    results = {
+        "kaleido": _kaleido_version(),
+        "n": args.n,
+        "mock_files": len(paths),
+        "formats": list(args.format),
+        "warmup": args.warmup,
+        "iterations": args.iterations,
+        **_benchmark.summarize(runs, records, args.outliers),
+        "peak_rss": {
+            "python": _benchmark.python_peak_rss(),
+            "chrome": sampler.peak,
+        },
+    }
+    return results, tuple(errors)
+
+
+def _compare() -> int:
+    base, new = (_benchmark.load_results(p) for p in args.compare)
+    regressions = _benchmark.compare(base, new, args.threshold)
+    print(
+        f"figures/s: {base['figures_per_second']:.2f} -> "
+        f"{new['figures_per_second']:.2f}",
+    )
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+def _report_benchmark(results: dict[str, Any]) -> None:
+    output = orjson.dumps(results, option=orjson.OPT_INDENT_2)
+    if args.results:
+        Path(args.results).write_bytes(output)
+        print(f"Results written to {args.results}", file=sys.stderr)
+    else:
+        print(output.decode())
 
 
 def main():
     """[project.scripts] expects to call a function, not a module."""
-    errors, _profiler = asyncio.run(_main())
-    # do profile here
+    if args.compare:
+        sys.exit(_compare())
+    if args.benchmark:
+        if args.iterations < 1:
+            raise ValueError("--iterations must be at least 1.")
+        results, errors = asyncio.run(_benchmark_main())
+        _report_benchmark(results)
+    else:
+        errors, _profiler = asyncio.run(_main())
     if errors:
         # better to get this from the profile
-        print(f"Number of errors: {len(errors)}")
+        print(f"Number of errors: {len(errors)}", file=sys.stderr)
         for i, e in enumerate(errors):
             print(str(e), file=sys.stderr)
             if i > 10:  # noqa: PLR2004
@@ -14,7 +14,8 @@ description = "\n".join(  # noqa: FLY002
     [
         "kaleido_mocker loads & renders Plotly figures (from json or pickle).",
         "",
-        "Furthermore, it outputs (to stdout) a JSON with performance information.",
+        "With --benchmark, it outputs (to stdout) a JSON with performance",
+        "information, which --compare can check for regressions.",
         "",
         "",
         (
@@ -86,6 +87,57 @@ basic_config.add_argument(
     help="Will select N random jsons- or if 0 (default), all.",
 )
 
+# Benchmark Arguments
+
+benchmark_options = parser.add_argument_group("Benchmark Options")
+
+benchmark_options.add_argument(
+    "--benchmark",
+    action="store_true",
+    default=False,
+    help="Render the mocks --warmup + --iterations times and output figures/sec, "
+    "stage latency percentiles, peak memory, and the slowest mocks as JSON.",
+)
+benchmark_options.add_argument(
+    "--warmup",
+    type=int,
+    default=1,
+    help="Unmeasured iterations before measuring (default 1)",
+)
+benchmark_options.add_argument(
+    "--iterations",
+    type=int,
+    default=3,
+    help="Measured iterations (default 3)",
+)
+benchmark_options.add_argument(
+    "--outliers",
+    type=int,
+    default=10,
+    help="How many of the slowest mocks to report (default 10)",
+)
+benchmark_options.add_argument(
+    "--results",
+    type=str,
+    default=None,
+    help="Write benchmark results to this file instead of stdout",
+)
+benchmark_options.add_argument(
+    "--compare",
+    type=str,
+    nargs=2,
+    default=None,
+    metavar=("BASE", "NEW"),
+    help="Compare two benchmark result files instead of rendering, and "
+    "exit with 1 if NEW regressed",
+)
+benchmark_options.add_argument(
+    "--threshold",
+    type=float,
+    default=0.1,
+    help="How much slower is a regression, as a fraction (default 0.1)",
+)
+
 # Image Setting Arguments
 
 image_parameters = parser.add_argument_group("Image Parameterize")
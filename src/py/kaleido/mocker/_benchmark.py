@@ -0,0 +1,199 @@
+"""Throughput results for the mocker, and comparisons between them."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import logistro
+import orjson
+
+from kaleido import _utils
+from kaleido._profiler import stage_percentiles
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from kaleido._profiler import ProfileRecord
+
+_logger = logistro.getLogger(__name__)
+
+_SAMPLE_INTERVAL = 0.5  # seconds between measurements of chrome's memory
+_NOISE = 0.005  # seconds, slowdowns smaller than this are never regressions
+_RESULT_KEYS = ("figures_per_second", "stages", "mocks")  # what compare() reads
+
+
+def python_peak_rss() -> int | None:
+    """Return the peak resident memory of this process in bytes, if known."""
+    try:
+        import resource  # noqa: PLC0415 not on windows
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # linux gives KiB
+
+
+def _process_tree_rss(root: int) -> int | None:
+    """Return the resident memory of a process and its descendants (Linux)."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    for stat in proc.glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue  # gone, or not ours to read
+        pid = int(stat.parent.name)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21]) * page_size
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack += children.get(pid, [])
+    return total
+
+
+class PeakSampler:
+    """Samples the memory of a browser's processes, keeping the peak."""
+
+    def __init__(self, pid: int | None) -> None:
+        """
+        Create a sampler.
+
+        Args:
+            pid: the browser's process id.
+
+        """
+        self.pid = pid
+        self.peak: int | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _sample(self) -> None:
+        while self.pid is not None:
+            rss = await _utils.to_thread(_process_tree_rss, self.pid)
+            if rss is None:
+                return
+            self.peak = max(self.peak or 0, rss)
+            await asyncio.sleep(_SAMPLE_INTERVAL)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.create_task(self._sample())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def summarize(
+    runs: list[dict[str, Any]],
+    records: list[ProfileRecord],
+    outliers: int = 10,
+) -> dict[str, Any]:
+    """
+    Summarize the measured iterations of a benchmark.
+
+    Args:
+        runs: for each iteration, its "seconds", "figures", and "errors".
+        records: the profile records of every render in those iterations.
+        outliers: how many of the slowest mocks to list.
+
+    Returns:
+        A dictionary of JSON types, see `compare()`.
+
+    """
+    for run in runs:
+        run["figures_per_second"] = run["figures"] / run["seconds"]
+    by_mock: dict[str, list[float]] = {}
+    for record in records:
+        if record["path"] and record["total"] is not None and not record["error"]:
+            by_mock.setdefault(Path(record["path"]).name, []).append(record["total"])
+    mocks = {name: statistics.median(totals) for name, totals in by_mock.items()}
+    typical = statistics.median(mocks.values()) if mocks else 0
+    slowest = sorted(mocks.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "figures_per_second": statistics.median(
+            run["figures_per_second"] for run in runs
+        ),
+        "runs": runs,
+        "stages": stage_percentiles(records),
+        "outliers": [
+            {
+                "mock": name,
+                "seconds": seconds,
+                "times_median": seconds / typical if typical else None,
+            }
+            for name, seconds in slowest[:outliers]
+        ],
+        "mocks": mocks,
+    }
+
+
+def load_results(path: str | Path) -> dict[str, Any]:
+    """
+    Read a results file written by --benchmark, for `compare()`.
+
+    Raises:
+        ValueError: if the file isn't benchmark results.
+
+    """
+    try:
+        results = orjson.loads(Path(path).read_bytes())
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"{path} is not JSON: {e}") from e
+    if not isinstance(results, dict):
+        raise ValueError(f"{path} is not a benchmark results file.")  # noqa: TRY004
+    if missing := [key for key in _RESULT_KEYS if key not in results]:
+        raise ValueError(f"{path} is not a benchmark results file, missing {missing}")
+    return results
+
+
+def _slower(base: float, new: float, threshold: float) -> bool:
+    return new > base + max(base * threshold, _NOISE)  # new - base rounds up
+
+
+def compare(
+    base: dict[str, Any],
+    new: dict[str, Any],
+    threshold: float = 0.1,
+) -> list[str]:
+    """
+    Find regressions between two benchmark results.
+
+    Args:
+        base: the results to compare against.
+        new: the results to check.
+        threshold: the fraction by which something must get slower to count.
+
+    Returns:
+        A line describing each regression. Empty if there are none.
+
+    """
+    regressions = []
+    base_fps, new_fps = base["figures_per_second"], new["figures_per_second"]
+    if new_fps < base_fps * (1 - threshold):
+        regressions.append(
+            f"throughput: {base_fps:.2f} -> {new_fps:.2f} figures/s",
+        )
+    for stage, stats in new["stages"].items():
+        for p in ("p50", "p95"):
+            before = base["stages"].get(stage, {}).get(p)
+            if before is not None and _slower(before, stats[p], threshold):
+                regressions.append(
+                    f"stage {stage!r} {p}: {before:.4f}s -> {stats[p]:.4f}s",
+                )
+    for mock, seconds in new["mocks"].items():
+        before = base["mocks"].get(mock)
+        if before is not None and _slower(before, seconds, threshold):
+            regressions.append(f"mock {mock}: {before:.4f}s -> {seconds:.4f}s")
+    return regressions
@@ -0,0 +1,117 @@
+import importlib
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import orjson
+import pytest
+
+
+@pytest.fixture(scope="module")
+def benchmark():
+    # the mocker parses its arguments on import
+    with patch.object(sys, "argv", ["kaleido_mocker"]):
+        return importlib.import_module("kaleido.mocker._benchmark")
+
+
+def _record(path, total, *, error=None):
+    return {"path": path, "total": total, "error": error, "stages": {"x": total}}
+
+
+def _results(fps=10.0, stages=None, mocks=None):
+    return {
+        "figures_per_second": fps,
+        "stages": stages or {},
+        "mocks": mocks or {},
+    }
+
+
+def test_summarize(benchmark):
+    runs = [
+        {"seconds": 2.0, "figures": 4, "errors": 0},
+        {"seconds": 1.0, "figures": 4, "errors": 1},
+        {"seconds": 4.0, "figures": 4, "errors": 0},
+    ]
+    records = [
+        _record("mocks/a.json", 1.0),
+        _record("mocks/a.json", 3.0),
+        _record("mocks/b.json", 0.5),
+        _record("mocks/c.json", 0.2),
+        _record("mocks/c.json", 9.0, error="boom"),  # errors are left out
+        _record(None, 5.0),
+    ]
+
+    summary = benchmark.summarize(runs, records, outliers=2)
+
+    assert [run["figures_per_second"] for run in runs] == [2, 4, 1]
+    assert summary["figures_per_second"] == 2  # the median run  # noqa: PLR2004
+    assert summary["mocks"] == {"a.json": 2.0, "b.json": 0.5, "c.json": 0.2}
+    assert summary["outliers"] == [
+        {"mock": "a.json", "seconds": 2.0, "times_median": 4.0},
+        {"mock": "b.json", "seconds": 0.5, "times_median": 1.0},
+    ]
+    assert summary["stages"]["x"]["count"] == 6  # noqa: PLR2004
+
+
+def test_summarize_without_records(benchmark):
+    summary = benchmark.summarize([{"seconds": 1.0, "figures": 0, "errors": 2}], [])
+    assert summary["figures_per_second"] == 0
+    assert (summary["stages"], summary["outliers"], summary["mocks"]) == ({}, [], {})
+
+
+@pytest.mark.parametrize(
+    ("new_fps", "regressed"),
+    [(9.0, False), (8.99, True), (20.0, False)],
+)
+def test_compare_throughput(benchmark, new_fps, regressed):
+    regressions = benchmark.compare(_results(10.0), _results(new_fps), 0.1)
+    assert bool(regressions) is regressed
+
+
+@pytest.mark.parametrize(
+    ("base", "new", "regressed"),
+    [
+        (1.0, 1.1, False),  # exactly the threshold
+        (1.0, 1.11, True),
+        (0.01, 0.0149, False),  # 49% slower, but under the noise floor
+        (0.01, 0.0151, True),
+    ],
+)
+def test_compare_times(benchmark, base, new, regressed):
+    regressions = benchmark.compare(
+        _results(stages={"s": {"p50": base, "p95": base}}, mocks={"m": base}),
+        _results(stages={"s": {"p50": new, "p95": new}}, mocks={"m": new}),
+        0.1,
+    )
+    assert len(regressions) == (3 if regressed else 0)
+
+
+def test_compare_ignores_new_stages_and_mocks(benchmark):
+    new = _results(stages={"s": {"p50": 9, "p95": 9}}, mocks={"m": 9})
+    assert benchmark.compare(_results(), new) == []
+
+
+def test_load_results(benchmark, tmp_path):
+    good = tmp_path / "good.json"
+    good.write_bytes(orjson.dumps({**_results(), "runs": []}))
+    assert benchmark.load_results(good)["figures_per_second"] == 10  # noqa: PLR2004
+
+    for name, content in (
+        ("broken.json", b"{"),
+        ("list.json", b"[]"),
+        ("partial.json", orjson.dumps({"figures_per_second": 1})),
+    ):
+        (tmp_path / name).write_bytes(content)
+        with pytest.raises(ValueError, match=name):
+            benchmark.load_results(tmp_path / name)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_process_tree_rss(benchmark):
+    alone = benchmark._process_tree_rss(os.getpid())  # noqa: SLF001
+    child = [sys.executable, "-c", "input()"]
+    with subprocess.Popen(child, stdin=subprocess.PIPE):  # noqa: S603
+        with_child = benchmark._process_tree_rss(os.getpid())  # noqa: SLF001
+    assert 0 < alone < with_child
+    assert benchmark._process_tree_rss(2**22 + 1) == 0  # noqa: SLF001 no such pid
@@ -0,0 +1,80 @@
+import asyncio
+import urllib.error
+import urllib.request
+
+import pytest
+
+from kaleido._blob_server import BlobServer
+
+
+@pytest.fixture
+async def blob_server():
+    server = BlobServer()
+    await server.open()
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+async def _request(url, method="GET", data=None):
+    def run():
+        request = urllib.request.Request(url, data, method=method)  # noqa: S310
+        try:
+            with urllib.request.urlopen(request) as response:  # noqa: S310
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), e.read()
+
+    return await asyncio.get_running_loop().run_in_executor(None, run)
+
+
+async def test_blob_served_once(blob_server):
+    data = b'{"data": [], "layout": {"title": {"text": "\\"quoted\\""}}}'
+    url = blob_server.put(data)
+    assert url.startswith(blob_server.base_url)
+
+    status, headers, body = await _request(url)
+    assert status == 200  # noqa: PLR2004
+    assert body == data
+    assert headers["Access-Control-Allow-Origin"] == "*"
+
+    status, _, _ = await _request(url)
+    assert status == 404  # noqa: PLR2004
+
+
+async def test_blob_discard(blob_server):
+    url = blob_server.put(b"{}")
+    blob_server.discard(url)
+    status, _, _ = await _request(url)
+    assert status == 404  # noqa: PLR2004
+
+
+async def test_blob_preflight(blob_server):
+    status, headers, _ = await _request(blob_server.base_url + "/blob/x", "OPTIONS")
+    assert status == 204  # noqa: PLR2004
+    assert headers["Access-Control-Allow-Private-Network"] == "true"
+
+
+async def test_sink_receives_post(blob_server):
+    image = bytes(range(256)) * 100
+    url, future = blob_server.expect()
+    status, _, _ = await _request(url, "POST", image)
+    assert status == 204  # noqa: PLR2004
+    assert await future == image
+
+    status, _, _ = await _request(url, "POST", image)
+    assert status == 404  # noqa: PLR2004
+
+
+async def test_sink_discard(blob_server):
+    url, future = blob_server.expect()
+    blob_server.discard(url)
+    assert future.cancelled()
+    status, _, _ = await _request(url, "POST", b"x")
+    assert status == 404  # noqa: PLR2004
+
+
+async def test_blob_server_not_open():
+    with pytest.raises(RuntimeError, match="not open"):
+        BlobServer().put(b"{}")
@@ -0,0 +1,62 @@
+import orjson
+
+from kaleido._kaleido_tab import ContentStore
+
+
+def _spec(**figure):
+    return {"format": "png", "width": 700, "height": 500, "scale": 1, "data": figure}
+
+
+def test_split_extracts_template_and_large_arrays():
+    store = ContentStore(max_bytes=10_000, min_size=100)
+    big = list(range(100))
+    template = {"layout": {"font": {"family": "x" * 200}}}
+    spec = _spec(
+        data=[{"x": big, "y": [1, 2, 3], "marker": {"color": big}}],
+        layout={"template": template, "title": "t"},
+    )
+
+    split, parts = store.split(spec, orjson.dumps)
+
+    assert spec["data"]["data"][0]["x"] is big  # the spec passed in is unchanged
+    assert split["data"]["data"][0] == {
+        "x": None,
+        "y": [1, 2, 3],
+        "marker": {"color": None},
+    }
+    assert split["data"]["layout"] == {"template": None, "title": "t"}
+    paths = [path for path, _ in split["refs"]]
+    assert paths == [
+        ["data", "data", 0, "x"],
+        ["data", "data", 0, "marker", "color"],
+        ["data", "layout", "template"],
+    ]
+    assert len(parts) == 2  # noqa: PLR2004 x and marker.color are the same array
+    assert orjson.loads(parts[split["refs"][2][1]]) == template
+
+
+def test_split_leaves_small_figures():
+    store = ContentStore(max_bytes=10_000, min_size=100)
+    spec = _spec(data=[{"x": [1, 2, 3]}])
+    assert store.split(spec, orjson.dumps) == (spec, {})
+
+
+def test_plan_lru_by_bytes():
+    store = ContentStore(max_bytes=10)
+    a, b, c = {"a": b"1234"}, {"b": b"1234"}, {"c": b"1234"}
+
+    assert store.plan(a) == (a, [])
+    assert store.plan(b) == (b, [])
+    assert store.plan(a) == ({}, [])  # now b is least recently used
+    assert store.plan(c) == (c, ["b"])
+    assert "a" in store
+    assert "b" not in store
+    assert store.bytes == 8  # noqa: PLR2004
+
+    # parts a render needs are kept, even over the budget
+    assert store.plan({**a, **b, **c}) == (b, [])
+    assert store.bytes == 12  # noqa: PLR2004
+
+    store.clear()
+    assert "a" not in store
+    assert store.bytes == 0
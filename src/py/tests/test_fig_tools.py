@@ -1,3 +1,7 @@
+import base64
+
+import numpy as np
+import orjson
 import pytest
 
 from kaleido._utils import fig_tools
@@ -71,3 +75,148 @@ def test_coerce_for_js_dimensions(
         f"Height mismatch: got {spec['height']}, expected {expected_height}, "
         f"source: {height_source}, value: {height_value}"
     )
+
+
+def _decode(typed):
+    dtype = np.dtype(typed["dtype"]).newbyteorder("<")
+    array = np.frombuffer(base64.b64decode(typed["bdata"]), dtype=dtype)
+    if "shape" in typed:
+        array = array.reshape([int(d) for d in typed["shape"].split(",")])
+    return array
+
+
+def test_encode_typed_arrays_numpy():
+    x = np.linspace(0, 1, 50)
+    z = np.arange(12, dtype="int64").reshape(3, 4)
+    fig = {"data": [{"x": x, "z": z}], "layout": {"xaxis": {"range": x[:2]}}}
+    encoded = fig_tools.encode_typed_arrays(fig)
+
+    trace = encoded["data"][0]
+    assert trace["x"]["dtype"] == "f8"
+    np.testing.assert_array_equal(_decode(trace["x"]), x)
+    assert trace["z"]["dtype"] == "i1"  # narrowed from int64
+    assert trace["z"]["shape"] == "3,4"
+    np.testing.assert_array_equal(_decode(trace["z"]), z)
+    # not a data array, left alone
+    assert encoded["layout"]["xaxis"]["range"] is fig["layout"]["xaxis"]["range"]
+    # input is not modified
+    assert fig["data"][0]["x"] is x
+
+
+def test_encode_typed_arrays_lists():
+    n = fig_tools.TYPED_ARRAY_MIN_LENGTH
+    ints = list(range(n))
+    floats = [i / 3 for i in range(n)]
+    trace = {
+        "x": ints,
+        "y": floats,
+        "short": [1.5, 2.5],
+        "big": [2**40] * n,
+        "mixed": [*floats[:-1], None],
+        "bools": [True] * n,
+        "text": ["a"] * n,
+    }
+    encoded = fig_tools.encode_typed_arrays({"data": [trace]})["data"][0]
+
+    assert encoded["x"]["dtype"] == "i4"
+    assert _decode(encoded["x"]).tolist() == ints
+    assert encoded["y"]["dtype"] == "f8"
+    assert _decode(encoded["y"]).tolist() == floats
+    assert encoded["big"]["dtype"] == "f8"
+    assert _decode(encoded["big"]).tolist() == [2**40] * n
+    for key in ("short", "mixed", "bools", "text"):
+        assert encoded[key] is trace[key]
+
+
+def test_coerce_for_js_typed_arrays():
+    fig = {"data": [{"y": np.arange(5.0)}], "layout": {}}
+    spec = fig_tools.coerce_for_js(fig, None, None, typed_arrays=True)
+    assert spec["data"]["data"][0]["y"]["dtype"] == "f8"
+    spec = fig_tools.coerce_for_js(fig, None, None)
+    assert isinstance(spec["data"]["data"][0]["y"], np.ndarray)
+
+
+def test_approx_size():
+    """Test that approx_size is close to the real size of the JSON."""
+    fig = {
+        "data": [
+            {"x": list(range(1000)), "y": [i / 7 for i in range(1000)], "name": "trace"}
+        ],
+        "layout": {"title": {"text": "hello"}},
+    }
+    real = len(orjson.dumps(fig))
+    assert real / 2 < fig_tools.approx_size(fig) < real * 2
+    assert fig_tools.approx_size({"z": np.zeros(100)}) == 1 + 800
+    assert fig_tools.approx_size({"data": []}) == len("data") + 2
+
+
+@pytest.mark.parametrize(
+    ("fig", "expected"),
+    [
+        ({"data": [{"x": [1, 2], "y": [3, 4]}]}, False),
+        ({"data": [], "layout": {"title": {"text": "costs $5, or $6"}}}, True),
+        ({"data": [], "layout": {"title": {"text": "costs $5"}}}, False),
+        ({"data": [{"name": r"$\alpha$"}]}, True),
+        ({"data": [{"x": ["a", r"$\beta^2$"]}]}, True),
+        ({"data": [], "layout": {"annotations": [{"text": "$x$"}]}}, True),
+        ({"data": [], "layout": {"xaxis": {"ticktext": ["1", "$2$"]}}}, True),
+        ({"data": [], "layout": {"xaxis": {"ticktext": [1, "$2$"]}}}, True),
+        ({"data": [{"text": [1.5, None, r"$\gamma$"]}]}, True),
+        ({"data": [{"x": [1, 2.5, "a"]}]}, False),
+    ],
+)
+def test_has_latex(fig, expected):
+    assert fig_tools.has_latex(fig) is expected
+
+
+def test_coerce_for_js_format_list():
+    fig = {"data": [], "layout": {}}
+    spec = fig_tools.coerce_for_js(fig, None, {"format": ["png", "jpg", "svg", "png"]})
+    assert spec["format"] == "png"
+    assert [o["format"] for o in spec["outputs"]] == ["png", "jpeg", "svg"]
+    assert fig_tools.spec_outputs(spec) == spec["outputs"]
+
+    single = fig_tools.coerce_for_js(fig, "fig.svg", {"format": ["svg"]})
+    assert "outputs" not in single
+    assert fig_tools.spec_outputs(single) == [
+        {"format": "svg", "width": 700, "height": 500, "scale": 1},
+    ]
+
+    with pytest.raises(ValueError, match="empty"):
+        fig_tools.coerce_for_js(fig, None, {"format": []})
+    with pytest.raises(ValueError, match="Invalid format"):
+        fig_tools.coerce_for_js(fig, None, {"format": ["png", "gif"]})
+
+
+def test_coerce_for_js_variants():
+    fig = {"data": [], "layout": {"width": 400}}
+    opts = {
+        "format": ["png", "pdf"],
+        "scale": 2,
+        "variants": [{}, {"width": 100, "height": 80, "scale": 0.5}],
+    }
+    spec = fig_tools.coerce_for_js(fig, None, opts)
+    assert (spec["width"], spec["height"], spec["scale"]) == (400, 500, 2)
+    assert [(o["label"], o["format"]) for o in spec["outputs"]] == [
+        ("400x500@2", "png"),
+        ("400x500@2", "pdf"),
+        ("100x80@0.5", "png"),
+        ("100x80@0.5", "pdf"),
+    ]
+    assert spec["outputs"][2]["width"] == 100  # noqa: PLR2004
+
+    single = fig_tools.coerce_for_js(fig, None, {"variants": [{"scale": 3}]})
+    assert single["outputs"] == [
+        {
+            "format": "png",
+            "width": 400,
+            "height": 500,
+            "scale": 3,
+            "label": "400x500@3",
+        },
+    ]
+
+    with pytest.raises(ValueError, match="empty"):
+        fig_tools.coerce_for_js(fig, None, {"variants": []})
+    with pytest.raises(AttributeError, match="Unknown"):
+        fig_tools.coerce_for_js(fig, None, {"variants": [{"dpi": 300}]})
@@ -0,0 +1,52 @@
+import asyncio
+
+from kaleido._utils import http_tools
+
+
+def echo(request):
+    method, target, headers, body = request
+    return "200 OK", f"{method} {target} {headers['x']} ".encode() + body, "text/plain"
+
+
+async def open_echo_server(**kwargs):
+    async def handle(reader, writer):
+        await http_tools.serve(reader, writer, echo, name="Echo server", **kwargs)
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def test_serve_keeps_connections_alive():
+    server, port = await open_echo_server(extra_headers=b"X-Extra: 1\r\n")
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            b"POST /a HTTP/1.1\r\nX: 1\r\nContent-Length: 3\r\n\r\nabc"
+            b"GET /b HTTP/1.1\r\nX: 2\r\nConnection: close\r\n\r\n",
+        )
+        response = await reader.read()
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    first, second = response.split(b"HTTP/1.1 200 OK\r\n")[1:]
+    assert b"X-Extra: 1\r\n" in first
+    assert first.endswith(b"\r\n\r\nPOST /a 1 abc")
+    assert second.endswith(b"\r\n\r\nGET /b 2 ")
+
+
+async def test_serve_one_response():
+    server, port = await open_echo_server(keep_alive=False)
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /a HTTP/1.1\r\nX: 1\r\n\r\nGET /b HTTP/1.1\r\nX: 2\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert response.count(b"HTTP/1.1") == 1
+    assert b"Connection: close\r\n" in response
+    assert response.endswith(b"GET /a 1 ")
@@ -1,7 +1,7 @@
 """Tests for wrapper functions in __init__.py that test argument passing."""
 
 from typing import TYPE_CHECKING
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -140,6 +140,28 @@ async def test_async_wrapper_functions(mock_kaleido_class):
     mock_kaleido.write_fig_from_object.assert_called_with(generator)
 
 
+@patch("kaleido.Kaleido")
+async def test_calc_figs_wrapper(mock_kaleido_class):
+    """Test the calc_figs async generator wrapper passes arguments and yields."""
+    mock_kaleido_class.return_value = mock_kaleido = AsyncMock()
+    mock_kaleido.__aenter__.return_value = mock_kaleido
+    mock_kaleido.__aexit__.return_value = None
+
+    async def fake_calc_figs(fig_dicts, **_kwargs):
+        for i, _ in enumerate(fig_dicts):
+            yield i, b"test_bytes", None
+
+    mock_kaleido.calc_figs = MagicMock(side_effect=fake_calc_figs)
+
+    fig_dicts = [{"fig": {"data": []}}, {"fig": {"data": []}}]
+    kopts = {"some_option": "value"}
+    results = [r async for r in kaleido.calc_figs(fig_dicts, kopts=kopts, stepper=True)]
+
+    mock_kaleido_class.assert_called_with(**kopts)
+    mock_kaleido.calc_figs.assert_called_with(fig_dicts, stepper=True)
+    assert results == [(0, b"test_bytes", None), (1, b"test_bytes", None)]
+
+
 # line serves to force static check of string in @patch
 _ = kaleido._sync_server.GlobalKaleidoServer.is_running  # noqa: SLF001
 _ = kaleido._sync_server.GlobalKaleidoServer.call_function  # noqa: SLF001
@@ -198,3 +220,38 @@ def test_sync_wrapper_oneshot(mock_oneshot_run, mock_is_running, args, kwargs):
         args=args,
         kwargs=kwargs,
     )
+
+
+@patch("kaleido._warm_server")
+async def test_warm_kaleido_routing(mock_warm):
+    """Test that the one-shot helpers use the warm server unless given kopts."""
+    mock_warm.enabled = True
+    mock_warm.call_function_async = AsyncMock(return_value=b"warm")
+    mock_warm.call_function = MagicMock(return_value=b"warm sync")
+
+    assert await kaleido.calc_fig({"data": []}) == b"warm"
+    mock_warm.call_function_async.assert_awaited_once_with(
+        "calc_fig",
+        {"data": []},
+        opts=None,
+        topojson=None,
+    )
+    assert kaleido.write_fig_sync({"data": []}, "test.png") == b"warm sync"
+    mock_warm.call_function.assert_called_once_with(
+        "write_fig",
+        {"data": []},
+        "test.png",
+    )
+
+    with patch("kaleido.Kaleido") as mock_kaleido_class:
+        mock_kaleido_class.return_value = mock_kaleido = AsyncMock()
+        mock_kaleido.__aenter__.return_value = mock_kaleido
+        await kaleido.write_fig_from_object([], kopts={"n": 2})
+        mock_kaleido_class.assert_called_once_with(n=2)
+    mock_warm.call_function_async.assert_awaited_once()
+
+
+@patch("kaleido._sync_server.WarmKaleidoServer.enable")
+def test_enable_warm_kaleido(mock_enable):
+    kaleido.enable_warm_kaleido(idle_timeout=10)
+    mock_enable.assert_called_once_with(idle_timeout=10)
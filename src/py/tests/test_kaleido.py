@@ -2,14 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
 
-from kaleido import Kaleido
+from kaleido import Kaleido, MemoryCache
+from kaleido._utils import fig_tools
 
 if TYPE_CHECKING:
     from typing import AsyncGenerator, Generator
@@ -191,6 +194,118 @@ async def test_write_fig_from_object_bare_dictionary(
     )
 
 
+async def test_write_fig_from_object_bounded_prefetch():
+    """Test that figures are pulled from the iterable only as renders finish."""
+    prefetch = 3
+    pulled = 0
+    in_flight = 0
+    max_in_flight = 0
+    max_ahead = 0
+    finished = 0
+
+    async def fake_render_task(*_args, **_kwargs):
+        nonlocal in_flight, max_in_flight, finished
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        finished += 1
+
+    def fig_generator() -> Generator[FigureDict, None]:
+        nonlocal pulled, max_ahead
+        for _ in range(20):
+            pulled += 1
+            max_ahead = max(max_ahead, pulled - finished)
+            yield {"fig": {"data": []}}
+
+    k = Kaleido(prefetch=prefetch)
+    with patch.object(k, "_render_task", new=fake_render_task):
+        res = await k.write_fig_from_object(fig_generator())
+
+    assert res == ()
+    assert pulled == 20  # noqa: PLR2004
+    assert max_in_flight <= prefetch
+    assert max_ahead <= prefetch + 1  # the one waiting for room
+
+
+async def test_render_cache_hit_skips_browser(tmp_path):
+    """Test that a cached figure is written without using a tab."""
+    cache = MemoryCache()
+    k = Kaleido(cache=cache)
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig = AsyncMock(return_value=b"image")  # noqa: SLF001
+    fig_dict = {"fig": {"data": []}, "path": tmp_path / "a.png"}
+
+    get_tab = AsyncMock(return_value=tab)
+    with patch.object(k, "_get_kaleido_tab", get_tab), patch.object(
+        k,
+        "_return_kaleido_tab",
+        AsyncMock(),
+    ):
+        assert await k.write_fig_from_object(fig_dict) == ()
+        (tmp_path / "a.png").unlink()
+        assert await k.write_fig_from_object(fig_dict) == ()
+
+    tab._calc_fig.assert_awaited_once()  # noqa: SLF001
+    assert (tmp_path / "a.png").read_bytes() == b"image"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert k.profiler[-1].cache_hits == 1
+    assert k.profiler[-1].renders[0].cache_hit
+
+
+async def test_offloaded_figures_keep_their_order(tmp_path):
+    """Test that generated names follow the figures, however long they take."""
+    coerce = fig_tools.coerce_for_js
+
+    def slow_coerce(fig, *args, **kwargs):
+        time.sleep(fig["meta"])
+        return coerce(fig, *args, **kwargs)
+
+    k = Kaleido(executor=ThreadPoolExecutor(2), offload_threshold=0)
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig = AsyncMock(  # noqa: SLF001
+        side_effect=lambda spec, **_: str(spec["data"]["meta"]).encode(),
+    )
+    figs = [{"fig": {"data": [], "meta": d}, "path": tmp_path} for d in (0.2, 0)]
+
+    with patch.object(fig_tools, "coerce_for_js", slow_coerce), patch.multiple(
+        k,
+        _get_kaleido_tab=AsyncMock(return_value=tab),
+        _return_kaleido_tab=AsyncMock(),
+    ):
+        assert await k.write_fig_from_object(figs) == ()
+
+    assert (tmp_path / "fig.png").read_bytes() == b"0.2"
+    assert (tmp_path / "fig-2.png").read_bytes() == b"0"
+
+
+async def test_calc_figs_yields_keys_and_errors():
+    """Test calc_figs yields mapping keys, bytes, and errors as they finish."""
+
+    async def fake_render_task(fig_arg, **_kwargs):
+        await asyncio.sleep(fig_arg["fig"]["delay"])
+        if fig_arg["fig"]["fail"]:
+            raise ValueError("bad figure")
+        return b"bytes"
+
+    fig_dicts = {
+        "slow": {"fig": {"delay": 0.05, "fail": False}},
+        "fast": {"fig": {"delay": 0, "fail": False}},
+        "broken": {"fig": {"delay": 0.01, "fail": True}},
+    }
+
+    k = Kaleido()
+    with patch.object(k, "_render_task", new=fake_render_task):
+        results = [r async for r in k.calc_figs(fig_dicts)]
+
+    assert [key for key, _, _ in results] == ["fast", "broken", "slow"]
+    assert results[0][1] == b"bytes"
+    assert isinstance(results[1][1], ValueError)
+    assert results[1][2].error is results[1][1]
+
+
 @pytest.fixture(scope="function")
 def test_kaleido():  # speed up hypothesis test using a function fixture
     return Kaleido()
@@ -331,6 +446,50 @@ async def test_kaleido_instantiate_no_hang():
     _ = Kaleido()
 
 
+async def test_kaleido_bad_transport():
+    """Test that an unknown transport is rejected."""
+    with pytest.raises(ValueError, match="transport must be one of"):
+        Kaleido(transport="carrier pigeon")
+
+
+async def test_kaleido_bad_max_tabs():
+    """Test that max_tabs can't be below n."""
+    with pytest.raises(ValueError, match="max_tabs"):
+        Kaleido(n=2, max_tabs=1)
+
+
+async def test_tab_pool_grows_and_shrinks():
+    """Test that tabs are opened while renders wait, and closed when idle."""
+    k = Kaleido(n=1, max_tabs=3, tab_idle_timeout=0.05)
+
+    async def fake_create_kaleido_tab():
+        tab = MagicMock()
+        tab.recycle = AsyncMock()
+        k._total_tabs += 1  # noqa: SLF001
+        await k._return_kaleido_tab(tab)  # noqa: SLF001
+
+    await fake_create_kaleido_tab()
+    with patch.object(
+        k,
+        "_create_kaleido_tab",
+        fake_create_kaleido_tab,
+    ), patch.object(k, "close_tab", AsyncMock()) as close_tab:
+        first = await k._get_kaleido_tab()  # noqa: SLF001
+        second = await k._get_kaleido_tab()  # noqa: SLF001 waits, then grows
+        assert first is not second
+        assert k._total_tabs == 2  # noqa: SLF001, PLR2004
+
+        await k._return_kaleido_tab(first)  # noqa: SLF001
+        await k._return_kaleido_tab(second)  # noqa: SLF001
+        reaper = asyncio.create_task(k._close_idle_tabs())  # noqa: SLF001
+        await asyncio.sleep(0.2)
+        reaper.cancel()
+
+    close_tab.assert_awaited_once()
+    assert k._total_tabs == 1  # noqa: SLF001
+    assert k.tabs_ready.qsize() == 1
+
+
 async def test_kaleido_instantiate_and_close():
     """Test that instantiating and closing Kaleido works."""
     # Maybe there should be a warning or error when closing without opening?
@@ -544,3 +703,155 @@ async def test_headers_rendering_works(simple_figure_with_bytes):
         )
 
     assert result[:8] == b"\x89PNG\r\n\x1a\n", "Generated data is not a valid PNG"
+
+
+async def test_profile_sink_gets_every_render(tmp_path):
+    """Test that each render, failed or not, is sent to the profile sink."""
+    records = []
+    k = Kaleido(profile_sink=records.append)
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig = AsyncMock(return_value=b"image")  # noqa: SLF001
+    figs = [
+        {"fig": {"data": []}, "path": tmp_path / "a.png"},
+        {"fig": {"data": []}, "path": tmp_path / "a.bad"},
+    ]
+
+    with patch.multiple(
+        k,
+        _get_kaleido_tab=AsyncMock(return_value=tab),
+        _return_kaleido_tab=AsyncMock(),
+    ):
+        errors = await k.write_fig_from_object(figs, cancel_on_error=False)
+
+    assert len(errors) == 1
+    assert len(records) == 2  # noqa: PLR2004
+    ok, failed = sorted(records, key=lambda r: r["error"] is not None)
+    assert ok["call"] == k.profiler[-1].name
+    assert ok["tab"] == "tab"
+    assert "waiting for tab" in ok["stages"]
+    assert failed["error"]
+
+
+async def test_metrics_count_renders_and_recycles(tmp_path):
+    """Test that renders and tab recycling are counted in Kaleido.metrics."""
+    k = Kaleido()
+    k._total_tabs = 1  # noqa: SLF001
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig = AsyncMock(return_value=b"image")  # noqa: SLF001
+    tab.recycle = AsyncMock(return_value=False)
+    await k.tabs_ready.put(tab)
+
+    await k.write_fig_from_object([{"fig": {"data": []}, "path": tmp_path}] * 2)
+
+    assert k.metrics.get("kaleido_renders_total", format="png", outcome="ok") == 2  # noqa: PLR2004
+    assert k.metrics.get("kaleido_tab_recycle_seconds", action="reset") == 2  # noqa: PLR2004
+    assert k.metrics.get("kaleido_tabs_busy") == 0
+    assert k.metrics.get("kaleido_renders_waiting") == 0
+
+
+async def test_small_figures_are_batched(tmp_path):
+    """Test that figures queued behind a busy tab are rendered together."""
+    k = Kaleido(batch_size=4)
+    k._total_tabs = 1  # noqa: SLF001
+    batches = []
+
+    async def calc_fig_batch(specs, **_):
+        batches.append([spec["data"]["meta"] for spec in specs])
+        await asyncio.sleep(0.01)
+        return [
+            ValueError("bad") if spec["data"]["meta"] == 3 else b"image"  # noqa: PLR2004
+            for spec in specs
+        ]
+
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig = AsyncMock(return_value=b"pdf")  # noqa: SLF001
+    tab._calc_fig_batch = calc_fig_batch  # noqa: SLF001
+    tab.recycle = AsyncMock(return_value=False)
+    await k.tabs_ready.put(tab)
+
+    figs = [
+        {"fig": {"data": [], "meta": i}, "path": tmp_path / f"{i}.png"}
+        for i in range(9)
+    ]
+    figs.append({"fig": {"data": []}, "path": tmp_path / "big.pdf"})
+    errors = await k.write_fig_from_object(figs)
+
+    assert [str(e) for e in errors] == ["bad"]
+    for task in k._pool_tasks:  # noqa: SLF001 the batcher's dispatcher
+        task.cancel()
+    assert sorted(i for batch in batches for i in batch) == list(range(9))
+    assert max(len(b) for b in batches) == 4  # noqa: PLR2004
+    tab._calc_fig.assert_awaited_once()  # noqa: SLF001 only the pdf
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [f"{i}.png" for i in range(9) if i != 3] + ["big.pdf"],  # noqa: PLR2004
+    )
+
+
+async def test_formats_are_rendered_together(tmp_path):
+    """Test that a list of formats is rendered once and written to each path."""
+    k = Kaleido()
+    k._total_tabs = 1  # noqa: SLF001
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig_outputs = AsyncMock(return_value=[b"png", b"svg"])  # noqa: SLF001
+    tab.recycle = AsyncMock(return_value=False)
+    await k.tabs_ready.put(tab)
+
+    fig = {"data": [], "layout": {"title": {"text": "both"}}}
+    await k.write_fig(fig, tmp_path, {"format": ["png", "svg"]}, cancel_on_error=True)
+
+    tab._calc_fig_outputs.assert_awaited_once()  # noqa: SLF001
+    assert (tmp_path / "both.png").read_bytes() == b"png"
+    assert (tmp_path / "both.svg").read_bytes() == b"svg"
+
+    result = await k.calc_fig(fig, {"format": ["png", "svg"]})
+    assert result == {"png": b"png", "svg": b"svg"}
+
+    tab._calc_fig_outputs.side_effect = ValueError("bad")  # noqa: SLF001
+    errors = await k.write_fig(fig, tmp_path, {"format": ["png", "svg"]})
+    assert [str(e) for e in errors] == ["bad"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["both.png", "both.svg"]
+
+
+async def test_write_fig_to_a_list_of_one_path(tmp_path):
+    """Test that a list of one path is accepted for a figure with one output."""
+    k = Kaleido()
+    k._total_tabs = 1  # noqa: SLF001
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig = AsyncMock(return_value=b"image")  # noqa: SLF001
+    tab.recycle = AsyncMock(return_value=False)
+    await k.tabs_ready.put(tab)
+
+    fig = {"data": []}
+    assert (
+        await k.write_fig_from_object({"fig": fig, "path": [tmp_path / "a.png"]}) == ()
+    )
+    assert (tmp_path / "a.png").read_bytes() == b"image"
+
+    two = {"fig": fig, "path": [tmp_path / "b.png", tmp_path / "c.png"]}
+    errors = await k.write_fig_from_object(two)
+    assert [str(e) for e in errors] == ["Got 2 paths for 1 outputs."]
+
+
+async def test_variants_are_keyed_by_size(tmp_path):
+    """Test that variants are rendered from one call, and named by their size."""
+    k = Kaleido()
+    k._total_tabs = 1  # noqa: SLF001
+    tab = MagicMock()
+    tab.tab.target_id = "tab"
+    tab._calc_fig_outputs = AsyncMock(return_value=[b"big", b"small"])  # noqa: SLF001
+    tab.recycle = AsyncMock(return_value=False)
+    await k.tabs_ready.put(tab)
+
+    opts = {"width": 800, "height": 600, "variants": [{}, {"width": 80, "scale": 2}]}
+    result = await k.calc_fig({"data": []}, opts)
+    assert result == {"800x600@1.png": b"big", "80x600@2.png": b"small"}
+
+    await k.write_fig({"data": []}, tmp_path / "chart.png", opts, cancel_on_error=True)
+    assert (tmp_path / "chart-800x600@1.png").read_bytes() == b"big"
+    assert (tmp_path / "chart-80x600@2.png").read_bytes() == b"small"
+    assert tab._calc_fig_outputs.await_count == 2  # noqa: SLF001, PLR2004
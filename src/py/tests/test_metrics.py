@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from kaleido._kaleido_tab._errors import KaleidoError
+from kaleido._metrics import Metrics, MetricsServer
+from kaleido._profiler import RenderTaskProfile
+
+
+def make_profile(error=None, **ticks):
+    prof = RenderTaskProfile()
+    prof.info["format"] = "png"
+    prof.profile_log._logs = ticks  # noqa: SLF001
+    prof.data_in_size = 10
+    prof.data_out_size = 100
+    prof.error = error
+    return prof
+
+
+def test_observe_render():
+    metrics = Metrics()
+    ticks = {"preparing": 0.0, "waiting for tab": 0.1, "acquired tab": 0.4}
+    metrics.observe_render(make_profile(**ticks))
+    metrics.observe_render(make_profile(KaleidoError(525, "bad"), **ticks))
+    metrics.observe_render(make_profile(ValueError("bad")))
+    metrics.observe_render(make_profile(asyncio.TimeoutError()))
+
+    assert metrics.get("kaleido_renders_total", format="png", outcome="ok") == 1
+    assert metrics.get("kaleido_renders_total", format="png", outcome="timeout") == 1
+    assert metrics.get("kaleido_render_errors_total", code="525") == 1
+    assert metrics.get("kaleido_render_errors_total", code="ValueError") == 1
+    assert metrics.get("kaleido_bytes_out_total") == 400  # noqa: PLR2004
+    assert metrics.get("kaleido_tab_wait_seconds") == 2  # noqa: PLR2004
+    assert metrics.get("kaleido_cache_requests_total", result="hit") == 0
+
+
+def test_unknown_metrics_are_refused():
+    metrics = Metrics()
+    with pytest.raises(ValueError, match="not a known counter"):
+        metrics.inc("kaleido_tab_wait_seconds")
+
+
+def test_exposition():
+    metrics = Metrics()
+    metrics.set_gauge("kaleido_tabs", lambda: 3)
+    metrics.inc("kaleido_renders_total", format='p"ng', outcome="ok")
+    metrics.observe("kaleido_tab_wait_seconds", 0.2)
+    metrics.observe("kaleido_tab_wait_seconds", 100)
+    text = metrics.exposition().splitlines()
+
+    assert "# TYPE kaleido_tabs gauge" in text
+    assert "kaleido_tabs 3" in text
+    assert 'kaleido_renders_total{format="p\\"ng",outcome="ok"} 1' in text
+    assert 'kaleido_tab_wait_seconds_bucket{le="0.1"} 0' in text
+    assert 'kaleido_tab_wait_seconds_bucket{le="0.25"} 1' in text
+    assert 'kaleido_tab_wait_seconds_bucket{le="60"} 1' in text
+    assert 'kaleido_tab_wait_seconds_bucket{le="+Inf"} 2' in text
+    assert "kaleido_tab_wait_seconds_sum 100.2" in text
+    assert "kaleido_tab_wait_seconds_count 2" in text
+
+
+def test_exposition_of_non_finite_values():
+    metrics = Metrics()
+    metrics.set_gauge("kaleido_tabs", lambda: float("nan"))
+    metrics.set_gauge("kaleido_tabs_busy", lambda: float("-inf"))
+    metrics.observe("kaleido_tab_wait_seconds", float("inf"))
+    text = metrics.exposition().splitlines()
+
+    assert "kaleido_tabs NaN" in text
+    assert "kaleido_tabs_busy -Inf" in text
+    assert "kaleido_tab_wait_seconds_sum +Inf" in text
+    assert "kaleido_tab_wait_seconds_count 1" in text
+
+
+async def test_metrics_server():
+    metrics = Metrics()
+    metrics.inc("kaleido_bytes_in_total", 5)
+    server = MetricsServer(metrics)
+    await server.open()
+    try:
+
+        async def fetch(path):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response
+
+        response = await fetch("/metrics")
+        assert response.startswith(b"HTTP/1.1 200 OK")
+        assert b"\nkaleido_bytes_in_total 5\n" in response
+        assert (await fetch("/other")).startswith(b"HTTP/1.1 404")
+    finally:
+        await server.close()
@@ -4,14 +4,18 @@ import tempfile
 from html.parser import HTMLParser
 from importlib.util import find_spec
 from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 import logistro
 import pytest
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
 
-from kaleido import PageGenerator
-from kaleido._page_generator import DEFAULT_MATHJAX, DEFAULT_PLOTLY
+from kaleido import PageGenerator, _script_bundle
+from kaleido._page_generator import DEFAULT_MATHJAX, DEFAULT_PLOTLY, KJS_PATH
+from kaleido._script_bundle import ScriptBundle
 
 # allows to create a browser pool for tests
 pytestmark = pytest.mark.asyncio(loop_scope="function")
@@ -227,6 +231,53 @@ async def test_force_cdn():
     assert scripts[2].endswith("kaleido_scopes.js")
 
 
+async def test_bundle_downloads_once_and_verifies(tmp_path):
+    """Test bundle=... serves remote scripts from a checked local copy."""
+    with patch.object(ScriptBundle, "_download", return_value=b"js") as download:
+        page = PageGenerator(force_cdn=True, bundle=tmp_path)
+        scripts, encodings = get_scripts_from_html(page.generate_index())
+        page.generate_index()
+        page.script_urls()
+        page.fingerprint()
+        assert download.call_count == 1
+        page.localize()
+        assert download.call_count == 1
+
+        local = Path(url2pathname(urlparse(scripts[1]).path))
+        assert scripts[0] == DEFAULT_MATHJAX  # loads more files, not bundled
+        assert local.parent == tmp_path
+        assert local.read_bytes() == b"js"
+        assert encodings[1] == "utf-8"
+        assert page.script_urls() == [*scripts[:2], KJS_PATH.as_uri()]
+
+        local.write_bytes(b"tampered")
+        page.generate_index()  # uses the last localize()
+        assert download.call_count == 1
+        page.localize()
+        assert download.call_count == 2  # noqa: PLR2004
+        assert local.read_bytes() == b"js"
+
+        # unchanged copies are only hashed once
+        sha256 = _script_bundle._sha256  # noqa: SLF001
+        with patch.object(_script_bundle, "_sha256", wraps=sha256) as h:
+            page.localize()
+            page.localize()
+        assert h.call_count == 0
+
+
+async def test_mathjax_on_demand():
+    """Test mathjax_on_demand=True leaves MathJax out of the page."""
+    page = PageGenerator(mathjax_on_demand=True)
+    scripts, _encodings = get_scripts_from_html(page.generate_index())
+
+    assert DEFAULT_MATHJAX not in scripts
+    assert page.on_demand_mathjax == (DEFAULT_MATHJAX, "")
+    assert PageGenerator().on_demand_mathjax is None
+    assert (
+        PageGenerator(mathjax=False, mathjax_on_demand=True).on_demand_mathjax is None
+    )
+
+
 # Test boolean mathjax functionality
 async def test_mathjax_false():
     """Test that mathjax=False disables mathjax."""
@@ -1,4 +1,5 @@
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -155,3 +156,125 @@ def test_determine_path_file_with_suffix(tmp_path, fig_fixture):
         match=r"Cannot reach path .* Are all directories created?",
     ):
         path_tools.determine_path(file_path, fig_dict, "ext")
+
+
+@pytest.mark.parametrize(
+    "existing",
+    [
+        [],
+        ["test.png"],
+        ["test.png", "test-2.png", "test-3.png", "test-5.png"],
+        ["test-4.png"],
+        ["test.png", "test-2.png", "testing-3.png", "test-2.jpg", "test-abc.png"],
+        ["test-2-3.png", "test.tar.png", "test-02.png"],
+    ],
+)
+def test_filename_index_matches_next_filename(tmp_path, existing):
+    """Test FilenameIndex hands out what _next_filename would, in turn."""
+    for name in existing:
+        (tmp_path / name).touch()
+    names = path_tools.FilenameIndex()
+    for _ in range(3):
+        expected = path_tools._next_filename(tmp_path, "test", "png")  # noqa: SLF001
+        assert names.next_filename(tmp_path, "test", "png") == expected
+        (tmp_path / expected).touch()
+
+
+def test_filename_index_scans_once(tmp_path, fig_fixture):
+    """Test determine_path with an index only lists the directory once."""
+    fig_dict, expected_prefix = fig_fixture
+    names = path_tools.FilenameIndex()
+    with patch.object(Path, "iterdir", autospec=True, side_effect=Path.iterdir) as ls:
+        paths = [
+            path_tools.determine_path(tmp_path, fig_dict, "png", names)
+            for _ in range(50)
+        ]
+    assert ls.call_count == 1
+    assert len(set(paths)) == 50  # noqa: PLR2004
+    assert paths[0].name == f"{expected_prefix}.png"
+    assert paths[-1].name == f"{expected_prefix}-50.png"
+
+
+def test_filename_index_checks_the_disk(tmp_path):
+    """Test FilenameIndex skips names written since it listed the directory."""
+    names = path_tools.FilenameIndex()
+    assert names.next_filename(tmp_path, "fig", "png") == "fig.png"
+    (tmp_path / "fig-2.png").touch()  # another index's write
+    (tmp_path / "fig-3.png").touch()
+    assert names.next_filename(tmp_path, "fig", "png") == "fig-4.png"
+
+
+def test_filename_index_shared_by_overlapping_writes(tmp_path, fig_fixture):
+    """Test overlapping writes sharing an index never pick the same name."""
+    fig_dict, expected_prefix = fig_fixture
+    names = path_tools.FilenameIndex()
+    with names.in_use():
+        first = path_tools.determine_path(tmp_path, fig_dict, "png", names)
+        with names.in_use():  # nothing is written yet
+            second = path_tools.determine_path(tmp_path, fig_dict, "png", names)
+        third = path_tools.determine_path(tmp_path, fig_dict, "png", names)
+    assert [p.name for p in (first, second, third)] == [
+        f"{expected_prefix}.png",
+        f"{expected_prefix}-2.png",
+        f"{expected_prefix}-3.png",
+    ]
+
+    # once every write is done, the directory is listed again
+    with names.in_use():
+        again = path_tools.determine_path(tmp_path, fig_dict, "png", names)
+    assert again.name == f"{expected_prefix}.png"
+
+
+def test_determine_path_formats(tmp_path, fig_fixture):
+    """Test determine_path with a list of formats gives each the same name."""
+    fig_dict, expected_prefix = fig_fixture
+    (tmp_path / f"{expected_prefix}.svg").touch()
+    (tmp_path / f"{expected_prefix}-2.png").touch()
+
+    for names in (None, path_tools.FilenameIndex()):
+        paths = path_tools.determine_path(tmp_path, fig_dict, ["png", "svg"], names)
+        assert [p.name for p in paths] == [
+            f"{expected_prefix}-3.png",
+            f"{expected_prefix}-3.svg",
+        ]
+
+    file_path = tmp_path / "output.jpg"
+    paths = path_tools.determine_path(file_path, fig_dict, ["pdf", "jpeg"])
+    assert paths == [tmp_path / "output.pdf", file_path]
+
+
+def test_output_paths_labels(tmp_path):
+    """Test output_paths adds each variant's label to the generated names."""
+    fig_dict = {"layout": {"title": {"text": "chart"}}}
+    spec = {
+        "data": fig_dict,
+        "outputs": [
+            {"format": "png", "label": "10x10@1"},
+            {"format": "png", "label": "10x10@2"},
+        ],
+    }
+    (tmp_path / "chart-10x10@2.png").touch()
+
+    paths = path_tools.output_paths(tmp_path, spec)
+    assert [p.name for p in paths] == ["chart-10x10@1-2.png", "chart-10x10@2-2.png"]
+
+    paths = path_tools.output_paths(tmp_path / "out.png", spec)
+    assert [p.name for p in paths] == ["out-10x10@1.png", "out-10x10@2.png"]
+
+    given = [tmp_path / "a.png", str(tmp_path / "b.png")]
+    assert path_tools.output_paths(given, spec) == [
+        tmp_path / "a.png",
+        tmp_path / "b.png",
+    ]
+    with pytest.raises(ValueError, match="1 paths for 2 outputs"):
+        path_tools.output_paths(given[:1], spec)
+
+
+def test_output_paths_one_output(tmp_path):
+    """Test output_paths takes a list of one path for a spec with one output."""
+    spec = {"data": {}, "format": "png"}
+    assert path_tools.output_paths([str(tmp_path / "a.png")], spec) == [
+        tmp_path / "a.png",
+    ]
+    with pytest.raises(ValueError, match="2 paths for 1 outputs"):
+        path_tools.output_paths([tmp_path / "a.png", tmp_path / "b.png"], spec)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+from pathlib import Path
+
+import plotly.graph_objects as go
+import pytest
+
+from kaleido import KaleidoPool
+
+
+def fake_worker(kaleido_kwargs, inbox, results):
+    """Stands in for a worker process: echoes jobs instead of rendering."""
+    if kaleido_kwargs.get("fail"):
+        results.send(("failed", os.getpid(), None, ValueError("no browser")))
+        return
+    results.send(("ready", os.getpid(), None, None))
+    while (job := inbox.get()) is not None:
+        job_id, method, args, _ = job
+        if method == "calc_fig" and args[0] == "crash":
+            os._exit(1)
+        if method == "calc_fig" and args[0] == "bad":
+            results.send(("error", os.getpid(), job_id, ValueError("bad fig")))
+        elif method == "calc_fig":
+            results.send(("done", os.getpid(), job_id, (os.getpid(), args[0])))
+        else:
+            paths = args[0]["path"]
+            for path in paths if isinstance(paths, list) else [paths]:
+                Path(path).write_bytes(b"image")
+            results.send(("done", os.getpid(), job_id, None))
+
+
+class FakePool(KaleidoPool):
+    _worker_target = staticmethod(fake_worker)
+
+
+async def test_pool_spreads_calls_over_workers():
+    async with FakePool(processes=2) as pool:
+        results = [await pool.calc_fig(i) for i in range(2)]
+        results += await asyncio.gather(
+            *(pool.calc_fig(i) for i in range(20)),
+        )
+        with pytest.raises(ValueError, match="bad fig"):
+            await pool.calc_fig("bad")
+    assert sorted(r[1] for r in results[2:]) == list(range(20))
+    assert len({pid for pid, _ in results}) == 2  # noqa: PLR2004
+
+
+async def test_pool_names_files_uniquely(tmp_path):
+    fig = {"data": [], "layout": {"title": {"text": "same"}}}
+    async with FakePool(processes=2) as pool:
+        errors = await pool.write_fig(
+            [fig] * 5,
+            path=tmp_path,
+            opts={"format": "png"},
+        )
+    assert errors == ()
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert len(files) == 5  # noqa: PLR2004
+    assert all(p.read_bytes() == b"image" for p in tmp_path.iterdir())
+
+
+async def test_pool_overlapping_writes_name_files_uniquely(tmp_path):
+    fig = {"data": [], "layout": {"title": {"text": "same"}}}
+    async with FakePool(processes=2) as pool:
+        results = await asyncio.gather(
+            *(
+                pool.write_fig([fig] * 3, path=tmp_path, opts={"format": "png"})
+                for _ in range(2)
+            ),
+        )
+    assert results == [(), ()]
+    assert len(list(tmp_path.iterdir())) == 6  # noqa: PLR2004
+
+
+async def test_pool_names_variants_together(tmp_path):
+    fig = {"data": [], "layout": {"title": {"text": "same"}}}
+    opts = {"format": ["png", "svg"], "variants": [{}, {"width": 100, "scale": 2}]}
+    async with FakePool(processes=2) as pool:
+        errors = await pool.write_fig([fig] * 2, path=tmp_path, opts=opts)
+    assert errors == ()
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f"same-{size}{n}.{ext}"
+        for size in ("100x500@2", "700x500@1")
+        for n in ("", "-2")
+        for ext in ("png", "svg")
+    )
+
+
+async def test_pool_restarts_crashed_workers():
+    async with FakePool(processes=1) as pool:
+        with pytest.raises(RuntimeError, match="crashed"):
+            await pool.calc_fig("crash")
+        _, result = await pool.calc_fig("ok")
+    assert result == "ok"
+
+
+async def test_pool_open_raises_if_workers_fail():
+    pool = FakePool(processes=2, fail=True)
+    with pytest.raises(ValueError, match="no browser"):
+        await pool.open()
+    assert pool._workers == []  # noqa: SLF001
+
+
+async def test_pool_sends_figures_uncoerced(tmp_path):
+    jobs = []
+
+    class RecordingPool(FakePool):
+        async def _submit(self, method, *args, **kwargs):
+            jobs.append(args[0])
+            return await super()._submit(method, *args, **kwargs)
+
+    fig = go.Figure(layout={"title": {"text": "named"}, "width": 300})
+    async with RecordingPool(processes=1) as pool:
+        errors = await pool.write_fig(fig, path=tmp_path, opts={"format": "png"})
+        with pytest.raises(TypeError):
+            await pool.write_fig_from_object(
+                {"fig": "not a figure", "path": tmp_path},
+                cancel_on_error=True,
+            )
+    assert errors == ()
+    assert jobs[0]["fig"] is fig
+    assert jobs[0]["opts"]["width"] == 300  # noqa: PLR2004
+    assert [p.name for p in tmp_path.iterdir()] == ["named.png"]
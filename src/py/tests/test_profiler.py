@@ -0,0 +1,80 @@
+import orjson
+import pytest
+
+from kaleido import ChromeTraceSink, JsonLinesSink, stage_percentiles
+from kaleido._profiler import ProfileLog, ProfileSink, RenderTaskProfile, percentile
+
+
+def make_record(tab="tab-1", error=None):
+    prof = RenderTaskProfile()
+    prof.info.update(format="png", width=700, height=500, scale=1, tab=tab)
+    prof.profile_log._logs = {"preparing": 10.0, "rendering": 10.5, "done": 12.0}  # noqa: SLF001
+    prof.data_out_size = 100
+    prof.error = error
+    return prof.to_record("write_fig")
+
+
+def test_stages_run_from_tick_to_tick():
+    log = ProfileLog()
+    log._logs = {"b": 2.0, "a": 1.0, "c": 4.5}  # noqa: SLF001
+    assert log.stages() == {"a": 1.0, "b": 2.5}
+
+
+def test_record_is_json():
+    record = make_record(error=ValueError("bad"))
+    assert orjson.loads(orjson.dumps(record)) == record
+    assert record["stages"] == {"preparing": 0.5, "rendering": 1.5}
+    assert record["total"] == 2.0  # noqa: PLR2004
+    assert record["error"] == "ValueError('bad')"
+
+
+@pytest.mark.parametrize(
+    ("q", "expected"),
+    [(0, 1), (50, 2.5), (95, 3.85), (100, 4)],
+)
+def test_percentile(q, expected):
+    assert percentile([4, 1, 3, 2], q) == pytest.approx(expected)
+
+
+def test_stage_percentiles():
+    stats = stage_percentiles([make_record() for _ in range(3)], qs=(50, 99.9))
+    assert stats["rendering"] == {"count": 3, "p50": 1.5, "p99.9": 1.5}
+    assert stats["total"]["p50"] == 2.0  # noqa: PLR2004
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / "profile.jsonl"
+    with JsonLinesSink(path) as sink:
+        sink(make_record())
+    with JsonLinesSink(path) as sink:  # appends
+        sink(make_record(tab="tab-2"))
+    records = JsonLinesSink.read(path)
+    assert [r["tab"] for r in records] == ["tab-1", "tab-2"]
+
+
+def test_profile_sink_subclasses_must_take_records():
+    class Sink(ProfileSink):
+        pass
+
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_chrome_trace_sink(tmp_path):
+    path = tmp_path / "trace.json"
+    with ChromeTraceSink(path) as sink:
+        sink(make_record())
+        sink(make_record(tab="tab-2", error=ValueError("bad")))
+        sink(make_record())
+    events = [e for e in orjson.loads(path.read_bytes()) if e]
+
+    names = [e["args"]["name"] for e in events if e["ph"] == "M"]
+    assert names == ["tab tab-1", "tab tab-2"]
+    slices = [e for e in events if e["ph"] == "X"]
+    assert len(slices) == 9  # noqa: PLR2004
+    assert {e["tid"] for e in slices} == {1, 2}
+    render = slices[0]
+    assert render["name"] == "render png"
+    assert (render["ts"], render["dur"]) == (10e6, 2e6)
+    assert render["args"]["data_out_size"] == 100  # noqa: PLR2004
+    assert slices[3]["name"] == "error"
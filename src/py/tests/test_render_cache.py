@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+import pytest
+
+from kaleido import DiskCache, MemoryCache, PageGenerator
+from kaleido._render_cache import RenderCache, cache_key
+
+
+def _spec(**kwargs):
+    spec = {"format": "png", "width": 700, "height": 500, "scale": 1, "data": {}}
+    spec.update(kwargs)
+    return spec
+
+
+def test_cache_key():
+    key = cache_key(_spec(data={"a": 1, "b": 2}), None, "page")
+    assert key == cache_key(_spec(data={"b": 2, "a": 1}), None, "page")
+    assert key != cache_key(_spec(data={"a": 1, "b": 2}, scale=2), None, "page")
+    assert key != cache_key(_spec(data={"a": 1, "b": 2}), "topo.json", "page")
+    assert key != cache_key(_spec(data={"a": 1, "b": 2}), None, "other page")
+
+
+@pytest.mark.parametrize("make_cache", [MemoryCache, DiskCache])
+def test_cache_lru_entries(make_cache, tmp_path):
+    kwargs = {"max_entries": 2}
+    cache = (
+        make_cache(tmp_path, **kwargs)
+        if make_cache is DiskCache
+        else make_cache(**kwargs)
+    )
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"  # now b is least recently used
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+
+def test_cache_max_bytes():
+    cache = MemoryCache(max_bytes=10)
+    cache.put("a", b"x" * 6)
+    cache.put("b", b"x" * 6)
+    assert cache.get("a") is None
+    assert cache.size == 6  # noqa: PLR2004
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert len(cache) == 1
+
+
+def test_cache_ttl():
+    cache = MemoryCache(ttl=60)
+    with patch("kaleido._render_cache.time.time", return_value=1000):
+        cache.put("a", b"1")
+    with patch("kaleido._render_cache.time.time", return_value=1059):
+        assert cache.get("a") == b"1"
+    with patch("kaleido._render_cache.time.time", return_value=1061):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_disk_cache_persists(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put("a", b"image")
+    reopened = DiskCache(tmp_path, max_bytes=100)
+    assert reopened.get("a") == b"image"
+    assert reopened.size == len(b"image")
+    reopened.clear()
+    assert not list(tmp_path.iterdir())
+
+
+def test_disk_cache_sweeps_interrupted_writes(tmp_path):
+    (tmp_path / "a.1234.tmp").write_bytes(b"half")
+    cache = DiskCache(tmp_path, max_entries=1)
+    assert not list(tmp_path.glob("*.tmp"))
+
+    cache.put("a", b"image")
+    (tmp_path / "b.5678.tmp").write_bytes(b"half")
+    cache.put("b", b"image")  # evicts a
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.bin"]
+
+
+def test_page_fingerprint(tmp_path):
+    plotly_js = tmp_path / "plotly.js"
+    plotly_js.write_text("one")
+    page = PageGenerator(plotly=str(plotly_js), mathjax=False)
+    fingerprint = page.fingerprint()
+    assert fingerprint == page.fingerprint()
+    plotly_js.write_text("changed")
+    assert fingerprint != page.fingerprint()
+
+
+def test_page_fingerprint_remote_scripts(recwarn):
+    pinned = PageGenerator(plotly="https://cdn.plot.ly/plotly-2.35.2.min.js")
+    other = PageGenerator(plotly="https://cdn.plot.ly/plotly-3.0.1.min.js")
+    assert pinned.fingerprint() != other.fingerprint()
+    assert not recwarn
+
+    latest = PageGenerator(plotly="https://cdn.plot.ly/plotly-latest.min.js")
+    with pytest.warns(UserWarning, match="plotly-latest.min.js doesn't name a version"):
+        latest.fingerprint()
+
+
+def test_render_cache_subclasses_must_store():
+    class Incomplete(RenderCache):
+        def _load(self, _key):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete()
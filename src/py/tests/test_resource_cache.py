@@ -0,0 +1,130 @@
+import asyncio
+import base64
+import http.client
+import time
+import urllib.error
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from kaleido import ResourceCache, _resource_cache
+
+TOPOJSON = "https://cdn.plot.ly/world_110m.json"
+
+
+def test_seed_and_put(tmp_path):
+    (tmp_path / "un").mkdir()
+    (tmp_path / "un" / "world_110m.json").write_bytes(b"{}")
+    cache = ResourceCache(seed={"https://cdn.plot.ly": tmp_path})
+
+    assert cache.get("https://cdn.plot.ly/un/world_110m.json") == (
+        "application/json",
+        b"{}",
+    )
+    assert cache.get(TOPOJSON) is None
+    cache.put(TOPOJSON, "application/json", b"[]")
+    assert cache.get(TOPOJSON) == ("application/json", b"[]")
+
+
+def test_lru_by_bytes_on_disk(tmp_path):
+    cache = ResourceCache(tmp_path, max_bytes=30)
+    cache.put("https://a.png", "image/png", b"a" * 10)
+    cache.put("https://b.png", "image/png", b"b" * 10)
+    assert cache.get("https://a.png") is None  # each is 20 bytes with its type
+    assert ResourceCache(tmp_path).get("https://a.png") is None
+    assert ResourceCache(tmp_path).get("https://b.png") == ("image/png", b"b" * 10)
+
+
+async def test_fetch_downloads_once():
+    calls = []
+
+    def fake_download(url, headers):
+        calls.append((url, headers))
+        time.sleep(0.05)
+        return "application/json", b"{}"
+
+    cache = ResourceCache()
+    with patch.object(_resource_cache, "_download", fake_download):
+        results = await asyncio.gather(
+            *(cache.fetch(TOPOJSON, {"Referer": "x"}) for _ in range(3)),
+        )
+        assert await cache.fetch(TOPOJSON) == ("application/json", b"{}")
+
+    assert results == [("application/json", b"{}")] * 3
+    assert calls == [(TOPOJSON, {"Referer": "x"})]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+async def test_fetch_failure_is_not_cached():
+    def fake_download(_url, _headers):
+        raise urllib.error.URLError("offline")
+
+    cache = ResourceCache()
+    with patch.object(_resource_cache, "_download", fake_download):
+        assert await cache.fetch(TOPOJSON) is None
+    assert cache.get(TOPOJSON) is None
+
+
+async def test_serve_requests():
+    tab = MagicMock()
+    tab.send_command = AsyncMock(return_value={"result": {}})
+    cache = ResourceCache()
+    cache.put(TOPOJSON, "application/json", b"{}")
+    await cache.prepare(tab, exclude=("http://127.0.0.1:8000",))
+
+    tab.subscribe.assert_called_once()
+    event, serve = tab.subscribe.call_args[0]
+    assert event == "Fetch.requestPaused"
+    assert tab.send_command.call_args[0][0] == "Fetch.enable"
+
+    def paused(url, method="GET"):
+        return {"params": {"requestId": "1", "request": {"url": url, "method": method}}}
+
+    tab.send_command.reset_mock()
+    await serve(paused(TOPOJSON))
+    method, params = tab.send_command.call_args[0][0], tab.send_command.call_args[1]
+    assert method == "Fetch.fulfillRequest"
+    assert params["params"]["responseCode"] == 200  # noqa: PLR2004
+    assert base64.b64decode(params["params"]["body"]) == b"{}"
+
+    for request in (
+        paused(TOPOJSON, method="POST"),
+        paused("http://127.0.0.1:8000/blob/abc"),
+    ):
+        tab.send_command.reset_mock()
+        await serve(request)
+        tab.send_command.assert_awaited_once_with(
+            "Fetch.continueRequest",
+            params={"requestId": "1"},
+        )
+
+
+async def test_serve_never_leaves_requests_paused():
+    tab = MagicMock()
+    tab.send_command = AsyncMock(return_value={"result": {}})
+    cache = ResourceCache()
+    await cache.prepare(tab)
+    serve = tab.subscribe.call_args[0][1]
+    request = {
+        "params": {"requestId": "1", "request": {"url": TOPOJSON, "method": "GET"}}
+    }
+
+    def incomplete(_url, _headers):
+        raise http.client.IncompleteRead(b"")
+
+    for failure in (
+        patch.object(_resource_cache, "_download", incomplete),
+        patch.object(cache, "get", side_effect=RuntimeError("broken")),
+    ):
+        tab.send_command.reset_mock()
+        with failure:
+            await serve(request)
+        tab.send_command.assert_awaited_once_with(
+            "Fetch.continueRequest",
+            params={"requestId": "1"},
+        )
+
+    tab.send_command = AsyncMock(
+        side_effect=[RuntimeError("can't continue"), {"result": {}}],
+    )
+    with patch.object(_resource_cache, "_download", incomplete):
+        await serve(request)
+    assert tab.send_command.call_args[0][0] == "Fetch.failRequest"
@@ -1,6 +1,38 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
 import pytest
 
-from kaleido._sync_server import GlobalKaleidoServer
+from kaleido import _warm_idle_timeout_from_env
+from kaleido._sync_server import GlobalKaleidoServer, WarmKaleidoServer
+
+
+class FakeKaleido:
+    """Stands in for Kaleido: counts how many calls run at once."""
+
+    running = 0
+    most_running = 0
+
+    def __init__(self, *_args, **_kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_args):
+        pass
+
+    async def calc_fig(self, fig):
+        FakeKaleido.running += 1
+        FakeKaleido.most_running = max(FakeKaleido.most_running, FakeKaleido.running)
+        await asyncio.sleep(0.1)
+        FakeKaleido.running -= 1
+        return fig
 
 
 class TestGlobalKaleidoServer:
@@ -86,8 +118,191 @@ class TestGlobalKaleidoServer:
             # Clean up - remove __getattr__ from the class
             delattr(GlobalKaleidoServer, "__getattr__")
 
+    def test_calls_from_threads_run_concurrently(self):
+        """Test that calls from many threads run at once, with their own results."""
+        server = GlobalKaleidoServer()
+        with patch("kaleido._sync_server.Kaleido", FakeKaleido):
+            server.open()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(4) as pool:
+                results = list(
+                    pool.map(lambda i: server.call_function("calc_fig", i), range(4)),
+                )
+            elapsed = time.perf_counter() - start
+            server.close()
+
+        assert results == [0, 1, 2, 3]
+        assert FakeKaleido.most_running == 4  # noqa: PLR2004
+        assert elapsed < 0.3  # noqa: PLR2004
+
+    def test_startup_error_reaches_caller(self):
+        """Test that a Kaleido that fails to start raises in call_function."""
+        server = GlobalKaleidoServer()
+
+        class BrokenKaleido(FakeKaleido):
+            async def __aenter__(self):
+                raise ValueError("no browser")
+
+        with patch("kaleido._sync_server.Kaleido", BrokenKaleido):
+            server.open()
+            with pytest.raises(ValueError, match="no browser"):
+                server.call_function("calc_fig", 1)
+            server.close()
+
+    def test_call_keeps_the_server_it_was_submitted_to(self):
+        """Test that a call submitted just before close() still finds its Kaleido."""
+        server = GlobalKaleidoServer()
+        with patch("kaleido._sync_server.Kaleido", FakeKaleido):
+            server.open()
+            assert server.call_function("calc_fig", 0) == 0
+            # hold the server's loop, so the call runs after close() starts
+            server._loop.call_soon_threadsafe(time.sleep, 0.2)  # noqa: SLF001
+            call = server._submit("__aenter__", (), {})  # noqa: SLF001
+            server.close()
+            assert isinstance(call.result(timeout=1), FakeKaleido)
+
+    def test_close_finalizes_async_generators(self):
+        """Test that close() finishes async generators left on the server's loop."""
+        server = GlobalKaleidoServer()
+        finalized = []
+        left_open = []
+
+        class LeakyKaleido(FakeKaleido):
+            async def calc_fig(self, fig):
+                async def stream():
+                    try:
+                        yield fig
+                    finally:
+                        finalized.append(fig)
+
+                left_open.append(stream())
+                return await left_open[-1].__anext__()
+
+        with patch("kaleido._sync_server.Kaleido", LeakyKaleido):
+            server.open()
+            assert server.call_function("calc_fig", 1) == 1
+            server.close()
+
+        assert finalized == [1]
+
     def teardown_method(self):
         """Clean up after each test."""
         server = GlobalKaleidoServer()
         if server.is_running():
             server.close(silence_warnings=True)
+
+
+class TestWarmKaleidoServer:
+    """Test the lazily opened, idle-closing WarmKaleidoServer."""
+
+    def test_separate_singleton(self):
+        assert WarmKaleidoServer() is WarmKaleidoServer()
+        assert WarmKaleidoServer() is not GlobalKaleidoServer()
+
+    def test_opens_on_use_and_closes_when_idle(self):
+        server = WarmKaleidoServer()
+        server.enable(idle_timeout=0.1)
+        with patch("kaleido._sync_server.Kaleido", FakeKaleido):
+            assert not server.is_running()
+            assert server.call_function("calc_fig", 1) == 1
+            assert server.is_running()
+            assert asyncio.run(server.call_function_async("calc_fig", 2)) == 2  # noqa: PLR2004
+            time.sleep(0.3)
+            assert not server.is_running()
+
+    def test_closes_after_startup_error(self):
+        server = WarmKaleidoServer()
+
+        class BrokenKaleido(FakeKaleido):
+            async def __aenter__(self):
+                raise ValueError("no browser")
+
+        with patch("kaleido._sync_server.Kaleido", BrokenKaleido), pytest.raises(
+            ValueError,
+            match="no browser",
+        ):
+            server.call_function("calc_fig", 1)
+        assert not server.is_running()
+
+    def test_disable_waits_for_calls_in_progress(self):
+        server = WarmKaleidoServer()
+        server.enable()
+        with patch("kaleido._sync_server.Kaleido", FakeKaleido), ThreadPoolExecutor(
+            1,
+        ) as pool:
+            call = pool.submit(server.call_function, "calc_fig", 1)
+            while not FakeKaleido.running:
+                time.sleep(0.01)
+            start = time.perf_counter()
+            server.disable()
+            assert time.perf_counter() - start < 0.05  # noqa: PLR2004
+            assert server.is_running()
+            assert call.result(timeout=1) == 1
+        assert not server.is_running()
+
+    def test_async_close_after_error_keeps_loop_running(self):
+        server = WarmKaleidoServer()
+        left_open = []
+
+        class SlowToStopKaleido(FakeKaleido):
+            async def __aenter__(self):
+                async def stopping():
+                    try:
+                        yield
+                    finally:
+                        time.sleep(0.3)  # noqa: ASYNC251 blocks the server's thread as it stops
+
+                left_open.append(stopping())
+                await left_open[-1].__anext__()
+                raise ValueError("no browser")
+
+        async def main():
+            ticks = []
+
+            async def tick():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.02)
+
+            ticker = asyncio.ensure_future(tick())
+            with pytest.raises(ValueError, match="no browser"):
+                await server.call_function_async("calc_fig", 1)
+            ticker.cancel()
+            return max(b - a for a, b in zip(ticks, ticks[1:]))
+
+        with patch("kaleido._sync_server.Kaleido", SlowToStopKaleido):
+            longest_gap = asyncio.run(main())
+        assert not server.is_running()
+        assert longest_gap < 0.2  # noqa: PLR2004
+
+    def teardown_method(self):
+        WarmKaleidoServer().disable()
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(None, None), ("", None), ("12.5", 12.5), ("abc", None), ("-1", None)],
+)
+def test_warm_idle_timeout_from_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("KALEIDO_WARM_IDLE_TIMEOUT", raising=False)
+    else:
+        monkeypatch.setenv("KALEIDO_WARM_IDLE_TIMEOUT", value)
+    if expected is None and value:
+        with pytest.warns(RuntimeWarning, match="KALEIDO_WARM_IDLE_TIMEOUT"):
+            assert _warm_idle_timeout_from_env() is None
+    else:
+        assert _warm_idle_timeout_from_env() == expected
+
+
+def test_bad_warm_idle_timeout_keeps_kaleido_importable():
+    env = {**os.environ, "KALEIDO_WARM": "1", "KALEIDO_WARM_IDLE_TIMEOUT": "abc"}
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", "import kaleido"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "KALEIDO_WARM_IDLE_TIMEOUT" in result.stderr
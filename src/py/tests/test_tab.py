@@ -0,0 +1,299 @@
+# ruff: noqa: SLF001
+import asyncio
+import base64
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import orjson
+import pytest
+
+from kaleido._kaleido_tab import CodeCache, ContentStore, _devtools_utils, _KaleidoTab
+from kaleido._kaleido_tab import _tab as tab_module
+from kaleido._profiler import RenderTaskProfile
+
+
+@pytest.fixture
+def ktab():
+    tab = _KaleidoTab(MagicMock())
+    tab.reload = AsyncMock()
+    tab.reset = AsyncMock(return_value=True)
+    tab.heap_usage = AsyncMock(return_value=1000)
+    return tab
+
+
+async def test_recycle_default_always_reloads(ktab):
+    for _ in range(3):
+        await ktab.recycle()
+    assert ktab.reload.await_count == 3  # noqa: PLR2004
+    ktab.reset.assert_not_awaited()
+
+
+async def test_recycle_every(ktab):
+    policy = {"every": 3}
+    reloaded = [await ktab.recycle(policy) for _ in range(3)]
+    assert reloaded == [False, False, True]
+    assert ktab.reset.await_count == 2  # noqa: PLR2004
+    ktab.reload.assert_awaited_once()
+
+
+async def test_recycle_error_forces_reload(ktab):
+    await ktab.recycle({"every": 100}, errored=True)
+    ktab.reload.assert_awaited_once()
+    ktab.reset.assert_not_awaited()
+
+
+async def test_recycle_failed_reset_reloads(ktab):
+    ktab.reset.return_value = False
+    await ktab.recycle({"every": 100})
+    ktab.reset.assert_awaited_once()
+    ktab.reload.assert_awaited_once()
+
+
+@pytest.mark.parametrize(("max_heap", "reloads"), [(10_000, 0), (10, 1)])
+async def test_recycle_max_heap(ktab, max_heap, reloads):
+    await ktab.recycle({"every": 100, "max_heap": max_heap})
+    assert ktab.reload.await_count == reloads
+
+
+async def test_recycle_heap_error_reloads(ktab):
+    ktab.heap_usage.side_effect = RuntimeError("no heap")
+    await ktab.recycle({"every": 100, "max_heap": 10})
+    ktab.reload.assert_awaited_once()
+
+
+async def test_calc_fig_chunked_out_of_order(ktab):
+    spec = {"data": [{"text": ["héllo wörld ✓"] * 2000}]}
+    spec_bytes = orjson.dumps(spec)
+    page = {}
+
+    async def fake_exec_js_fn(_cdp_tab, _js_id, fn, *args):
+        if fn == tab_module._CHUNKS_INIT_JS_FN:
+            page["buf"] = bytearray(args[0])
+        elif fn == tab_module._CHUNK_PUT_JS_FN:
+            offset, chunk = args
+            await asyncio.sleep(0.01 if offset == 0 else 0)  # arrive out of order
+            encoded = chunk.encode()
+            page["buf"][offset : offset + len(encoded)] = encoded
+        else:
+            return {"result": {"result": {"value": page["buf"].decode()}}}
+        return {}
+
+    render_prof = RenderTaskProfile()
+    ktab._current_js_id = "ctx"
+    with patch.object(
+        tab_module._dtools,
+        "exec_js_fn",
+        fake_exec_js_fn,
+    ), patch.multiple(tab_module, _CHUNK_SIZE=1000, _MIN_CHUNK_SIZE=500):
+        result = await ktab._calc_fig_chunked(
+            spec_bytes,
+            topojson=None,
+            render_prof=render_prof,
+            stepper=False,
+        )
+
+    assert orjson.loads(result["result"]["result"]["value"]) == spec
+    assert len(render_prof.chunk_log) > 1
+    assert sum(size for _, size, _ in render_prof.chunk_log) == len(spec_bytes)
+
+
+async def test_calc_fig_outputs():
+    ktab = _KaleidoTab(MagicMock())
+    ktab._current_js_id = "ctx"
+    spec = {
+        "data": {"data": []},
+        "format": "png",
+        "width": 10,
+        "height": 20,
+        "scale": 2,
+        "outputs": [
+            {"format": f, "width": 10, "height": 20, "scale": 2}
+            for f in ("png", "pdf", "svg")
+        ],
+    }
+    calls = []
+
+    async def fake_exec_js_fn(_cdp_tab, _js_id, fn, *args):
+        calls.append((fn, args))
+        if fn == tab_module._PDF_PAGE_JS_FN:
+            return {"result": {"result": {"value": True}}}
+        outputs = [
+            {"code": 0, "format": "png", "result": base64.b64encode(b"a").decode()},
+            {
+                "code": 0,
+                "format": "pdf",
+                "result": "data:image/svg+xml,x",
+                "width": 10,
+                "height": 20,
+                "scale": 2,
+                "pdfBgColor": "red",
+            },
+            {"code": 0, "format": "svg", "result": "<svg/>"},
+        ]
+        response = {"code": 0, "format": "png", "result": None, "outputs": outputs}
+        return {"result": {"result": {"value": orjson.dumps(response).decode()}}}
+
+    async def fake_print_pdf(_cdp_tab):
+        yield b"%PDF"
+
+    prof = RenderTaskProfile()
+    with patch.multiple(
+        tab_module._dtools,
+        exec_js_fn=fake_exec_js_fn,
+        print_pdf=fake_print_pdf,
+    ):
+        results = await ktab._calc_fig_outputs(spec, topojson=None, render_prof=prof)
+
+    assert results == [b"a", b"%PDF", b"<svg/>"]
+    assert len(calls) == 2  # noqa: PLR2004 one render, one pdf page
+    assert orjson.loads(calls[0][1][0]) == spec
+    assert calls[1] == (
+        tab_module._PDF_PAGE_JS_FN,
+        ("data:image/svg+xml,x", 20, 40, "red"),
+    )
+    assert prof.data_out_size == 1 + 4 + 6
+
+
+async def test_print_pdf_streams_to_file(tmp_path):
+    pdf = b"%PDF-1.4 " + bytes(range(256)) * 10
+    pieces = [pdf[:1000], pdf[1000:]]
+    responses = [
+        {"result": {"stream": "h1"}},
+        {
+            "result": {
+                "data": base64.b64encode(pieces[0]).decode(),
+                "base64Encoded": True,
+            }
+        },
+        {
+            "result": {
+                "data": base64.b64encode(pieces[1]).decode(),
+                "base64Encoded": True,
+                "eof": True,
+            },
+        },
+        {},
+    ]
+    cdp_tab = MagicMock()
+    cdp_tab.send_command = AsyncMock(side_effect=responses)
+    path = tmp_path / "fig.pdf"
+
+    written = await tab_module._write_chunks(_devtools_utils.print_pdf(cdp_tab), path)
+
+    assert written == len(pdf)
+    assert path.read_bytes() == pdf
+    assert cdp_tab.send_command.await_args_list[0].args[0] == "Page.printToPDF"
+    assert cdp_tab.send_command.await_args_list[-1].args[0] == "IO.close"
+
+
+async def test_code_cache_produced_once_then_seeded():
+    """Test the first tab produces the code cache and later loads reuse it."""
+    cache = CodeCache(["file:///plotly.js"])
+    first, second = MagicMock(), MagicMock()
+    first.send_command = AsyncMock(return_value={})
+    second.send_command = AsyncMock(return_value={})
+
+    assert not await cache.prepare(first)
+    first.send_command.assert_awaited_with(
+        "Page.produceCompilationCache",
+        params={"scripts": [{"url": "file:///plotly.js", "eager": True}]},
+    )
+    store = first.subscribe.call_args[0][1]
+    await store({"params": {"url": "file:///other.js", "data": "b3RoZXI="}})
+    first.unsubscribe.assert_not_called()
+    await store({"params": {"url": "file:///plotly.js", "data": "Y29kZQ=="}})
+    first.unsubscribe.assert_called_once_with("Page.compilationCacheProduced")
+
+    ktab = _KaleidoTab(second, code_cache=cache)
+    for _ in range(3):  # as navigate and reloads do
+        await ktab._prepare_code_cache()
+    second.send_command.assert_awaited_once_with(
+        "Page.addCompilationCache",
+        params={"url": "file:///plotly.js", "data": "Y29kZQ=="},
+    )
+    second.subscribe.assert_not_called()
+
+
+async def test_mathjax_loaded_only_for_latex(ktab):
+    calls = []
+
+    async def fake_exec_js_fn(_cdp_tab, _js_id, fn, *args):
+        calls.append(fn)
+        if fn == tab_module._LOAD_MATHJAX_JS_FN:
+            assert args == ("https://mathjax.js", "utf-8")
+            return {"result": {"result": {"value": True}}}
+        svg = {"code": 0, "format": "svg", "result": "<svg/>"}
+        return {"result": {"result": {"value": orjson.dumps(svg).decode()}}}
+
+    ktab._current_js_id = "ctx"
+    ktab._mathjax = ("https://mathjax.js", "utf-8")
+    plain = {"format": "svg", "data": {"data": [], "layout": {"title": "$5"}}}
+    latex = {"format": "svg", "data": {"data": [{"name": r"$\alpha$"}]}}
+    with patch.object(tab_module._dtools, "exec_js_fn", fake_exec_js_fn):
+        for spec in (plain, latex, latex):
+            await ktab._calc_fig(
+                spec,
+                topojson=None,
+                render_prof=RenderTaskProfile(),
+                stepper=False,
+            )
+
+    assert calls.count(tab_module._LOAD_MATHJAX_JS_FN) == 1
+    assert calls.index(tab_module._LOAD_MATHJAX_JS_FN) == 1
+
+
+async def test_calc_fig_batch():
+    ktab = _KaleidoTab(MagicMock())
+    ktab._current_js_id = "ctx"
+    specs = [
+        {"data": {"data": [], "i": i}, "format": f, "width": 1, "height": 1}
+        for i, f in enumerate(("png", "svg", "png"))
+    ]
+    sent = []
+
+    async def fake_exec_js_fn(_cdp_tab, _js_id, fn, *args):
+        assert fn == tab_module._BATCH_JS_FN
+        sent.append(orjson.loads(args[0]))
+        responses = [
+            {"code": 0, "format": "png", "result": base64.b64encode(b"a").decode()},
+            {"code": 0, "format": "svg", "result": "<svg/>"},
+            {"code": 525, "message": "bad figure", "format": "png", "result": None},
+        ]
+        return {"result": {"result": {"value": orjson.dumps(responses).decode()}}}
+
+    profs = [RenderTaskProfile() for _ in specs]
+    with patch.object(tab_module._dtools, "exec_js_fn", fake_exec_js_fn):
+        results = await ktab._calc_fig_batch(specs, topojson=None, render_profs=profs)
+
+    assert sent == [specs]
+    assert results[:2] == [b"a", b"<svg/>"]
+    assert str(results[2]) == "Error 525: bad figure"
+    assert [p.data_out_size for p in profs] == [1, 6, None]
+    assert all(p.data_in_size for p in profs)
+
+
+async def test_store_content_uploads_parts_once():
+    ktab = _KaleidoTab(MagicMock(), content_store=ContentStore(10_000, min_size=100))
+    ktab._current_js_id = "ctx"
+    puts = []
+
+    async def fake_exec_js_fn(_cdp_tab, _js_id, fn, *args):
+        assert fn == tab_module._STORE_PUT_JS_FN
+        puts.append(args)
+        return {"result": {"result": {"value": None}}}
+
+    spec = {"format": "png", "data": {"data": [{"x": list(range(100))}]}}
+    with patch.object(tab_module._dtools, "exec_js_fn", fake_exec_js_fn):
+        for _ in range(2):
+            (split,), (stored,) = await ktab._store_content(
+                [spec],
+                [RenderTaskProfile()],
+            )
+            assert split["data"]["data"][0]["x"] is None
+        assert stored == 0
+        assert len(puts) == 1
+        assert puts[0][0] == []  # nothing to drop
+        assert orjson.loads(puts[0][2]) == list(range(100))
+
+        ktab._content_store.clear()  # as a reload does
+        await ktab._store_content([spec], [RenderTaskProfile()])
+        assert len(puts) == 2  # noqa: PLR2004
@@ -1,7 +1,12 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+import orjson
 import pytest
 
+from kaleido._utils import Offloader, orjson_default
 from kaleido._utils.path_tools import get_path, is_httpish
 
 pytestmark = pytest.mark.asyncio(loop_scope="function")
@@ -55,3 +60,28 @@ async def test_is_httpish_with_other_schemes():
     """Test is_httpish function with other URL schemes."""
     assert is_httpish("ftp://example.com/test.js") is False
     assert is_httpish("mailto:test@example.com") is False
+
+
+async def test_offloader_runs_large_jobs_in_executor():
+    """Test that only jobs at or over the threshold leave the event loop."""
+    main = threading.get_ident()
+    offloader = Offloader(threshold=100)
+    assert await offloader.run(99, threading.get_ident) == main
+    assert await offloader.run(100, threading.get_ident) != main
+    assert await offloader.run(None, threading.get_ident) != main
+    assert await Offloader(threshold=None).run(None, threading.get_ident) == main
+
+    with ThreadPoolExecutor(1, thread_name_prefix="mine") as pool:
+        offloader = Offloader(pool, threshold=0)
+        name = await offloader.run(0, lambda: threading.current_thread().name)
+    assert name.startswith("mine")
+
+
+async def test_orjson_default():
+    """Test orjson_default serializes what orjson can't, like string arrays."""
+    data = {"text": np.array(["a", "b"])}
+    assert orjson.loads(orjson.dumps(data, default=orjson_default)) == {
+        "text": ["a", "b"],
+    }
+    with pytest.raises(TypeError, match="not JSON serializable: object"):
+        orjson_default(object())